@@ -0,0 +1,375 @@
+"""
+In-process stand-ins for S3, the lakeFS API, Open-Meteo and the SageMaker API and runtime.
+Every fake counts its requests so the benchmark can report them per handler.
+"""
+import io
+import sys
+import json
+import types
+import hashlib
+import numpy as np
+import pandas as pd
+from collections import Counter
+from benchmarks.synthetic import daily_frame, hourly_frame
+
+class NoSuchKey(Exception):
+    pass
+
+class ClientError(Exception):
+    pass
+
+class _Body(io.BytesIO):
+    pass
+
+class _Paginator:
+
+    def __init__(self, s3: "FakeS3"):
+        self.s3 = s3
+
+    def paginate(self, Bucket: str, Prefix: str = "", Delimiter: str | None = None):
+        yield self.s3.list_objects_v2(Bucket=Bucket, Prefix=Prefix, Delimiter=Delimiter)
+
+class FakeS3:
+    """
+    Dict-backed implementation of the S3 client calls the data stores make.
+    One instance serves every bucket, including the lakeFS gateway repositories.
+    """
+
+    class exceptions:
+        NoSuchKey = NoSuchKey
+        ClientError = ClientError
+
+    def __init__(self):
+        self.objects = {}
+        self.requests = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _get(self, bucket: str, key: str) -> bytes:
+        if (bucket, key) not in self.objects:
+            raise NoSuchKey(f"s3://{bucket}/{key}")
+        return self.objects[(bucket, key)]
+
+    def put_object(self, Bucket: str, Key: str, Body, **_):
+        self.requests["PutObject"] += 1
+        data = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        self.bytes_in += len(data)
+        self.objects[(Bucket, Key)] = data
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None, **_):
+        self.requests["GetObject"] += 1
+        data = self._get(Bucket, Key)
+        if Range:
+            start, _, end = Range[len("bytes="):].partition("-")
+            data = data[int(start):int(end) + 1 if end else None]
+        self.bytes_out += len(data)
+        return {"Body": _Body(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket: str, Key: str, **_):
+        self.requests["HeadObject"] += 1
+        try:
+            data = self._get(Bucket, Key)
+        except NoSuchKey as e:
+            raise ClientError(f"404 {e}")
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}"', "ContentLength": len(data)}
+
+    def copy_object(self, Bucket: str, Key: str, CopySource: dict, **_):
+        self.requests["CopyObject"] += 1
+        self.objects[(Bucket, Key)] = self._get(CopySource["Bucket"], CopySource["Key"])
+
+    def delete_object(self, Bucket: str, Key: str, **_):
+        self.requests["DeleteObject"] += 1
+        self.objects.pop((Bucket, Key), None)
+
+    def delete_objects(self, Bucket: str, Delete: dict, **_):
+        self.requests["DeleteObjects"] += 1
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+
+    def download_file(self, Bucket: str, Key: str, Filename: str):
+        self.requests["GetObject"] += 1
+        with open(Filename, "wb") as f:
+            f.write(self._get(Bucket, Key))
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", Delimiter: str | None = None, **_):
+        self.requests["ListObjectsV2"] += 1
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        if not Delimiter:
+            return {"Contents": [{"Key": k, "Size": len(self.objects[(Bucket, k)])} for k in keys]}
+        contents, prefixes = [], []
+        for k in keys:
+            rest = k[len(Prefix):]
+            if Delimiter in rest:
+                common = Prefix + rest.split(Delimiter, 1)[0] + Delimiter
+                if common not in prefixes:
+                    prefixes.append(common)
+            else:
+                contents.append({"Key": k, "Size": len(self.objects[(Bucket, k)])})
+        return {"Contents": contents, "CommonPrefixes": [{"Prefix": p} for p in prefixes]}
+
+    def get_paginator(self, operation: str):
+        return _Paginator(self)
+
+class FakeLakeFS:
+    """
+    Branch, commit and merge calls of the lakeFS SDK on top of FakeS3, where
+    lakeFS gateway objects live at <repository>/<branch>/<path>.
+    """
+
+    def __init__(self, s3: FakeS3):
+        self.s3 = s3
+        self.requests = Counter()
+        self.branches = {}
+        self.commits = 0
+
+    def _copy_branch(self, repo: str, source: str, dest: str, clear: bool) -> None:
+        if clear:
+            for key in [k for b, k in self.s3.objects if b == repo and k.startswith(f"{dest}/")]:
+                del self.s3.objects[(repo, key)]
+        for (bucket, key), data in list(self.s3.objects.items()):
+            if bucket == repo and key.startswith(f"{source}/"):
+                self.s3.objects[(repo, f"{dest}/{key[len(source) + 1:]}")] = data
+
+    def module(self) -> types.ModuleType:
+        """A stand-in for the lakefs package, registered in sys.modules."""
+        fake = self
+        requests = self.requests
+
+        class BadRequestException(Exception):
+            pass
+
+        class Commit:
+            def __init__(self, id):
+                self.id = id
+
+        class Branch:
+            def __init__(self, repo, name):
+                self.repo = repo
+                self.id = name
+
+            def create(self, source_reference, exist_ok=False):
+                requests["CreateBranch"] += 1
+                branches = fake.branches.setdefault(self.repo, {"main"})
+                if self.id not in branches:
+                    branches.add(self.id)
+                    fake._copy_branch(self.repo, source_reference, self.id, clear=True)
+                return self
+
+            def commit(self, message):
+                requests["Commit"] += 1
+                fake.commits += 1
+                return Commit(f"c{fake.commits:06d}")
+
+            def get_commit(self):
+                requests["GetCommit"] += 1
+                return Commit(f"c{fake.commits:06d}")
+
+            def merge_into(self, dest):
+                requests["Merge"] += 1
+                fake._copy_branch(self.repo, self.id, dest.id if isinstance(dest, Branch) else dest, clear=True)
+                fake.commits += 1
+                return f"c{fake.commits:06d}"
+
+            def delete(self):
+                requests["DeleteBranch"] += 1
+                fake.branches.setdefault(self.repo, {"main"}).discard(self.id)
+                for key in [k for b, k in fake.s3.objects if b == self.repo and k.startswith(f"{self.id}/")]:
+                    del fake.s3.objects[(self.repo, key)]
+
+        class Repository:
+            def __init__(self, repository_id, client=None):
+                self.id = repository_id
+
+            def branches(self):
+                requests["ListBranches"] += 1
+                return [Branch(self.id, name) for name in sorted(fake.branches.setdefault(self.id, {"main"}))]
+
+            def branch(self, name):
+                return Branch(self.id, name)
+
+        class Client:
+            def __init__(self, username=None, password=None, host=None):
+                self.host = host
+
+        lakefs = types.ModuleType("lakefs")
+        lakefs.repository = lambda repository_id, client=None: Repository(repository_id, client)
+        lakefs.Repository = Repository
+        lakefs.client = types.ModuleType("lakefs.client")
+        lakefs.client.Client = Client
+        lakefs.exceptions = types.ModuleType("lakefs.exceptions")
+        lakefs.exceptions.BadRequestException = BadRequestException
+        return lakefs
+
+class _Variable:
+
+    def __init__(self, values: np.ndarray):
+        self._values = values
+
+    def ValuesAsNumpy(self) -> np.ndarray:
+        return self._values
+
+class _Daily:
+
+    def __init__(self, start: pd.Timestamp, end: pd.Timestamp, variables: list[np.ndarray], interval: int = 86400):
+        self._start = start
+        self._end = end
+        self._variables = variables
+        self._interval = interval
+
+    def Time(self) -> int:
+        return int(self._start.timestamp())
+
+    def TimeEnd(self) -> int:
+        return int((self._end + pd.Timedelta(days=1)).timestamp())
+
+    def Interval(self) -> int:
+        return self._interval
+
+    def Variables(self, i: int) -> _Variable:
+        return self._variables[i]
+
+class _Response:
+
+    def __init__(self, daily: _Daily | None, hourly: _Daily | None = None, utc_offset_seconds: int = 0):
+        self._daily = daily
+        self._hourly = hourly
+        self._utc_offset_seconds = utc_offset_seconds
+
+    def Daily(self) -> _Daily | None:
+        return self._daily
+
+    def Hourly(self) -> _Daily | None:
+        return self._hourly
+
+    def UtcOffsetSeconds(self) -> int:
+        return self._utc_offset_seconds
+
+class FakeOpenMeteo:
+    """
+    Answers weather_api calls with response objects exposing the same accessors
+    as the Open-Meteo FlatBuffer responses, filled with reproducible synthetic values.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.requests = Counter()
+
+    def weather_api(self, url: str, params: dict) -> list[_Response]:
+        self.requests["weather_api"] += 1
+        # like Open-Meteo, days start at local midnight with the offset of the first day
+        timezone = params.get("timezone") or "UTC"
+        if timezone in ("auto", "GMT"):
+            timezone = "UTC"
+        offset = pd.Timedelta(pd.Timestamp(params["start_date"], tz=timezone).utcoffset())
+        start = pd.Timestamp(params["start_date"], tz="UTC") - offset
+        end = pd.Timestamp(params["end_date"], tz="UTC") - offset
+        dates = pd.date_range(start, end, freq="D")
+        rng = np.random.default_rng([self.seed, int(start.timestamp()) // 86400])
+        daily = hourly = None
+        if params.get("daily"):
+            df = daily_frame(dates, params["latitude"], params["longitude"], rng, params["daily"])
+            daily = _Daily(start, end, [_Variable(df[name].to_numpy()) for name in params["daily"]])
+        if params.get("hourly"):
+            df = hourly_frame(dates, params["latitude"], params["longitude"], rng, params["hourly"])
+            hourly = _Daily(start, end, [_Variable(df[name].to_numpy()) for name in params["hourly"]], interval=3600)
+        return [_Response(daily, hourly, int(offset.total_seconds()))]
+
+    def modules(self) -> dict[str, types.ModuleType]:
+        """Stand-ins for openmeteo_requests, requests_cache and retry_requests."""
+        fake = self
+        openmeteo_requests = types.ModuleType("openmeteo_requests")
+        openmeteo_requests.Client = lambda session=None: fake
+        requests_cache = types.ModuleType("requests_cache")
+        requests_cache.CachedSession = lambda *args, **kwargs: None
+        retry_requests = types.ModuleType("retry_requests")
+        retry_requests.retry = lambda session, **kwargs: session
+        return {
+            "openmeteo_requests": openmeteo_requests,
+            "requests_cache": requests_cache,
+            "retry_requests": retry_requests
+        }
+
+class FakeSageMakerRuntime:
+    """Scores every row of an npy or CSV payload with the most frequent weather code."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.rows = 0
+
+    def invoke_endpoint(self, EndpointName: str, ContentType: str, Body: bytes, **_):
+        self.requests["InvokeEndpoint"] += 1
+        if ContentType == "application/x-npy":
+            n_rows = len(np.load(io.BytesIO(Body), allow_pickle=False))
+        else:
+            n_rows = Body.decode("utf-8").count("\n")
+        self.rows += n_rows
+        return {"Body": _Body(json.dumps([3.0] * n_rows).encode("utf-8"))}
+
+class FakeSageMaker:
+    """describe_endpoint / describe_endpoint_config of endpoints serving a single model."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.endpoints = {"sklearn-serverless-endpoint": "bench-model"}
+        self.status = "InService"
+
+    def deploy(self, endpoint: str, model_name: str) -> None:
+        self.endpoints[endpoint] = model_name
+
+    def describe_endpoint(self, EndpointName: str, **_):
+        self.requests["DescribeEndpoint"] += 1
+        model_name = self.endpoints[EndpointName]
+        return {"EndpointName": EndpointName, "EndpointConfigName": f"{model_name}-config", "EndpointStatus": self.status}
+
+    def describe_endpoint_config(self, EndpointConfigName: str, **_):
+        self.requests["DescribeEndpointConfig"] += 1
+        model_name = EndpointConfigName[:-len("-config")]
+        return {"EndpointConfigName": EndpointConfigName, "ProductionVariants": [{"VariantName": "AllTraffic", "ModelName": model_name}]}
+
+class FakeAWS:
+    """All stand-ins of one benchmark run, wired into src.ds.clients and sys.modules."""
+
+    def __init__(self, seed: int = 0):
+        self.s3 = FakeS3()
+        self.lakefs = FakeLakeFS(self.s3)
+        self.open_meteo = FakeOpenMeteo(seed)
+        self.runtime = FakeSageMakerRuntime()
+        self.sagemaker = FakeSageMaker()
+
+    def get_client(self, service: str, *args, **kwargs):
+        if service == "s3":
+            return self.s3
+        if service == "sagemaker-runtime":
+            return self.runtime
+        if service == "sagemaker":
+            return self.sagemaker
+        raise ValueError(f"No fake for {service}")
+
+    def request_counts(self) -> Counter:
+        return (
+            self.s3.requests + self.lakefs.requests
+            + self.open_meteo.requests + self.runtime.requests + self.sagemaker.requests
+        )
+
+    def install(self) -> None:
+        """
+        Must run before any handler module is imported: handlers bind clients
+        at import time (validate_model) or on first use (everything else).
+        """
+        sys.modules["lakefs"] = self.lakefs.module()
+        sys.modules["lakefs.client"] = sys.modules["lakefs"].client
+        sys.modules["lakefs.exceptions"] = sys.modules["lakefs"].exceptions
+        sys.modules.update(self.open_meteo.modules())
+        try:
+            import src.ds.clients as clients
+        except ImportError:
+            # boto3 is never called through the fakes, a placeholder is enough to import the stores
+            boto3 = types.ModuleType("boto3")
+            boto3.session = types.SimpleNamespace(Session=None)
+            botocore = types.ModuleType("botocore")
+            botocore.config = types.ModuleType("botocore.config")
+            botocore.config.Config = dict
+            sys.modules.update({"boto3": boto3, "botocore": botocore, "botocore.config": botocore.config})
+            import src.ds.clients as clients
+        clients.get_client = self.get_client
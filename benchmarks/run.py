@@ -0,0 +1,157 @@
+"""
+Runs every Lambda handler end to end against the in-process fakes and reports
+wall time, peak memory and request counts per handler.
+
+    python -m benchmarks.run --years 3
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import importlib
+import resource
+import tracemalloc
+import pandas as pd
+from contextlib import redirect_stdout
+from benchmarks.fakes import FakeAWS
+from benchmarks.synthetic import make_locations
+
+REPO_NAME = "weather-data"
+LAKEFS_ENDPOINT = "http://lakefs.local:8000"
+MODEL_BUCKET = "weather-model-478492276227"
+BENCH_JOB = "bench-job"
+
+def pipeline_events(
+        start_date: str,
+        batch_start: str,
+        batch_end: str,
+        locations: list[dict],
+        resolution: str = "daily"
+    ) -> list[tuple[str, str, dict]]:
+    """(label, handler module, event) in the order the Step Functions run them."""
+    data_event = {
+        "repo_name": REPO_NAME,
+        "lakefs_endpoint": LAKEFS_ENDPOINT,
+        "default_start_date": start_date,
+        "locations": locations,
+        "resolution": resolution
+    }
+    return [
+        ("get-weather-data", "src.data.extract", data_event),
+        ("validate-raw-data", "src.data.validate_extract", data_event),
+        ("process-weather-data", "src.data.transform", data_event),
+        ("validate-processed-data", "src.data.validate_transform", data_event),
+        ("predict-weather-code", "src.model.predict", {}),
+        ("predict-weather-code (batch)", "src.model.predict", {"start_date": batch_start, "end_date": batch_end}),
+        ("detect-data-drift", "src.monitoring.check_data_drift", {}),
+        ("detect-data-drift (windows)", "src.monitoring.check_data_drift", {"windows": [7, 30]}),
+        ("monitor-model-performance", "src.monitoring.performance_monitor", {"repo_name": REPO_NAME, "lakefs_endpoint": LAKEFS_ENDPOINT}),
+        ("model-accuracy", "src.model.validate_model", {"ModelName": BENCH_JOB}),
+        ("model-deployed", "src.model.validate_model", {"Deployed": True, "ModelName": BENCH_JOB})
+    ]
+
+def seed_prediction_log(aws: FakeAWS, days: int) -> None:
+    """Logs the last `days` processed rows of main as if predict had scored them daily."""
+    from src.ds import get_lakefs_store, get_s3_store
+    from src.data.utils import load_partitions
+    lakefs_ds = get_lakefs_store(REPO_NAME, LAKEFS_ENDPOINT)
+    end = pd.Timestamp(lakefs_ds.load_json(key = "data/processed/manifest.json")["last_updated_date"])
+    df = load_partitions(lakefs_ds, "processed", end - pd.Timedelta(days=days), end)
+    df = df.sort_values("date").tail(days)
+    df["prediction"] = df["weather_code"]
+    get_s3_store(MODEL_BUCKET).save_df(df, "logs/daily_predictions.csv")
+
+def seed_model_metrics(aws: FakeAWS) -> None:
+    aws.s3.put_object(
+        Bucket=MODEL_BUCKET,
+        Key=f"models/{BENCH_JOB}/output/metrics.json",
+        Body=json.dumps({"accuracy": 0.85})
+    )
+    # stand-in archive, validation only copies it to the approved key
+    aws.s3.put_object(Bucket=MODEL_BUCKET, Key=f"models/{BENCH_JOB}/output/model.tar.gz", Body=b"model")
+
+def _summarize(result) -> str:
+    if not isinstance(result, dict):
+        return "ok"
+    if "validation_result" in result:
+        return result["validation_result"]
+    return str(result.get("statusCode", "ok"))
+
+def run_stage(aws: FakeAWS, label: str, module: str, event: dict, trace_memory: bool, verbose: bool) -> dict:
+    before = aws.request_counts()
+    bytes_in, bytes_out = aws.s3.bytes_in, aws.s3.bytes_out
+    output = sys.stdout if verbose else io.StringIO()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            handler = importlib.import_module(module).lambda_handler
+            status = _summarize(handler(event, None))
+    except Exception as e:
+        status = f"error: {type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    requests = aws.request_counts() - before
+    return {
+        "stage": label,
+        "status": status,
+        "wall_s": round(wall, 3),
+        "peak_heap_mb": round(peak / 2**20, 1) if peak is not None else None,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "requests": dict(sorted(requests.items())),
+        "s3_mb_written": round((aws.s3.bytes_in - bytes_in) / 2**20, 2),
+        "s3_mb_read": round((aws.s3.bytes_out - bytes_out) / 2**20, 2)
+    }
+
+def print_report(results: list[dict]) -> None:
+    print(f"{'stage':32} {'status':>8} {'wall s':>8} {'heap MB':>8} {'rss MB':>8} {'reqs':>6} {'MB w':>7} {'MB r':>7}")
+    for r in results:
+        heap = "-" if r["peak_heap_mb"] is None else f"{r['peak_heap_mb']:.1f}"
+        status = r["status"] if len(r["status"]) <= 8 else "error"
+        print(
+            f"{r['stage']:32} {status:>8} {r['wall_s']:8.3f} {heap:>8} {r['max_rss_mb']:8.1f} "
+            f"{sum(r['requests'].values()):6d} {r['s3_mb_written']:7.2f} {r['s3_mb_read']:7.2f}"
+        )
+    for r in results:
+        if r["status"].startswith("error"):
+            print(f"\n{r['stage']}: {r['status']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Lambda handlers")
+    parser.add_argument("--years", type=int, default=3, help="Years of history the first extract fetches")
+    parser.add_argument("--log-days", type=int, default=90, help="Days of logged predictions for the monitors")
+    parser.add_argument("--batch-days", type=int, default=365, help="Days re-scored by the batch prediction")
+    parser.add_argument("--locations", type=int, default=1, help="Sites the data pipeline extracts, the production site first")
+    parser.add_argument("--resolution", choices=["daily", "hourly"], default="daily", help="Ingestion mode of the extract")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace-memory", action="store_true", help="Skip tracemalloc for undistorted wall times")
+    parser.add_argument("--verbose", action="store_true", help="Show the handlers' own output")
+    parser.add_argument("--json", type=str, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    aws = FakeAWS(seed = args.seed)
+    aws.install()
+
+    today = pd.Timestamp.now().normalize()
+    start_date = f"{today.year - args.years}-01-01"
+    batch_end = (today - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    batch_start = (today - pd.Timedelta(days=args.batch_days)).strftime("%Y-%m-%d")
+    seed_model_metrics(aws)
+
+    results = []
+    locations = make_locations(args.locations, args.seed)
+    for label, module, event in pipeline_events(start_date, batch_start, batch_end, locations, args.resolution):
+        if module == "src.model.predict" and not event:
+            with redirect_stdout(io.StringIO()):
+                seed_prediction_log(aws, args.log_days)
+        results.append(run_stage(aws, label, module, event, not args.no_trace_memory, args.verbose))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,390 @@
+"""
+Generates FEATURES-shaped daily weather for any date span and number of
+locations, in the raw and processed location=/year=/month= partition layout.
+
+    python -m benchmarks.synthetic --start 2018-01-01 --end 2024-12-31 --locations 100 --out untracked/synthetic
+"""
+import os
+import json
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+from src.shared.columns import FEATURES, HOURLY_FEATURES, REMOVE
+from src.shared.partitions import LATITUDE, LONGITUDE, resolve_locations, partition_key
+
+# rough frequencies of the WMO codes observed at the site
+WEATHER_CODES = np.array([0, 1, 2, 3, 51, 53, 55, 61, 63, 65, 71, 73, 75])
+WEATHER_CODE_P = np.array([0.12, 0.14, 0.14, 0.2, 0.1, 0.06, 0.03, 0.08, 0.05, 0.02, 0.03, 0.02, 0.01])
+# mean cloud cover of the dry codes 0 to 3
+DRY_CLOUD_COVER = np.array([5.0, 30.0, 55.0, 85.0])
+
+# never populated by the historical forecast API
+ALWAYS_MISSING = ["sunrise", "sunset"]
+# the other REMOVE columns start somewhere in this window and have outages afterwards
+AVAILABLE_FROM = (pd.Timestamp("2019-01-01", tz="UTC"), pd.Timestamp("2023-06-01", tz="UTC"))
+OUTAGES_PER_YEAR = 3
+MAX_OUTAGE_DAYS = 14
+# sporadic gaps in the kept columns, filled with medians by process_dataframe
+SPORADIC_NAN_RATE = 0.001
+
+def make_locations(n: int, seed: int = 0) -> list[dict]:
+    """The production site followed by n - 1 sites within a few degrees of it."""
+    rng = np.random.default_rng([seed, n])
+    locations = [{"lat": LATITUDE, "long": LONGITUDE}]
+    for lat, long in zip(rng.uniform(-6, 6, n - 1), rng.uniform(-8, 8, n - 1)):
+        locations.append({"lat": round(LATITUDE + lat, 4), "long": round(LONGITUDE + long, 4)})
+    return resolve_locations(locations)
+
+def _smooth(x: np.ndarray, width: int) -> np.ndarray:
+    """Moving average that keeps the length, so noise and soil values persist for a few days."""
+    if len(x) < width:
+        return x
+    kernel = np.ones(width) / width
+    return np.convolve(np.pad(x, (width - 1, 0), mode="edge"), kernel, mode="valid")
+
+def _available_from(column: str) -> pd.Timestamp:
+    """Start of a REMOVE column's coverage, fixed per column so every request agrees."""
+    rng = np.random.default_rng(zlib.crc32(column.encode()))
+    start, end = AVAILABLE_FROM
+    return start + (end - start) * rng.uniform()
+
+def _missing_mask(column: str, dates: pd.DatetimeIndex, rng: np.random.Generator) -> np.ndarray:
+    n = len(dates)
+    if column in ALWAYS_MISSING:
+        return np.ones(n, dtype=bool)
+    mask = np.asarray(dates < _available_from(column))
+    # outages of a few days to two weeks
+    for start in np.flatnonzero(rng.uniform(size=n) < OUTAGES_PER_YEAR / 365.25):
+        mask[start:start + rng.integers(1, MAX_OUTAGE_DAYS + 1)] = True
+    return mask
+
+def _weather_codes(tmean: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    codes = rng.choice(WEATHER_CODES, size=len(tmean), p=WEATHER_CODE_P)
+    intensity = codes % 10
+    wet = codes >= 51
+    # precipitation falls as snow below freezing and as rain above 2 degrees
+    codes = np.where(wet & (tmean < 0), 70 + intensity, codes)
+    codes = np.where((codes >= 71) & (tmean > 2), 60 + intensity, codes)
+    return codes
+
+def daily_frame(
+        dates: pd.DatetimeIndex,
+        lat: float = LATITUDE,
+        long: float = LONGITUDE,
+        rng: np.random.Generator | None = None,
+        features: list[str] | None = None
+    ) -> pd.DataFrame:
+    """
+    One location's daily values for features (all of FEATURES by default), as float32
+    like the Open-Meteo responses. Variables are physically consistent with each
+    other: precipitation follows weather_code, snow needs frost, sunshine needs clear sky.
+    """
+    rng = rng or np.random.default_rng(0)
+    features = FEATURES if features is None else features
+    n = len(dates)
+    doy = np.asarray(dates.dayofyear, dtype=float)
+    season = np.sin(2 * np.pi * (doy - 110) / 365.25)
+
+    # temperature: mean falls with latitude, seasonal swing grows with it
+    tmean = 28 - 0.45 * abs(lat) + 0.3 * abs(lat) * season + _smooth(rng.normal(0, 5, n), 3)
+    trange = 8 + 2 * season + np.abs(rng.normal(0, 2, n))
+    tmax, tmin = tmean + trange / 2, tmean - trange / 2
+
+    codes = _weather_codes(tmean, rng)
+    wet = codes >= 51
+    level = np.select([codes % 10 == 1, codes % 10 == 3], [0, 1], default=2)
+    precip = np.where(wet, rng.gamma(1.2, np.array([1.5, 5.0, 12.0])[level]), 0.0)
+    snow = codes >= 71
+
+    cloud = np.where(wet, 90.0, DRY_CLOUD_COVER[np.minimum(codes, 3)])
+    cloud = np.clip(cloud + rng.normal(0, 8, n), 0, 100)
+
+    # astronomical day length
+    decl = np.radians(23.44) * np.sin(2 * np.pi * (284 + doy) / 365)
+    hour_angle = np.arccos(np.clip(-np.tan(np.radians(lat)) * np.tan(decl), -1, 1))
+    daylight = 2 * np.degrees(hour_angle) / 15 * 3600
+
+    wind = rng.gamma(4, 3.5, n) + 4 * wet
+    rh = np.clip(68 + 18 * wet - 6 * season + rng.normal(0, 6, n), 15, 100)
+    dew = tmean - (100 - rh) / 5
+    radiation = daylight / 3600 * 1.3 * (1 - 0.7 * cloud / 100) * (1 + 0.4 * season)
+    pressure = 1015 - 7 * wet + _smooth(rng.normal(0, 7, n), 3)
+    cape = rng.gamma(0.8, 60, n) * (1 + season) * (1 + wet)
+    soil_temp = _smooth(tmean, 10)
+    soil_moisture = np.clip(0.28 + _smooth(precip, 7) / 100, 0.05, 0.5)
+    uv_clear = np.clip(1 + 4 * (1 + season), 0, 11)
+    prob = np.clip(100 * wet * 0.8 + rng.normal(15, 10, n), 0, 100)
+    vp_sat = 0.6108 * np.exp(17.27 * tmax / (tmax + 237.3))
+
+    values = {
+        "weather_code": codes,
+        "temperature_2m_max": tmax,
+        "temperature_2m_min": tmin,
+        "temperature_2m_mean": tmean,
+        "apparent_temperature_max": tmax - 0.08 * wind + 0.05 * (rh - 50),
+        "apparent_temperature_min": tmin - 0.15 * wind,
+        "apparent_temperature_mean": tmean - 0.1 * wind,
+        "sunrise": np.zeros(n),
+        "sunset": np.zeros(n),
+        "daylight_duration": daylight,
+        "sunshine_duration": daylight * 0.9 * (1 - cloud / 100),
+        "uv_index_clear_sky_max": uv_clear,
+        "uv_index_max": uv_clear * (1 - 0.6 * cloud / 100),
+        "precipitation_sum": precip,
+        "rain_sum": np.where(snow, 0.0, precip * 0.7),
+        "showers_sum": np.where(snow, 0.0, precip * 0.3),
+        "snowfall_sum": np.where(snow, precip * 0.7, 0.0),
+        "snowfall_water_equivalent_sum": np.where(snow, precip, 0.0),
+        "precipitation_hours": np.where(wet, np.clip(1 + precip * 1.2, 1, 24), 0.0),
+        "precipitation_probability_max": np.clip(prob + 10, 0, 100),
+        "precipitation_probability_mean": prob,
+        "precipitation_probability_min": np.clip(prob - 20, 0, 100),
+        "wind_speed_10m_mean": wind,
+        "wind_speed_10m_max": wind * 1.6,
+        "wind_speed_10m_min": wind * 0.3,
+        "wind_gusts_10m_mean": wind * 1.8,
+        "wind_gusts_10m_max": wind * 2.7,
+        "wind_gusts_10m_min": wind * 0.6,
+        # prevailing westerlies
+        "wind_direction_10m_dominant": (270 + rng.normal(0, 60, n)) % 360,
+        "winddirection_10m_dominant": (270 + rng.normal(0, 60, n)) % 360,
+        "shortwave_radiation_sum": radiation,
+        "et0_fao_evapotranspiration": 0.15 * radiation + 0.05 * np.maximum(tmean, 0),
+        "et0_fao_evapotranspiration_sum": 0.15 * radiation + 0.05 * np.maximum(tmean, 0),
+        "cape_mean": cape,
+        "cape_max": cape * 3,
+        "cape_min": np.zeros(n),
+        "cloud_cover_mean": cloud,
+        "cloud_cover_max": np.minimum(100, cloud + rng.uniform(5, 30, n)),
+        "cloud_cover_min": np.maximum(0, cloud - rng.uniform(5, 40, n)),
+        "dew_point_2m_mean": dew,
+        "dew_point_2m_max": dew + 2,
+        "dew_point_2m_min": dew - 2,
+        "growing_degree_days_base_0_limit_50": np.clip(tmean, 0, 50),
+        "leaf_wetness_probability_mean": np.clip(rh - 40, 0, 100),
+        "relative_humidity_2m_mean": rh,
+        "relative_humidity_2m_max": np.minimum(100, rh + 15),
+        "relative_humidity_2m_min": np.maximum(5, rh - 20),
+        "pressure_msl_mean": pressure,
+        "pressure_msl_max": pressure + 4,
+        "pressure_msl_min": pressure - 4,
+        # about 170 m above sea level
+        "surface_pressure_mean": pressure - 20,
+        "surface_pressure_max": pressure - 16,
+        "surface_pressure_min": pressure - 24,
+        "updraft_max": cape / 100,
+        "visibility_mean": 24000 - 15000 * wet,
+        "visibility_min": 12000 - 10000 * wet,
+        "visibility_max": np.full(n, 24140.0),
+        "wet_bulb_temperature_2m_mean": tmean - (tmean - dew) / 3,
+        "wet_bulb_temperature_2m_max": tmax - (tmax - dew) / 3,
+        "wet_bulb_temperature_2m_min": tmin - (tmin - dew) / 3,
+        "vapour_pressure_deficit_max": vp_sat * (1 - np.maximum(5, rh - 20) / 100),
+        "soil_moisture_0_to_7cm_mean": soil_moisture,
+        "soil_moisture_0_to_10cm_mean": soil_moisture,
+        "soil_moisture_7_to_28cm_mean": soil_moisture * 1.05,
+        "soil_moisture_28_to_100cm_mean": soil_moisture * 1.1,
+        "soil_moisture_0_to_100cm_mean": soil_moisture * 1.08,
+        "soil_temperature_0_to_7cm_mean": soil_temp,
+        "soil_temperature_7_to_28cm_mean": _smooth(soil_temp, 7),
+        "soil_temperature_28_to_100cm_mean": _smooth(soil_temp, 21),
+        "soil_temperature_0_to_100cm_mean": _smooth(soil_temp, 14),
+    }
+
+    data = {"date": dates}
+    for name in features:
+        column = np.asarray(values[name], dtype=np.float32)
+        if name in REMOVE:
+            column[_missing_mask(name, dates, rng)] = np.nan
+        elif name != "weather_code":
+            column[rng.uniform(size=n) < SPORADIC_NAN_RATE] = np.nan
+        data[name] = column
+    return pd.DataFrame(data)
+
+# the daily values the hourly series of hourly_frame are shaped from
+HOURLY_SOURCES = [
+    "weather_code", "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean",
+    "apparent_temperature_max", "apparent_temperature_min", "apparent_temperature_mean",
+    "dew_point_2m_max", "dew_point_2m_min", "dew_point_2m_mean",
+    "relative_humidity_2m_max", "relative_humidity_2m_min", "relative_humidity_2m_mean",
+    "wet_bulb_temperature_2m_max", "wet_bulb_temperature_2m_min", "wet_bulb_temperature_2m_mean",
+    "precipitation_sum", "rain_sum", "showers_sum", "snowfall_sum", "precipitation_hours",
+    "cloud_cover_mean", "pressure_msl_max", "pressure_msl_min", "wind_speed_10m_mean",
+    "wind_direction_10m_dominant", "shortwave_radiation_sum", "daylight_duration",
+    "et0_fao_evapotranspiration", "vapour_pressure_deficit_max", "cape_mean",
+    "visibility_mean", "uv_index_max", "uv_index_clear_sky_max"
+]
+
+def hourly_frame(
+        dates: pd.DatetimeIndex,
+        lat: float = LATITUDE,
+        long: float = LONGITUDE,
+        rng: np.random.Generator | None = None,
+        variables: list[str] | None = None
+    ) -> pd.DataFrame:
+    """
+    One location's hourly values for variables (all of HOURLY_FEATURES by default) over
+    dates, as float32 with a UTC "time" column. Each day follows the daily_frame values of
+    that day with a diurnal cycle: temperatures peak mid-afternoon, humidity at dawn,
+    radiation around noon, and the precipitation total falls in precipitation_hours hours.
+    """
+    rng = rng or np.random.default_rng(0)
+    variables = HOURLY_FEATURES if variables is None else variables
+    daily = daily_frame(dates, lat, long, rng, HOURLY_SOURCES)
+    # one row per day, gaps filled so every hour of the span has a value
+    d = {
+        name: daily[name].fillna(daily[name].mean()).fillna(0).to_numpy(dtype=float)[:, None]
+        for name in HOURLY_SOURCES
+    }
+    n = len(dates)
+    hour = np.arange(24, dtype=float)[None, :]
+    # +1 at 15:00, -1 at 03:00
+    diurnal = np.cos(2 * np.pi * (hour - 15) / 24)
+
+    def cycle(prefix: str, inverse: bool = False) -> np.ndarray:
+        amplitude = (d[f"{prefix}_max"] - d[f"{prefix}_min"]) / 2
+        return d[f"{prefix}_mean"] + (-1 if inverse else 1) * amplitude * diurnal
+
+    half_day = d["daylight_duration"] / 3600 / 2
+    is_day = (np.abs(hour + 0.5 - 12) < half_day).astype(float)
+    sun = np.clip(np.cos(np.pi * (hour + 0.5 - 12) / np.maximum(2 * half_day, 1)), 0, None) * is_day
+    sun_share = sun / np.maximum(sun.sum(axis=1, keepdims=True), 1e-9)
+
+    # the daily total falls in the precipitation_hours wettest of randomly weighted hours
+    weights = rng.gamma(0.5, 1.0, (n, 24))
+    wet_hours = np.round(d["precipitation_hours"]).astype(int)
+    ranks = np.argsort(np.argsort(-weights, axis=1), axis=1)
+    weights = np.where(ranks < wet_hours, weights, 0.0)
+    precip_share = weights / np.maximum(weights.sum(axis=1, keepdims=True), 1e-9)
+    precipitation = d["precipitation_sum"] * precip_share
+    total = np.maximum(d["precipitation_sum"], 1e-9)
+
+    pressure_trend = (hour / 23) * (d["pressure_msl_max"] - d["pressure_msl_min"]) * rng.choice([-1, 1], (n, 1))
+    pressure = (d["pressure_msl_max"] + d["pressure_msl_min"]) / 2 - pressure_trend.mean(axis=1, keepdims=True) + pressure_trend
+    wind = np.maximum(d["wind_speed_10m_mean"] * (1 + 0.3 * diurnal + rng.normal(0, 0.15, (n, 24))), 0)
+    cloud = np.clip(d["cloud_cover_mean"] + rng.normal(0, 10, (n, 24)), 0, 100)
+
+    values = {
+        # dry hours of a wet day report the day's cloud cover code instead
+        "weather_code": np.where(precipitation > 0, d["weather_code"], np.minimum(d["weather_code"], 3)),
+        "temperature_2m": cycle("temperature_2m"),
+        "apparent_temperature": cycle("apparent_temperature"),
+        "dew_point_2m": cycle("dew_point_2m"),
+        "relative_humidity_2m": cycle("relative_humidity_2m", inverse=True),
+        "wet_bulb_temperature_2m": cycle("wet_bulb_temperature_2m"),
+        "precipitation": precipitation,
+        "rain": precipitation * d["rain_sum"] / total,
+        "showers": precipitation * d["showers_sum"] / total,
+        "snowfall": precipitation * d["snowfall_sum"] / total,
+        "cloud_cover": cloud,
+        "pressure_msl": pressure,
+        "surface_pressure": pressure - 20,
+        "wind_speed_10m": wind,
+        "wind_gusts_10m": wind * 1.7,
+        "wind_direction_10m": (d["wind_direction_10m_dominant"] + rng.normal(0, 25, (n, 24))) % 360,
+        "shortwave_radiation": d["shortwave_radiation_sum"] / 0.0036 * sun_share,
+        "sunshine_duration": 3600 * is_day * 0.9 * (1 - cloud / 100),
+        "is_day": is_day,
+        "et0_fao_evapotranspiration": d["et0_fao_evapotranspiration"] * sun_share,
+        "vapour_pressure_deficit": d["vapour_pressure_deficit_max"] * (1 + diurnal) / 2,
+        "cape": d["cape_mean"] * (1 + diurnal),
+        "visibility": np.clip(d["visibility_mean"] + rng.normal(0, 2000, (n, 24)), 50, 24140),
+        "uv_index": d["uv_index_max"] * sun,
+        "uv_index_clear_sky": d["uv_index_clear_sky_max"] * sun,
+    }
+
+    data = {"time": pd.date_range(dates[0], periods=24 * n, freq="h")}
+    for name in variables:
+        data[name] = np.broadcast_to(values[name], (n, 24)).astype(np.float32).ravel()
+    return pd.DataFrame(data)
+
+def raw_frame(start: str, end: str, locations: list[dict], seed: int = 0) -> pd.DataFrame:
+    """
+    Raw rows of every location between start and end, stacked in location order
+    with the location id in a "location" column, as load_partitions returns them.
+    """
+    frames = []
+    for i, loc in enumerate(locations):
+        # each day is stamped with the UTC instant of its local midnight, as extracted
+        dates = pd.date_range(start, end, freq="D", tz=loc["timezone"]).tz_convert("UTC")
+        rng = np.random.default_rng([seed, i, int(dates[0].timestamp()) // 86400])
+        df = daily_frame(dates, loc["lat"], loc["long"], rng)
+        df["location"] = loc["id"]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+class LocalStore:
+    """The save_df / save_json calls of the data stores, on a local directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def save_df(self, df: pd.DataFrame, key: str) -> None:
+        df.to_csv(self._path(key), index=False)
+
+    def save_json(self, key: str, data: dict) -> None:
+        with open(self._path(key), "w") as f:
+            json.dump(data, f)
+
+def save_partitions(store, type: str, df: pd.DataFrame) -> int:
+    """
+    Writes df to data/{type}/location=/year=/month=/data.csv by its "location" column,
+    returns the number of partitions.
+    """
+    dates = pd.to_datetime(df["date"])
+    written = 0
+    for (loc_id, year, month), part in df.groupby(["location", dates.dt.year, dates.dt.month], sort=False):
+        store.save_df(df = part.drop(columns=["location"]), key = partition_key(type, loc_id, year, month))
+        written += 1
+    return written
+
+def generate(store, start: str, end: str, n_locations: int = 1, seed: int = 0, processed: bool = True) -> dict:
+    """
+    Writes raw (and processed) partitions with their manifests to store, a LocalStore
+    or any data store, e.g. a LakeFSDataStore on the benchmark fakes.
+    Works a year at a time so memory stays bounded by one year of all locations.
+    """
+    from src.data.transform import process_dataframe
+    from src.data.utils import update_manifest
+
+    locations = make_locations(n_locations, seed)
+    stats = {"locations": n_locations, "raw_rows": 0, "processed_rows": 0, "partitions": 0}
+    # whole calendar years, clipped to start and end like the extract step
+    years = [(f"{y}-01-01", f"{y}-12-31") for y in range(pd.Timestamp(start).year, pd.Timestamp(end).year + 1)]
+    for year_start, year_end in years:
+        chunk_start = max(year_start, start)
+        chunk_end = min(year_end, end)
+        if chunk_start > chunk_end:
+            continue
+        raw = raw_frame(chunk_start, chunk_end, locations, seed)
+        stats["raw_rows"] += len(raw)
+        stats["partitions"] += save_partitions(store, "raw", raw)
+        if processed:
+            # per location like the transform step, the location column passes through
+            df = pd.concat([process_dataframe(part) for _, part in raw.groupby("location", sort=False)])
+            stats["processed_rows"] += len(df)
+            stats["partitions"] += save_partitions(store, "processed", df)
+    manifest = update_manifest(None, {loc["id"]: end for loc in locations})
+    store.save_json(key = "data/raw/manifest.json", data = manifest)
+    if processed:
+        store.save_json(key = "data/processed/manifest.json", data = manifest)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic raw and processed weather partitions")
+    parser.add_argument("--start", type=str, default="2018-01-01")
+    parser.add_argument("--end", type=str, default=(pd.Timestamp.now() - pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+    parser.add_argument("--locations", type=int, default=1, help="Sites to generate, the production site first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--raw-only", action="store_true", help="Skip the processed partitions")
+    parser.add_argument("--out", type=str, default="untracked/synthetic", help="Directory the data/ tree is written to")
+    args = parser.parse_args()
+
+    stats = generate(LocalStore(args.out), args.start, args.end, args.locations, args.seed, not args.raw_only)
+    print(json.dumps(stats))
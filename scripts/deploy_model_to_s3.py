@@ -1,6 +1,11 @@
 import os
+import sys
+import json
 import boto3
+import shutil
+import hashlib
 import tarfile
+import subprocess
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -9,22 +14,80 @@ BUCKET_NAME = "weather-model-478492276227"
 S3_KEY = "code/source.tar.gz"
 
 
+# files placed at the root of the archive, next to train.py
+SOURCE_FILES = [
+    "train.py", "inference.py", "evaluate.py", "feature_selection.py",
+    "bootstrap.py", "requirements.txt"
+]
+# shared modules train.py imports from the archive root, relative to src/
+SHARED_FILES = ["shared/memory.py", "shared/partitions.py", "ds/clients.py"]
+
+# must match the interpreter of the SageMaker training image
+TRAINING_PYTHON_VERSION = os.getenv("TRAINING_PYTHON_VERSION", "3.10")
+TRAINING_PLATFORM = os.getenv("TRAINING_PLATFORM", "manylinux2014_x86_64")
+
+
+def build_wheelhouse(requirements_file: Path, wheel_dir: Path) -> dict:
+    """
+    Downloads the training dependencies and their dependencies as wheels for the
+    training image and writes a lock (name, version, file, sha256) next to them.
+    bootstrap.py installs the missing ones offline from this directory.
+    """
+    if wheel_dir.exists():
+        shutil.rmtree(wheel_dir)
+    wheel_dir.mkdir(parents=True)
+    subprocess.check_call([
+        sys.executable, "-m", "pip", "download",
+        "-r", str(requirements_file),
+        "--dest", str(wheel_dir),
+        "--only-binary=:all:",
+        "--platform", TRAINING_PLATFORM,
+        "--python-version", TRAINING_PYTHON_VERSION
+    ])
+    packages = []
+    for wheel in sorted(wheel_dir.glob("*.whl")):
+        # wheel names are {name}-{version}-{tags}.whl
+        name, version = wheel.name.split("-")[:2]
+        packages.append({
+            "name": name,
+            "version": version,
+            "file": wheel.name,
+            "sha256": hashlib.sha256(wheel.read_bytes()).hexdigest()
+        })
+    lock = {
+        "python_version": TRAINING_PYTHON_VERSION,
+        "platform": TRAINING_PLATFORM,
+        "packages": packages
+    }
+    with open(wheel_dir / "lock.json", "w") as f:
+        json.dump(lock, f, indent=2)
+    print(f"Locked {len(packages)} wheels in {wheel_dir}")
+    return lock
+
+
 def create_source_archive(archive_path: Path) -> None:
     project_root = Path(__file__).resolve().parents[1]
     model_dir = project_root / "src" / "model"
-    train_file = model_dir / "train.py"
-    inference_file = model_dir / "inference.py"
+    src_dir = project_root / "src"
+
+    for name in SOURCE_FILES:
+        if not (model_dir / name).exists():
+            raise FileNotFoundError(f"{name} not found at {model_dir / name}")
+    for name in SHARED_FILES:
+        if not (src_dir / name).exists():
+            raise FileNotFoundError(f"{name} not found at {src_dir / name}")
 
-    if not train_file.exists():
-        raise FileNotFoundError(f"train.py not found at {train_file}")
-    if not inference_file.exists():
-        raise FileNotFoundError(f"inference.py not found at {inference_file}")
+    wheel_dir = archive_path.parent / "wheels"
+    build_wheelhouse(model_dir / "requirements.txt", wheel_dir)
 
     # Create the tar.gz archive
     with tarfile.open(archive_path, mode="w:gz") as tar:
         # arcname ensures the files are at the root of the archive
-        tar.add(train_file, arcname="train.py")
-        tar.add(inference_file, arcname="inference.py")
+        for name in SOURCE_FILES:
+            tar.add(model_dir / name, arcname=name)
+        for name in SHARED_FILES:
+            tar.add(src_dir / name, arcname=Path(name).name)
+        tar.add(wheel_dir, arcname="wheels")
 
     print(f"Created archive at: {archive_path}")
 
@@ -1,81 +1,159 @@
 import os
+import ast
+import base64
+import hashlib
 import zipfile
 import boto3
 import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 load_dotenv()
 
-def create_lambda_zip(zip_path: str, paths: list[str]):
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for path in paths:
-            if os.path.isfile(path):
-                # Handle individual files
-                arcname = os.path.relpath(path, start="..")
-                print(f"Adding {path} as {arcname}")
-                zf.write(path, arcname)
-            elif os.path.isdir(path):
-                # Handle directories (existing logic)
-                for root, _, files in os.walk(path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, start="..")
-                        print(f"Adding {file_path} as {arcname}")
-                        zf.write(file_path, arcname)
-            else:
-                print(f"Warning: {path} is neither a file nor a directory")
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+LOCAL_PACKAGE = "src"
 
-def upload_lambda_function(function_name: str, zip_path: str):
-    client = boto3.client(
+# fixed timestamp and permissions so identical sources always produce identical zips
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_FILE_MODE = 0o644 << 16
+
+def _module_file(module: str) -> Path | None:
+    """Source file of a local module (plain module or package __init__), if it exists."""
+    base = PROJECT_ROOT.joinpath(*module.split("."))
+    if base.with_suffix(".py").is_file():
+        return base.with_suffix(".py")
+    if (base / "__init__.py").is_file():
+        return base / "__init__.py"
+    return None
+
+def _imported_modules(path: Path) -> set[str]:
+    """
+    Every local module named by an import anywhere in the file, including
+    imports inside functions and TYPE_CHECKING blocks.
+    """
+    tree = ast.parse(path.read_text(), filename=str(path))
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.add(node.module)
+            # "from package import name" may name a submodule
+            modules.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return {m for m in modules if m.split(".")[0] == LOCAL_PACKAGE}
+
+def import_closure(entry: str) -> list[Path]:
+    """
+    The handler file plus every local module it imports transitively,
+    with the __init__.py of each package on the way.
+    """
+    seen = set()
+    pending = [PROJECT_ROOT / entry]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        for module in _imported_modules(path):
+            parts = module.split(".")
+            # importing a.b.c also runs a/__init__.py and a/b/__init__.py
+            for i in range(1, len(parts) + 1):
+                source = _module_file(".".join(parts[:i]))
+                if source is not None and source not in seen:
+                    pending.append(source)
+    return sorted(seen)
+
+def create_lambda_zip(zip_path: Path, files: list[Path]) -> str:
+    """
+    Writes a deterministic zip of files and returns its base64 SHA-256,
+    the same encoding Lambda reports as CodeSha256.
+    """
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(files):
+            arcname = path.relative_to(PROJECT_ROOT).as_posix()
+            info = zipfile.ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+            info.external_attr = ZIP_FILE_MODE
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, path.read_bytes())
+    return base64.b64encode(hashlib.sha256(zip_path.read_bytes()).digest()).decode("ascii")
+
+def get_lambda_client():
+    return boto3.client(
         "lambda",
         region_name="us-east-2",
         aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
         aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
     )
-    with open(zip_path, "rb") as f:
-        code_bytes = f.read()
+
+def upload_lambda_function(client, function_name: str, zip_path: Path):
     client.update_function_code(
         FunctionName=function_name,
-        ZipFile=code_bytes,
+        ZipFile=zip_path.read_bytes(),
         Publish=True,
     )
 
+def deploy(client, function_name: str, entry: str, zip_dir: Path, dry_run: bool = False) -> str:
+    files = import_closure(entry)
+    zip_path = zip_dir / f"{function_name}.zip"
+    code_sha = create_lambda_zip(zip_path, files)
+    # one print per bundle so parallel deploys do not interleave their listings
+    print("\n".join(
+        [f"{function_name}: {len(files)} files, {zip_path.stat().st_size} bytes, sha256 {code_sha}"]
+        + [f"  {path.relative_to(PROJECT_ROOT).as_posix()}" for path in files]
+    ))
+    if dry_run:
+        return "built"
+    try:
+        deployed_sha = client.get_function(FunctionName=function_name)["Configuration"]["CodeSha256"]
+    except client.exceptions.ResourceNotFoundException:
+        # new functions are provisioned once by hand, see "Deployment" in the README
+        print(f"WARNING {function_name}: function does not exist in AWS yet, skipping. Create it first.")
+        return "missing"
+    if deployed_sha == code_sha:
+        print(f"{function_name}: unchanged, skipping upload")
+        return "unchanged"
+    upload_lambda_function(client, function_name, zip_path)
+    print(f"{function_name}: deployed")
+    return "deployed"
+
+# Lambda function -> handler file, the bundle is the handler's import closure
+function_to_handler = {
+    "get-weather-data": "src/data/extract.py",
+    "process-weather-data": "src/data/transform.py",
+    "validate-raw-data": "src/data/validate_extract.py",
+    "validate-processed-data": "src/data/validate_transform.py",
+    "predict-weather-code": "src/model/predict.py",
+    "detect-data-drift": "src/monitoring/check_data_drift.py",
+    "monitor-model-performance": "src/monitoring/performance_monitor.py",
+    "model-accuracy": "src/model/validate_model.py"
+}
+
 if __name__ == "__main__":
-    
+
     # get function name from args
     parser = argparse.ArgumentParser()
-    parser.add_argument("-f", "--function-name", type=str, required=True, help="Name of the Lambda function to deploy")
+    parser.add_argument("-f", "--function-name", type=str, required=True, help="Name of the Lambda function to deploy, or 'all'")
+    parser.add_argument("--dry-run", action="store_true", help="Build the bundles without contacting AWS")
+    parser.add_argument("--workers", type=int, default=4, help="Functions deployed concurrently")
     args = parser.parse_args()
-    function_name = args.function_name
-    
-    zip_path = "../untracked/package.zip"
-    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
 
-    common = ["../src/api", "../src/ds", "../src/shared", "../src/data/utils.py"]
-    function_to_folders = {
-        "get-weather-data": common + ["../src/data/extract.py"],
-        "process-weather-data": common + ["../src/data/transform.py"],
-        "validate-raw-data": common + ["../src/data/validate_extract.py"],
-        "validate-processed-data": common + ["../src/data/validate_transform.py"],
-        "predict-weather-code": common + ["../src/model/predict.py", "../src/data/extract.py", "../src/data/transform.py"],
-        "detect-data-drift": common + ["../src/monitoring/check_data_drift.py"],
-        "model-accuracy": ["../src/model/validate_model.py"]
-
-    }
-    if function_name == "all":
-        for fn in function_to_folders.keys():
-            zip_path = f"../untracked/package.zip"
-            create_lambda_zip(zip_path, function_to_folders[fn])
-            upload_lambda_function(
-                function_name=fn,
-                zip_path=zip_path
-            )
+    if args.function_name == "all":
+        names = list(function_to_handler)
     else:
-        create_lambda_zip(zip_path, function_to_folders[function_name])
-        upload_lambda_function(
-            function_name=function_name,
-            zip_path=zip_path
-        )
+        names = [args.function_name]
+    zip_dir = PROJECT_ROOT / "untracked"
+    client = None if args.dry_run else get_lambda_client()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(names)))) as executor:
+        futures = {
+            name: executor.submit(deploy, client, name, function_to_handler[name], zip_dir, args.dry_run)
+            for name in names
+        }
+    results = {name: future.result() for name, future in futures.items()}
+    print(results)
 
 # to run this, cd into scripts/ and run:
 # python deploy_to_lambda.py --function-name process-weather-data
-# make sure AWS creds are set in .env file
\ No newline at end of file
+# python deploy_to_lambda.py --function-name all   (only uploads bundles whose hash changed)
+# make sure AWS creds are set in .env file
@@ -0,0 +1,45 @@
+"""
+Moves partitions written before the location= dimension existed,
+data/{raw,processed}/year=/month=/data.csv, under the production site's
+location= prefix. Runs on a branch that is merged into main when done.
+
+    python scripts/migrate_location_partitions.py --repo-name weather-data --lakefs-endpoint http://...:8000
+"""
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.ds import get_lakefs_store
+from src.shared.partitions import DEFAULT_LOCATION, location_prefix
+
+def legacy_moves(lakefs_ds, type: str, loc_id: str) -> list[tuple[str, str]]:
+    """(old key, new key) of every unpartitioned file of type."""
+    legacy_prefix = f"data/{type}/year="
+    return [
+        (key, f"{location_prefix(type, loc_id)}/{key[len(f'data/{type}/'):]}")
+        for key in lakefs_ds.list_keys(legacy_prefix)
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move unpartitioned data under the production site's location")
+    parser.add_argument("--repo-name", type=str, default="weather-data")
+    parser.add_argument("--lakefs-endpoint", type=str, required=True)
+    parser.add_argument("--location-id", type=str, default=DEFAULT_LOCATION["id"])
+    parser.add_argument("--dry-run", action="store_true", help="Only list the moves")
+    args = parser.parse_args()
+
+    lakefs_ds = get_lakefs_store(args.repo_name, args.lakefs_endpoint)
+    moves = [m for type in ("raw", "processed") for m in legacy_moves(lakefs_ds, type, args.location_id)]
+    print(f"{len(moves)} partitions to move under location={args.location_id}")
+    if args.dry_run or not moves:
+        for old, new in moves:
+            print(f"{old} -> {new}")
+        sys.exit(0)
+
+    lakefs_ds.create_branch(name = "migrate-location-partitions", checkout = True)
+    for old, new in moves:
+        lakefs_ds.copy_key(old, new)
+    lakefs_ds.delete_keys([old for old, _ in moves])
+    lakefs_ds.commit(message = f"Moved {len(moves)} partitions under location={args.location_id}")
+    lakefs_ds.merge_branch(dest = "main", delete_after_merge = True)
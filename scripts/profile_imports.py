@@ -0,0 +1,65 @@
+import os
+import sys
+import argparse
+import subprocess
+
+HANDLERS = {
+    "get-weather-data": "src.data.extract",
+    "process-weather-data": "src.data.transform",
+    "validate-raw-data": "src.data.validate_extract",
+    "validate-processed-data": "src.data.validate_transform",
+    "predict-weather-code": "src.model.predict",
+    "detect-data-drift": "src.monitoring.check_data_drift",
+    "monitor-model-performance": "src.monitoring.performance_monitor",
+    "model-accuracy": "src.model.validate_model"
+}
+
+def profile_module(module: str, project_root: str) -> tuple[list[tuple[int, int, str]], str | None]:
+    """
+    Imports module in a fresh interpreter with -X importtime.
+    Returns (self_us, cumulative_us, name) for every import and the error, if the import failed.
+    """
+    env = dict(os.environ, PYTHONPATH=project_root)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root, env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()[1:]))
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+    return rows, error
+
+def report(function_name: str, module: str, project_root: str, top: int) -> None:
+    rows, error = profile_module(module, project_root)
+    handler = next((cum for _, cum, name in rows if name == module), None)
+    # attribute self time to top-level packages (pandas, boto3, lakefs, ...)
+    by_package = {}
+    for self_us, _, name in rows:
+        package = name.strip().split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    total = handler if handler is not None else sum(by_package.values())
+    print(f"\n{function_name} ({module}): {total / 1000:.1f} ms")
+    if error:
+        print(f"  import failed: {error}")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {us / 1000:8.1f} ms  {package}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time of every Lambda handler module")
+    parser.add_argument("-f", "--function-name", type=str, default="all", help="Lambda function to profile")
+    parser.add_argument("-n", "--top", type=int, default=10, help="Number of top-level imports to show")
+    args = parser.parse_args()
+
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    names = HANDLERS.keys() if args.function_name == "all" else [args.function_name]
+    for name in names:
+        report(name, HANDLERS[name], project_root, args.top)
+
+# to run this from the project root:
+# python scripts/profile_imports.py -f predict-weather-code
@@ -0,0 +1,70 @@
+"""
+Re-extracts the partitions that lack raw columns, written while an older build
+pruned the Open-Meteo request to the promoted feature list. Every affected
+month is fetched again with the full column set, then processed again, on a
+branch that is merged into main when done. train.py refuses to train while
+any such partition is left.
+
+    python scripts/reextract_partitions.py --repo-name weather-data --lakefs-endpoint http://...:8000
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api.open_meteo import get_open_meteo_api
+from src.data.extract import fetch_data_from_api
+from src.data.transform import process_dataframe
+from src.ds import get_lakefs_store
+from src.shared.columns import FEATURES, REMOVE
+from src.shared.partitions import location_prefix, partition_key, resolve_locations
+
+PROCESSED_COLUMNS = [c for c in FEATURES if c not in REMOVE]
+
+def incomplete_partitions(lakefs_ds, loc: dict) -> list[tuple[int, int, str, str, list[str]]]:
+    """(year, month, first day, last day, missing columns) of every processed partition of loc with gaps."""
+    partitions = []
+    for key in lakefs_ds.list_keys(f"{location_prefix('processed', loc['id'])}/"):
+        match = re.search(r"year=(\d+)/month=(\d+)/data\.csv$", key)
+        if not match:
+            continue
+        df = lakefs_ds.load_df(key)
+        missing = [c for c in PROCESSED_COLUMNS if c not in df.columns or df[c].isnull().any()]
+        if missing:
+            days = pd.to_datetime(df["date"], utc=True).dt.tz_convert(loc["timezone"])
+            partitions.append((
+                int(match.group(1)), int(match.group(2)),
+                days.min().strftime("%Y-%m-%d"), days.max().strftime("%Y-%m-%d"), missing
+            ))
+    return partitions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract partitions written without every raw column")
+    parser.add_argument("--repo-name", type=str, default="weather-data")
+    parser.add_argument("--lakefs-endpoint", type=str, required=True)
+    parser.add_argument("--locations", type=json.loads, default=None, help="JSON list of locations, as in the pipeline events")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions")
+    args = parser.parse_args()
+
+    lakefs_ds = get_lakefs_store(args.repo_name, args.lakefs_endpoint)
+    locations = resolve_locations(args.locations)
+    plan = [(loc, p) for loc in locations for p in incomplete_partitions(lakefs_ds, loc)]
+    print(f"{len(plan)} partitions to re-extract")
+    if args.dry_run or not plan:
+        for loc, (year, month, start, end, missing) in plan:
+            print(f"location={loc['id']} {year}-{month:02d} ({start}..{end}) missing {missing}")
+        sys.exit(0)
+
+    lakefs_ds.create_branch(name = "reextract-partitions", checkout = True)
+    api = get_open_meteo_api()
+    for loc, (year, month, start, end, _) in plan:
+        print(f"\nRe-extracting {loc['id']} from {start} to {end}...")
+        raw = fetch_data_from_api(start, end, api, lat = loc["lat"], long = loc["long"], timezone = loc["timezone"])
+        lakefs_ds.save_df(df = raw, key = partition_key("raw", loc["id"], year, month))
+        # NaNs the API still leaves are filled from this month's medians
+        lakefs_ds.save_df(df = process_dataframe(raw.copy()), key = partition_key("processed", loc["id"], year, month))
+    lakefs_ds.commit(message = f"Re-extracted {len(plan)} partitions with every raw column")
+    lakefs_ds.merge_branch(dest = "main", delete_after_merge = True)
@@ -1 +1 @@
-from src.api.open_meteo import OpenMeteoAPI
\ No newline at end of file
+from src.api.open_meteo import OpenMeteoAPI, get_open_meteo_api, decode_block
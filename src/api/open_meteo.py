@@ -1,12 +1,14 @@
 import time
-import openmeteo_requests
-import requests_cache
-from retry_requests import retry
+import pandas as pd
 from src.shared.columns import FEATURES
+from src.shared.tracing import span
 
 class OpenMeteoAPI:
 
-    def __init__(self):
+    def __init__(self, features: list[str] | None = None):
+        import openmeteo_requests
+        import requests_cache
+        from retry_requests import retry
         cache_session = requests_cache.CachedSession(
             cache_name=':memory:',
             backend='sqlite',
@@ -15,7 +17,7 @@ class OpenMeteoAPI:
         retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
         self.openmeteo = openmeteo_requests.Client(session=retry_session)
         self.url = "https://historical-forecast-api.open-meteo.com/v1/forecast"
-        self.features = FEATURES
+        self.features = FEATURES if features is None else features
     
     def get_weather(
             self,
@@ -23,25 +25,60 @@ class OpenMeteoAPI:
             long: float,
             start_date: str,
             end_date: str,
-            timezone: str
+            timezone: str,
+            daily: list[str] | None = None,
+            hourly: list[str] | None = None
     ):
+        """
+        Requests the daily variables (self.features by default) and, when given,
+        the hourly variables in the same call. Empty lists are left out.
+        """
+        daily = self.features if daily is None else daily
         params = {
             "latitude": lat,
             "longitude": long,
             "start_date": start_date,
             "end_date": end_date,
-            "daily": FEATURES,
             "timezone": timezone
         }
+        if daily:
+            params["daily"] = daily
+        if hourly:
+            params["hourly"] = hourly
         
         try:
-            response = self.openmeteo.weather_api(self.url, params=params)
+            with span("open_meteo.fetch", start=start_date, end=end_date):
+                response = self.openmeteo.weather_api(self.url, params=params)
             return response[0]
         except Exception as e:
             err_str = str(e)
             if "request limit" in err_str.lower():
                 print("Rate limit hit, sleeping for 60 seconds...")
                 time.sleep(60)
-                return self.get_weather(lat, long, start_date, end_date, timezone)
+                return self.get_weather(lat, long, start_date, end_date, timezone, daily, hourly)
             else:
                 raise RuntimeError(f"Weather API failed: {err_str}")
+
+# one client (and response cache) per variable set, reused across warm invocations
+_clients = {}
+
+def get_open_meteo_api(features: list[str] | None = None) -> OpenMeteoAPI:
+    key = tuple(FEATURES if features is None else features)
+    if key not in _clients:
+        _clients[key] = OpenMeteoAPI(features = list(key))
+    return _clients[key]
+
+def decode_block(block, variables: list[str], time_column: str = "date") -> pd.DataFrame:
+    """
+    Daily or hourly block of a response as a DataFrame with UTC timestamps
+    in time_column and one column per variable, in request order.
+    """
+    data = {time_column: pd.date_range(
+        start=pd.to_datetime(block.Time(), unit="s", utc=True),
+        end=pd.to_datetime(block.TimeEnd(), unit="s", utc=True),
+        freq=pd.Timedelta(seconds=block.Interval()),
+        inclusive="left"
+    )}
+    for i, name in enumerate(variables):
+        data[name] = block.Variables(i).ValuesAsNumpy()
+    return pd.DataFrame(data)
@@ -2,75 +2,97 @@ import sys
 sys.path.append("/opt")
 sys.path.append(".")
 
+import os
 import json
 import pandas as pd
 from datetime import datetime
-from src.api.open_meteo import OpenMeteoAPI
-from src.ds.lakefs_ds import LakeFSDataStore
-from src.data.utils import get_valid_date_ranges
+from src.api.open_meteo import OpenMeteoAPI, get_open_meteo_api, decode_block
+from src.ds import LakeFSDataStore, get_lakefs_store
+from src.data.utils import get_valid_date_ranges, local_dates, manifest_dates, update_manifest
+from src.data.hourly import fetch_hourly_from_api, save_columnar
+from src.shared.tracing import span, traced_handler
+from src.shared.partitions import LATITUDE, LONGITUDE, TIMEZONE, resolve_locations, partition_key
 
-def fetch_data_from_api(start: str, end: str, api: OpenMeteoAPI|None = None) -> pd.DataFrame:
+# "daily" requests daily values, "hourly" keeps the hourly data and aggregates it to the same daily schema
+RESOLUTION = os.getenv("INGESTION_RESOLUTION", "daily")
+
+def fetch_data_from_api(
+        start: str,
+        end: str,
+        api: OpenMeteoAPI|None = None,
+        lat: float = LATITUDE,
+        long: float = LONGITUDE,
+        timezone: str = TIMEZONE
+    ) -> pd.DataFrame:
     if api is None:
-        api = OpenMeteoAPI()
+        api = get_open_meteo_api()
     response = api.get_weather(
-        lat = 43.7064,
-        long = -79.3986,
+        lat = lat,
+        long = long,
         start_date = start,
         end_date = end,
-        timezone = "America/New_York"
+        timezone = timezone
     )
-    daily = response.Daily()
-    daily_data = {"date": pd.date_range(
-        start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-        end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-        freq=pd.Timedelta(seconds=daily.Interval()),
-        inclusive="left"
-    )}
-
-    for i, var_name in enumerate(api.features):
-        daily_data[var_name] = daily.Variables(i).ValuesAsNumpy()
-    df = pd.DataFrame(daily_data)
+    with span("open_meteo.decode") as s:
+        df = decode_block(response.Daily(), api.features)
+        s.set(rows = len(df))
     return df
 
 def get_weather_data(
         lakefs_ds: LakeFSDataStore,
-        default_start_date: str
+        default_start_date: str,
+        locations: list[dict] | None = None,
+        resolution: str = RESOLUTION
     ):
-    
+    if resolution not in ("daily", "hourly"):
+        raise ValueError(f"Unknown resolution {resolution}")
+
     manifest = lakefs_ds.load_json(key = "data/raw/manifest.json")
-    if not manifest:
-        manifest = {"last_updated_date": default_start_date}
-    start_date = pd.to_datetime(manifest['last_updated_date']) + pd.Timedelta(days=1)
     end_date = pd.Timestamp(datetime.now().date())
 
-    date_ranges = get_valid_date_ranges(
-        start_date = start_date.strftime("%Y-%m-%d"),
-        end_date = end_date.strftime("%Y-%m-%d")
-    )
-
-    api = OpenMeteoAPI()
-    for start, end in date_ranges:
-        print(f"\nFetching data from {start} to {end}...")
-        df = fetch_data_from_api(start, end, api)
-        year = datetime.strptime(start, "%Y-%m-%d").year
-        for month in range(1, 13):
-            df_month = df[df['date'].dt.month == month]
-            if not df_month.empty:
+    # every variable is stored whatever the promoted feature list, so later training runs can select it again
+    api = get_open_meteo_api()
+    # each location resumes from its own last date, so a newly added site is backfilled
+    last_dates = manifest_dates(manifest, default_start_date, locations)
+    updated = {}
+    for loc in resolve_locations(locations):
+        start_date = pd.to_datetime(last_dates[loc["id"]]) + pd.Timedelta(days=1)
+        date_ranges = get_valid_date_ranges(
+            start_date = start_date.strftime("%Y-%m-%d"),
+            end_date = end_date.strftime("%Y-%m-%d")
+        )
+        for start, end in date_ranges:
+            year = datetime.strptime(start, "%Y-%m-%d").year
+            print(f"\nFetching data for {loc['id']} from {start} to {end}...")
+            if resolution == "hourly":
+                df, hourly_df, intraday, offset = fetch_hourly_from_api(
+                    start, end, api, lat = loc["lat"], long = loc["long"], timezone = loc["timezone"]
+                )
+                save_columnar(lakefs_ds, "hourly", hourly_df, loc["id"], "time", offset)
+                save_columnar(lakefs_ds, "intraday", intraday, loc["id"], "date", offset)
+            else:
+                df = fetch_data_from_api(start, end, api, lat = loc["lat"], long = loc["long"], timezone = loc["timezone"])
+            # by local month, a day east of UTC starts on the previous UTC date
+            for month, df_month in df.groupby(local_dates(df['date'], loc["timezone"]).dt.month):
                 lakefs_ds.save_df(
                     df = df_month,
-                    key = f"data/raw/year={year}/month={month}/data.csv"
+                    key = partition_key("raw", loc["id"], year, month)
                 )
+        if date_ranges:
+            updated[loc["id"]] = date_ranges[-1][1]
+    if not updated:
+        raise ValueError(f"No complete month to extract before {end_date.date()}")
+    manifest = update_manifest(manifest, updated)
     lakefs_ds.save_json(
         key = "data/raw/manifest.json",
-        data = {
-            "last_updated_date": date_ranges[-1][1]
-        }
+        data = manifest
     )
-    return date_ranges[-1][1]
+    return manifest["last_updated_date"]
 
+@traced_handler("get-weather-data")
 def lambda_handler(event, _):
 
-    lakefs_ds = LakeFSDataStore(
+    lakefs_ds = get_lakefs_store(
         repo_name = event["repo_name"],
         endpoint = event["lakefs_endpoint"]
     )
@@ -79,7 +101,12 @@ def lambda_handler(event, _):
         name = f"{current_date}-data-extract",
         checkout = True
     )
-    last_updated_date = get_weather_data(lakefs_ds, event["default_start_date"])
+    last_updated_date = get_weather_data(
+        lakefs_ds,
+        event["default_start_date"],
+        event.get("locations"),
+        event.get("resolution", RESOLUTION)
+    )
     
     commit_id = lakefs_ds.commit(message = f"Extracted data till {last_updated_date}")
     
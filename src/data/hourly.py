@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from src.api.open_meteo import OpenMeteoAPI, decode_block
+from src.ds import LakeFSDataStore
+from src.shared.columns import HOURLY_FEATURES
+from src.shared.partitions import partition_key
+from src.shared.tracing import span
+
+# daily column: (hourly variable, reduction), reductions run as one grouped aggregation
+DAILY_AGGREGATES = {
+    # the daily code is the most severe of the day
+    "weather_code": ("weather_code", "max"),
+    "temperature_2m_max": ("temperature_2m", "max"),
+    "temperature_2m_min": ("temperature_2m", "min"),
+    "temperature_2m_mean": ("temperature_2m", "mean"),
+    "apparent_temperature_max": ("apparent_temperature", "max"),
+    "apparent_temperature_min": ("apparent_temperature", "min"),
+    "apparent_temperature_mean": ("apparent_temperature", "mean"),
+    "dew_point_2m_mean": ("dew_point_2m", "mean"),
+    "dew_point_2m_max": ("dew_point_2m", "max"),
+    "dew_point_2m_min": ("dew_point_2m", "min"),
+    "relative_humidity_2m_mean": ("relative_humidity_2m", "mean"),
+    "relative_humidity_2m_max": ("relative_humidity_2m", "max"),
+    "relative_humidity_2m_min": ("relative_humidity_2m", "min"),
+    "wet_bulb_temperature_2m_mean": ("wet_bulb_temperature_2m", "mean"),
+    "wet_bulb_temperature_2m_max": ("wet_bulb_temperature_2m", "max"),
+    "wet_bulb_temperature_2m_min": ("wet_bulb_temperature_2m", "min"),
+    "precipitation_sum": ("precipitation", "sum"),
+    "rain_sum": ("rain", "sum"),
+    "showers_sum": ("showers", "sum"),
+    "snowfall_sum": ("snowfall", "sum"),
+    "precipitation_hours": ("wet_hour", "sum"),
+    "cloud_cover_mean": ("cloud_cover", "mean"),
+    "cloud_cover_max": ("cloud_cover", "max"),
+    "cloud_cover_min": ("cloud_cover", "min"),
+    "pressure_msl_mean": ("pressure_msl", "mean"),
+    "pressure_msl_max": ("pressure_msl", "max"),
+    "pressure_msl_min": ("pressure_msl", "min"),
+    "surface_pressure_mean": ("surface_pressure", "mean"),
+    "surface_pressure_max": ("surface_pressure", "max"),
+    "surface_pressure_min": ("surface_pressure", "min"),
+    "wind_speed_10m_mean": ("wind_speed_10m", "mean"),
+    "wind_speed_10m_max": ("wind_speed_10m", "max"),
+    "wind_speed_10m_min": ("wind_speed_10m", "min"),
+    "wind_gusts_10m_mean": ("wind_gusts_10m", "mean"),
+    "wind_gusts_10m_max": ("wind_gusts_10m", "max"),
+    "wind_gusts_10m_min": ("wind_gusts_10m", "min"),
+    "shortwave_radiation_sum": ("shortwave_radiation", "sum"),
+    "sunshine_duration": ("sunshine_duration", "sum"),
+    "daylight_duration": ("is_day", "sum"),
+    "et0_fao_evapotranspiration": ("et0_fao_evapotranspiration", "sum"),
+    "et0_fao_evapotranspiration_sum": ("et0_fao_evapotranspiration", "sum"),
+    "vapour_pressure_deficit_max": ("vapour_pressure_deficit", "max"),
+    "cape_mean": ("cape", "mean"),
+    "cape_max": ("cape", "max"),
+    "cape_min": ("cape", "min"),
+    "visibility_mean": ("visibility", "mean"),
+    "visibility_max": ("visibility", "max"),
+    "visibility_min": ("visibility", "min"),
+    "uv_index_max": ("uv_index", "max"),
+    "uv_index_clear_sky_max": ("uv_index_clear_sky", "max"),
+    # speed weighted vector components, turned into a direction below
+    "wind_u": ("wind_u", "sum"),
+    "wind_v": ("wind_v", "sum"),
+}
+# hourly W/m2 to daily MJ/m2, hours of daylight to seconds
+DAILY_SCALE = {"shortwave_radiation_sum": 0.0036, "daylight_duration": 3600.0}
+# computed from other daily aggregates
+DAILY_DERIVED = [
+    "wind_direction_10m_dominant", "winddirection_10m_dominant",
+    "growing_degree_days_base_0_limit_50"
+]
+
+# daily features only the hourly data can provide, kept next to the processed partitions
+INTRADAY_FEATURES = [
+    "temperature_2m_range", "temperature_2m_max_hour", "temperature_2m_min_hour",
+    "precipitation_max", "precipitation_peak_hour", "wind_gusts_10m_max_hour",
+    "pressure_msl_change", "relative_humidity_2m_range", "cloud_cover_range"
+]
+
+def daily_only_features(features: list[str]) -> list[str]:
+    """Daily features the hourly variables cannot reproduce, still requested as daily values."""
+    return [f for f in features if f not in DAILY_AGGREGATES and f not in DAILY_DERIVED]
+
+def local_days(times: pd.Series, utc_offset_seconds: int) -> pd.Series:
+    """
+    Local midnight of every timestamp as a UTC instant, the same value
+    the daily API reports as the date of that day.
+    """
+    offset = pd.Timedelta(seconds=utc_offset_seconds)
+    return (times + offset).dt.floor("D") - offset
+
+def aggregate_daily(hourly_df: pd.DataFrame, features: list[str], utc_offset_seconds: int = 0) -> pd.DataFrame:
+    """
+    Daily values of features from hourly rows with grouped reductions over local days.
+    Returns "date" plus the features it can compute, as float32.
+    """
+    df = hourly_df.copy(deep=False)
+    if "precipitation" in df.columns:
+        df["wet_hour"] = (df["precipitation"] > 0).astype(np.float32)
+    if {"wind_speed_10m", "wind_direction_10m"} <= set(df.columns):
+        radians = np.radians(df["wind_direction_10m"].to_numpy())
+        df["wind_u"] = df["wind_speed_10m"].to_numpy() * np.sin(radians)
+        df["wind_v"] = df["wind_speed_10m"].to_numpy() * np.cos(radians)
+
+    wanted = set(features) | {"wind_u", "wind_v", "temperature_2m_max", "temperature_2m_min"}
+    spec = {
+        name: (column, how) for name, (column, how) in DAILY_AGGREGATES.items()
+        if name in wanted and column in df.columns
+    }
+    daily = df.groupby(local_days(df["time"], utc_offset_seconds).rename("date"), sort=True).agg(**spec)
+    for name, factor in DAILY_SCALE.items():
+        if name in daily.columns:
+            daily[name] *= factor
+
+    if {"wind_u", "wind_v"} <= set(daily.columns):
+        direction = np.degrees(np.arctan2(daily.pop("wind_u"), daily.pop("wind_v"))) % 360
+        daily["wind_direction_10m_dominant"] = direction
+        daily["winddirection_10m_dominant"] = direction
+    if {"temperature_2m_max", "temperature_2m_min"} <= set(daily.columns):
+        mean = (daily["temperature_2m_max"] + daily["temperature_2m_min"]) / 2
+        daily["growing_degree_days_base_0_limit_50"] = mean.clip(0, 50)
+
+    columns = [c for c in features if c in daily.columns]
+    return daily[columns].astype(np.float32).reset_index()
+
+def _hour_of_max(values: pd.Series, days: pd.Series, hours: pd.Series) -> pd.Series:
+    """First local hour at which values reach their daily maximum, NaN for days without values."""
+    peak = values == values.groupby(days).transform("max")
+    return hours.where(peak).groupby(days).min()
+
+def intraday_features(hourly_df: pd.DataFrame, utc_offset_seconds: int = 0) -> pd.DataFrame:
+    """Ranges, peaks and the timing of peaks within each local day."""
+    days = local_days(hourly_df["time"], utc_offset_seconds).rename("date")
+    hours = ((hourly_df["time"] + pd.Timedelta(seconds=utc_offset_seconds)).dt.hour).astype(np.float32)
+    grouped = hourly_df.groupby(days, sort=True)
+    features = pd.DataFrame(index=grouped.size().index)
+
+    if "temperature_2m" in hourly_df.columns:
+        temp = hourly_df["temperature_2m"]
+        stats = grouped["temperature_2m"].agg(["max", "min"])
+        features["temperature_2m_range"] = stats["max"] - stats["min"]
+        features["temperature_2m_max_hour"] = _hour_of_max(temp, days, hours)
+        features["temperature_2m_min_hour"] = _hour_of_max(-temp, days, hours)
+    if "precipitation" in hourly_df.columns:
+        features["precipitation_max"] = grouped["precipitation"].max()
+        peak_hour = _hour_of_max(hourly_df["precipitation"], days, hours)
+        # dry days have no peak
+        features["precipitation_peak_hour"] = peak_hour.where(features["precipitation_max"] > 0)
+    if "wind_gusts_10m" in hourly_df.columns:
+        features["wind_gusts_10m_max_hour"] = _hour_of_max(hourly_df["wind_gusts_10m"], days, hours)
+    if "pressure_msl" in hourly_df.columns:
+        pressure = grouped["pressure_msl"]
+        features["pressure_msl_change"] = pressure.last() - pressure.first()
+    for column in ["relative_humidity_2m", "cloud_cover"]:
+        if column in hourly_df.columns:
+            stats = grouped[column].agg(["max", "min"])
+            features[f"{column}_range"] = stats["max"] - stats["min"]
+    return features.astype(np.float32).reset_index()
+
+def fetch_hourly_from_api(
+        start: str,
+        end: str,
+        api: OpenMeteoAPI,
+        lat: float,
+        long: float,
+        timezone: str
+    ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]:
+    """
+    Requests HOURLY_FEATURES, plus the daily values they cannot reproduce, in one call.
+    Returns (daily, hourly, intraday, utc offset in seconds). daily has the columns of the daily request
+    ("date" and api.features in order), so the raw partitions keep their schema.
+    """
+    daily_only = daily_only_features(api.features)
+    response = api.get_weather(
+        lat = lat,
+        long = long,
+        start_date = start,
+        end_date = end,
+        timezone = timezone,
+        daily = daily_only,
+        hourly = HOURLY_FEATURES
+    )
+    offset = response.UtcOffsetSeconds()
+    with span("open_meteo.decode_hourly") as s:
+        hourly_df = decode_block(response.Hourly(), HOURLY_FEATURES, time_column = "time")
+        hourly_df[HOURLY_FEATURES] = hourly_df[HOURLY_FEATURES].astype(np.float32, copy=False)
+        s.set(rows = len(hourly_df))
+    with span("hourly.aggregate", rows = len(hourly_df)):
+        daily = aggregate_daily(hourly_df, api.features, offset)
+        intraday = intraday_features(hourly_df, offset)
+    if daily_only:
+        daily = daily.merge(decode_block(response.Daily(), daily_only), on = "date", how = "left")
+    for name in api.features:
+        if name not in daily.columns:
+            daily[name] = np.float32(np.nan)
+    return daily[["date"] + list(api.features)], hourly_df, intraday, offset
+
+def save_columnar(lakefs_ds: LakeFSDataStore, type: str, df: pd.DataFrame, loc_id: str, time_column: str, utc_offset_seconds: int = 0) -> None:
+    """Monthly Parquet partitions of df under data/{type}/location=, CSV without a Parquet engine."""
+    local = df[time_column] + pd.Timedelta(seconds=utc_offset_seconds)
+    for (year, month), part in df.groupby([local.dt.year, local.dt.month]):
+        key = partition_key(type, loc_id, year, month, filename = "data.parquet")
+        try:
+            lakefs_ds.save_parquet(part, key)
+        except ImportError:
+            # no Parquet engine in this runtime
+            lakefs_ds.save_df(df = part, key = key.replace(".parquet", ".csv"))
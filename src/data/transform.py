@@ -6,11 +6,16 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from src.ds.lakefs_ds import LakeFSDataStore
-from src.data.utils import get_data_from_main
+from src.ds import LakeFSDataStore, get_lakefs_store
+from src.data.utils import get_data_from_main, manifest_dates, update_manifest
 from src.shared.columns import REMOVE
+from src.shared.tracing import traced, traced_handler
+from src.shared.memory import checkpoint
+from src.shared.partitions import partition_key, resolve_locations
 
+@traced()
 def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    checkpoint("process_dataframe.input", df)
     # Drop unwanted columns
     df = df.drop(columns=[c for c in REMOVE if c in df.columns])
 
@@ -37,46 +42,51 @@ def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # Yearly cyclic
     df["year_sin"] = np.sin(2 * np.pi * df["day_of_year"] / 365.25)
     df["year_cos"] = np.cos(2 * np.pi * df["day_of_year"] / 365.25)
+    checkpoint("process_dataframe.output", df)
     return df
 
 
 def process_weather_data(
         lakefs_ds: LakeFSDataStore,
-        default_start_date: str
+        default_start_date: str,
+        locations: list[dict] | None = None
     ):
     
     manifest = lakefs_ds.load_json(key = "data/processed/manifest.json")
-    if not manifest:
-        manifest = {"last_updated_date": default_start_date}
-    start_date = pd.to_datetime(manifest['last_updated_date']) + pd.Timedelta(days=1)
-    end_date = pd.Timestamp(datetime.now().date())
+    raw_manifest = lakefs_ds.load_json(key = "data/raw/manifest.json")
 
-    df = get_data_from_main(lakefs_ds, "raw", start_date, end_date)
-    df = process_dataframe(df)
+    # each location resumes from its own last processed date, so a new site is processed from the start
+    last_dates = manifest_dates(manifest, default_start_date, locations)
+    raw_dates = manifest_dates(raw_manifest, default_start_date, locations)
+    updated = {}
+    for loc in resolve_locations(locations):
+        start_date = pd.to_datetime(last_dates[loc["id"]]) + pd.Timedelta(days=1)
+        end_date = pd.to_datetime(raw_dates[loc["id"]])
+        if start_date > end_date:
+            continue
+        raw = get_data_from_main(lakefs_ds, "raw", start_date, end_date, [loc])
+        # per location, so NaNs are filled from that location's medians
+        df = process_dataframe(raw)
 
-    # Save per month
-    for year in df['year'].unique():
-        df_year = df[df['year'] == year]
-        for month in df_year['month'].unique():
-            df_month = df_year[df_year['month'] == month]
-            if not df_month.empty:
-                lakefs_ds.save_df(
-                    df = df_month,
-                    key = f"data/processed/year={year}/month={month}/data.csv"
-                )
-    new_last_updated_date = lakefs_ds.load_json(
-        key = "data/raw/manifest.json"
-    )["last_updated_date"]
+        # Save per month
+        for (year, month), df_month in df.groupby(["year", "month"]):
+            lakefs_ds.save_df(
+                df = df_month,
+                key = partition_key("processed", loc["id"], year, month)
+            )
+        updated[loc["id"]] = raw_dates[loc["id"]]
+    if not updated:
+        raise ValueError("No new raw data to process")
+    manifest = update_manifest(manifest, updated)
     lakefs_ds.save_json(
         key = "data/processed/manifest.json",
-        data = {
-            "last_updated_date": new_last_updated_date
-        }
+        data = manifest
     )
-    return new_last_updated_date
+    return manifest["last_updated_date"]
 
+@traced_handler("process-weather-data")
 def lambda_handler(event, _):
-    lakefs_ds = LakeFSDataStore(
+    lakefs_ds = get_lakefs_store(
         repo_name = event["repo_name"],
         endpoint = event["lakefs_endpoint"]
     )
@@ -86,7 +96,7 @@ def lambda_handler(event, _):
         checkout = True
     )
     
-    last_updated_date = process_weather_data(lakefs_ds, event["default_start_date"])
+    last_updated_date = process_weather_data(lakefs_ds, event["default_start_date"], event.get("locations"))
     commit_id = lakefs_ds.commit(message = f"Transformed data till {last_updated_date}")
     
     # not commiting, will commit after validation
@@ -2,8 +2,17 @@ import pandas as pd
 import calendar
 from datetime import date, datetime
 from typing import Literal
-from dateutil.relativedelta import relativedelta
 from src.ds import LakeFSDataStore
+from src.shared.memory import checkpoint
+from src.shared.partitions import DEFAULT_LOCATION, plan_partitions, resolve_locations
+
+def local_dates(dates: pd.Series, timezone: str = DEFAULT_LOCATION["timezone"]) -> pd.Series:
+    """
+    The local day of each stored date as a naive midnight, comparable with the
+    naive manifest bounds. Open-Meteo stamps a day with the UTC instant of its
+    local midnight, e.g. 05:00 UTC for America/New_York.
+    """
+    return pd.to_datetime(dates, utc=True).dt.tz_convert(timezone).dt.tz_localize(None).dt.normalize()
 
 def get_valid_date_ranges(start_date: str, end_date: str) -> list[tuple[str, str]]:
     """
@@ -48,32 +57,103 @@ def get_valid_date_ranges(start_date: str, end_date: str) -> list[tuple[str, str
 
     return ranges
 
-def get_valid_date_prefixes(start_date: pd.Timestamp, end_date: pd.Timestamp):
-    date_prefixes = []
-    current = start_date
-    while current <= end_date:
-        year = current.year
-        month = current.month
-        date_prefixes.append(f"year={year}/month={month}")
-        current += relativedelta(months=1)
-    return date_prefixes
-
-def get_data_from_main(lakefs_ds: LakeFSDataStore, type: Literal["raw", "processed"], start_date: pd.Timestamp, end_date: pd.Timestamp):
-    current_branch = lakefs_ds.branch
-    print(f"Switching from {current_branch} to main to fetch {type} data")
-    lakefs_ds.checkout("main")
-    date_prefixes = get_valid_date_prefixes(
-        start_date = start_date,
-        end_date = end_date
-    )
+def load_partitions(
+        lakefs_ds: LakeFSDataStore,
+        type: Literal["raw", "processed"],
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        locations: list[dict] | None = None,
+        location_column: str | None = None
+    ) -> pd.DataFrame:
+    """
+    Loads the monthly partitions between start_date and end_date of locations (the
+    production site by default) from the current branch. Only the planned partitions
+    are read. With location_column the location id of every row is added under that name.
+    """
     dfs = []
-    for date_prefix in date_prefixes:
-        key = f"data/{type}/{date_prefix}/data.csv"
+    for loc_id, key in plan_partitions(type, start_date, end_date, locations):
         try:
-            dfs.append(lakefs_ds.load_df(key))
+            df = lakefs_ds.load_df(key)
         except Exception as e:
             print(f"Error loading {key}: {e}")
+            continue
+        if location_column:
+            df[location_column] = loc_id
+        dfs.append(df)
     df = pd.concat(dfs, ignore_index=True)
     print(f"Combined {type} dataset shape: {df.shape}")
+    return df
+
+def get_data_from_main(
+        lakefs_ds: LakeFSDataStore,
+        type: Literal["raw", "processed"],
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        locations: list[dict] | None = None,
+        location_column: str | None = None
+    ):
+    current_branch = lakefs_ds.branch
+    print(f"Switching from {current_branch} to main to fetch {type} data")
+    lakefs_ds.checkout("main")
+    df = load_partitions(lakefs_ds, type, start_date, end_date, locations, location_column)
     lakefs_ds.checkout(current_branch)
-    return df
\ No newline at end of file
+    checkpoint(f"get_data_from_main.{type}", df)
+    return df
+
+def location_dates(manifest: dict | None) -> dict[str, str]:
+    """
+    {location id: last stored date} of a raw or processed manifest. Manifests written
+    before dates were kept per location only cover the production site.
+    """
+    if not manifest:
+        return {}
+    if "locations" in manifest:
+        return dict(manifest["locations"])
+    if "last_updated_date" in manifest:
+        return {DEFAULT_LOCATION["id"]: manifest["last_updated_date"]}
+    return {}
+
+def manifest_dates(manifest: dict | None, default_start_date: str, locations: list[dict] | None = None) -> dict[str, str]:
+    """
+    Last stored date of every location in a raw or processed manifest,
+    default_start_date for a location the manifest does not know yet.
+    """
+    dates = location_dates(manifest)
+    return {loc["id"]: dates.get(loc["id"], default_start_date) for loc in resolve_locations(locations)}
+
+def update_manifest(manifest: dict | None, dates: dict[str, str]) -> dict:
+    """
+    Manifest with the dates of the given locations replaced. last_updated_date is
+    kept as the latest date of any location for the readers that need one date.
+    """
+    locations = location_dates(manifest)
+    locations.update(dates)
+    return {"last_updated_date": max(locations.values()), "locations": locations}
+
+def new_data_ranges(
+        lakefs_ds: LakeFSDataStore,
+        type: Literal["raw", "processed"],
+        default_start_date: str,
+        locations: list[dict] | None = None
+    ) -> list[tuple[dict, pd.Timestamp, pd.Timestamp]]:
+    """
+    (location, first new date, last new date) of every location with data on the current
+    branch that main does not have yet, by comparing their manifests location by location.
+    """
+    current_branch = lakefs_ds.branch
+    new_manifest = lakefs_ds.load_json(key = f"data/{type}/manifest.json")
+    if not new_manifest or "last_updated_date" not in new_manifest:
+        raise ValueError(f"Could not load {type} manifest.json from branch '{current_branch}'")
+    lakefs_ds.checkout("main")
+    old_manifest = lakefs_ds.load_json(key = f"data/{type}/manifest.json")
+    lakefs_ds.checkout(current_branch)
+
+    new_dates = manifest_dates(new_manifest, default_start_date, locations)
+    old_dates = manifest_dates(old_manifest, default_start_date, locations)
+    ranges = []
+    for loc in resolve_locations(locations):
+        start = pd.to_datetime(old_dates[loc["id"]]) + pd.Timedelta(days=1)
+        end = pd.to_datetime(new_dates[loc["id"]])
+        if start <= end:
+            ranges.append((loc, start, end))
+    return ranges
@@ -5,73 +5,55 @@ sys.path.append(".")
 import json
 import pandas as pd
 from datetime import datetime
-from src.ds.lakefs_ds import LakeFSDataStore
+from src.ds import LakeFSDataStore, get_lakefs_store
 from src.shared.columns import FEATURES
+from src.shared.tracing import traced, traced_handler
+from src.shared.memory import checkpoint
+from src.shared.partitions import plan_partitions
+from src.data.utils import local_dates, new_data_ranges
 
-def validate_data(lakefs_ds: LakeFSDataStore, default_start_date: str) -> list[pd.DataFrame, list]:
+@traced()
+def validate_data(lakefs_ds: LakeFSDataStore, default_start_date: str, locations: list[dict] | None = None) -> list[pd.DataFrame, list]:
     """
     Loads and validates the newly extracted data from the current branch.
     
-    1. Finds the date range of new data by comparing main and current branch manifests.
-    2. Loads all CSV files for that date range.
-    3. Filters for the exact date range.
+    1. Finds the date range of new data per location by comparing main and current branch manifests.
+    2. Loads all CSV files for those date ranges.
+    3. Filters for the exact date ranges.
     4. Performs validation checks.
     """
     
-    # 1. Get the date range of the new data
-    
-    # Get the new manifest from the current data branch
-    current_branch = lakefs_ds.branch
-    new_manifest = lakefs_ds.load_json(key="data/raw/manifest.json")
-    if not new_manifest or "last_updated_date" not in new_manifest:
-        raise ValueError(f"Could not load manifest.json from branch '{current_branch}'")
-    
-    end_date = pd.to_datetime(new_manifest["last_updated_date"])
-    
-    # Get the old manifest from the 'main' branch to find the start date
-    lakefs_ds.checkout("main")
-    old_manifest = lakefs_ds.load_json(key="data/raw/manifest.json")
-    
-    start_date_str = default_start_date
-    if old_manifest and "last_updated_date" in old_manifest:
-        start_date_str = old_manifest["last_updated_date"]
-        
-    start_date = pd.to_datetime(start_date_str) + pd.Timedelta(days=1)
-    
-    # Switch back to the data branch to load the files
-    lakefs_ds.checkout(current_branch)
-    
-    print(f"Validation data from {start_date.date()} to {end_date.date()}")
+    # 1. Get the date range of the new data, a new location is validated from default_start_date
+    ranges = new_data_ranges(lakefs_ds, "raw", default_start_date, locations)
 
     # 2. Load all new data files from the data branch
-    periods = pd.date_range(start_date, end_date).to_period('M').unique()
     all_dfs = []
     
-    for period in periods:
-        key = f"data/raw/year={period.year}/month={period.month}/data.csv"
-        try:
-            print(f"Loading data from {key}...")
-            df = lakefs_ds.load_df(key)
+    for loc, start_date, end_date in ranges:
+        print(f"Validation data for {loc['id']} from {start_date.date()} to {end_date.date()}")
+        for loc_id, key in plan_partitions("raw", start_date, end_date, [loc]):
+            try:
+                print(f"Loading data from {key}...")
+                df = lakefs_ds.load_df(key)
+            except Exception as e:
+                # This file should exist if data was extracted for this month
+                raise FileNotFoundError(f"Failed to load required data file: {key}. Error: {e}")
+            # extracted dates are UTC-aware, the manifest bounds are naive local days
+            df["date"] = local_dates(df["date"], loc["timezone"])
+            # 3. Filter to the exact date range we're validating
+            df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+            df["location"] = loc_id
             all_dfs.append(df)
-        except Exception as e:
-            # This file should exist if data was extracted for this month
-            raise FileNotFoundError(f"Failed to load required data file: {key}. Error: {e}")
 
     if not all_dfs:
         raise ValueError("No data files found for the new date range.")
 
-    # 3. Combine and filter for the exact date range
-    combined_df = pd.concat(all_dfs, ignore_index=True)
-    combined_df["date"] = pd.to_datetime(combined_df["date"])
-    
-    # Filter to the exact date range we're validating
-    data_to_validate = combined_df[
-        (combined_df["date"] >= start_date) & 
-        (combined_df["date"] <= end_date)
-    ].reset_index(drop=True)
+    data_to_validate = pd.concat(all_dfs, ignore_index=True)
+    del all_dfs
+    checkpoint("validate_data.filtered", data_to_validate)
 
     if data_to_validate.empty:
-        raise ValueError(f"No data found between {start_date.date()} and {end_date.date()} after loading files.")
+        raise ValueError("No data found in the new date ranges after loading files.")
         
     print(f"Successfully loaded {len(data_to_validate)} rows for validation.")
 
@@ -86,23 +68,26 @@ def validate_data(lakefs_ds: LakeFSDataStore, default_start_date: str) -> list[p
     if missing_columns:
         validation_errors.append(f"Missing expected columns: {sorted(list(missing_columns))}")
         
-    # Check 2: All dates are present
-    # Create a full set of expected dates (normalized to remove time part)
-    expected_dates = set(pd.date_range(start_date, end_date, freq='D').normalize())
-    
-    # Get the set of actual dates present in the data
-    actual_dates = set(pd.to_datetime(data_to_validate['date']).dt.normalize())
-    
-    missing_dates = expected_dates - actual_dates
-    
-    if missing_dates:
-        # Sort the dates to make the error message readable
-        sorted_missing = sorted(list(missing_dates))
-        validation_errors.append(f"Missing data for {len(sorted_missing)} dates. "
-                                 f"First 3 missing: {[d.strftime('%Y-%m-%d') for d in sorted_missing[:3]]}")
+    # Check 2: All dates are present, at every location
+    for loc, start_date, end_date in ranges:
+        # Create a full set of expected dates (normalized to remove time part)
+        expected_dates = set(pd.date_range(start_date, end_date, freq='D').normalize())
+        loc_id = loc["id"]
+        loc_df = data_to_validate[data_to_validate["location"] == loc_id]
+        # Get the set of actual dates present in the data
+        actual_dates = set(pd.to_datetime(loc_df['date']).dt.normalize())
+        
+        missing_dates = expected_dates - actual_dates
+        
+        if missing_dates:
+            # Sort the dates to make the error message readable
+            sorted_missing = sorted(list(missing_dates))
+            validation_errors.append(f"Missing data for {len(sorted_missing)} dates at {loc_id}. "
+                                     f"First 3 missing: {[d.strftime('%Y-%m-%d') for d in sorted_missing[:3]]}")
 
     return data_to_validate, validation_errors
 
+@traced_handler("validate-raw-data")
 def lambda_handler(event, _):
 
     try:
@@ -121,7 +106,7 @@ def lambda_handler(event, _):
 
         print(f"Starting validation for manually determined branch: {branch_to_validate}")
 
-        lakefs_ds = LakeFSDataStore(
+        lakefs_ds = get_lakefs_store(
             repo_name=repo_name,
             endpoint=lakefs_endpoint
         )
@@ -130,7 +115,7 @@ def lambda_handler(event, _):
         lakefs_ds.checkout(branch_to_validate)
         
         # Run the validation
-        data_df, validation_errors = validate_data(lakefs_ds, default_start_date)
+        data_df, validation_errors = validate_data(lakefs_ds, default_start_date, event.get("locations"))
         
         if validation_errors:
             print("Validation FAILED.")
@@ -6,96 +6,80 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from src.ds.lakefs_ds import LakeFSDataStore
-from src.shared.columns import FEATURES, REMOVE
-
-def validate_processed_data(lakefs_ds: LakeFSDataStore, default_start_date: str) -> list[pd.DataFrame, list]:
+from src.ds import LakeFSDataStore, get_lakefs_store
+from src.shared.columns import FEATURES, REMOVE, CALENDAR_FEATURES
+from src.shared.tracing import traced, traced_handler
+from src.shared.memory import checkpoint
+from src.shared.partitions import plan_partitions
+from src.data.utils import local_dates, new_data_ranges
+from src.monitoring.reference_profile import update_reference_profile
+
+@traced()
+def validate_processed_data(lakefs_ds: LakeFSDataStore, default_start_date: str, locations: list[dict] | None = None) -> list[pd.DataFrame, list]:
     """
     Loads and validates the newly transformed data from the current branch.
     
     1. Defines the full list of expected columns after transformation.
-    2. Finds the date range of new data by comparing processed manifests.
+    2. Finds the date range of new data per location by comparing processed manifests.
     3. Loads all CSV files from data/processed/ for that date range.
     4. Performs validation checks for columns, NaNs, and missing dates.
     """
     
     # 1. Define the exact set of columns expected after transformation
     base_features = [col for col in FEATURES if col not in REMOVE]
-    cyclic_features = [
-        "year", "month", "day_of_month", "day_of_week", "day_of_year",
-        "month_sin", "month_cos", "year_sin", "year_cos"
-    ]
     # The 'date' column is also expected
-    final_expected_columns = set(["date"] + base_features + cyclic_features)
+    final_expected_columns = set(["date"] + base_features + CALENDAR_FEATURES)
 
-    # 2. Get the date range of the new processed data
-    current_branch = lakefs_ds.branch
-    new_manifest = lakefs_ds.load_json(key="data/processed/manifest.json")
-    if not new_manifest or "last_updated_date" not in new_manifest:
-        raise ValueError(f"Could not load processed manifest.json from branch '{current_branch}'")
-    
-    # The end date is the 'last_updated_date' from the *raw* manifest
-    # (as set by the transform function)
-    end_date = pd.to_datetime(new_manifest["last_updated_date"])
-    
-    # Get the old processed manifest from 'main' to find the start date
-    lakefs_ds.checkout("main")
-    old_manifest = lakefs_ds.load_json(key="data/processed/manifest.json")
-    
-    start_date_str = default_start_date
-    if old_manifest and "last_updated_date" in old_manifest:
-        start_date_str = old_manifest["last_updated_date"]
-        
-    start_date = pd.to_datetime(start_date_str) + pd.Timedelta(days=1)
-    
+    # 2. Get the date range of the new processed data per location, from the
+    # processed manifests (the transform copies the raw dates into them)
     # *** IMPORTANT ***
     # The transform logic filters for year >= 2018. 
     # We must adjust our validation start date to respect this.
     filter_start_date = pd.to_datetime("2018-01-01")
-    validation_start_date = max(start_date, filter_start_date)
-
-    # Switch back to the data branch to load the files
-    lakefs_ds.checkout(current_branch)
-    
-    print(f"Validation data from {validation_start_date.date()} to {end_date.date()}")
-    if validation_start_date > end_date:
+    ranges = []
+    for loc, start_date, end_date in new_data_ranges(lakefs_ds, "processed", default_start_date, locations):
+        validation_start_date = max(start_date, filter_start_date)
+        print(f"Validation data for {loc['id']} from {validation_start_date.date()} to {end_date.date()}")
+        if validation_start_date <= end_date:
+            ranges.append((loc, validation_start_date, end_date))
+
+    if not ranges:
         print("No new data to validate (start date is after end date). Skipping.")
         return None, [] # Nothing to validate
 
     # 3. Load all new data files from the data/processed branch
-    periods = pd.date_range(validation_start_date, end_date).to_period('M').unique()
     all_dfs = []
     
-    for period in periods:
-        key = f"data/processed/year={period.year}/month={period.month}/data.csv"
-        try:
-            print(f"Loading data from {key}...")
-            df = lakefs_ds.load_df(key)
+    for loc, validation_start_date, end_date in ranges:
+        for loc_id, key in plan_partitions("processed", validation_start_date, end_date, [loc]):
+            try:
+                print(f"Loading data from {key}...")
+                df = lakefs_ds.load_df(key)
+            except Exception as e:
+                # This file should exist if data was extracted for this month
+                raise FileNotFoundError(f"Failed to load required data file: {key}. Error: {e}")
+            # 4. Filter for the exact date range, extracted dates are UTC-aware, the manifest bounds are naive local days
+            df["date"] = local_dates(df["date"], loc["timezone"])
+            df = df[(df["date"] >= validation_start_date) & (df["date"] <= end_date)]
+            df["location"] = loc_id
             all_dfs.append(df)
-        except Exception as e:
-            # This file should exist if data was extracted for this month
-            raise FileNotFoundError(f"Failed to load required data file: {key}. Error: {e}")
 
     if not all_dfs:
         raise ValueError("No processed data files found for the new date range.")
 
-    # 4. Combine and filter for the exact date range
-    combined_df = pd.concat(all_dfs, ignore_index=True)
-    combined_df["date"] = pd.to_datetime(combined_df["date"])
-    
-    data_to_validate = combined_df[
-        (combined_df["date"] >= validation_start_date) & 
-        (combined_df["date"] <= end_date)
-    ].reset_index(drop=True)
+    data_to_validate = pd.concat(all_dfs, ignore_index=True)
+    del all_dfs
+    checkpoint("validate_processed_data.filtered", data_to_validate)
 
     if data_to_validate.empty:
-        raise ValueError(f"No data found between {validation_start_date.date()} and {end_date.date()} after loading files.")
+        raise ValueError("No data found in the new date ranges after loading files.")
         
     print(f"Successfully loaded {len(data_to_validate)} rows for validation.")
 
     # 5. Perform validation checks
     validation_errors = []
-    actual_columns = set(data_to_validate.columns)
+    # the location column is added while loading, it is not part of the partitions
+    actual_columns = set(data_to_validate.columns) - {"location"}
 
     # Check 1: Missing columns
     missing_columns = final_expected_columns - actual_columns
@@ -116,19 +100,23 @@ def validate_processed_data(lakefs_ds: LakeFSDataStore, default_start_date: str)
     if cols_with_nulls:
         validation_errors.append(f"Validation FAILED: Null values found in columns: {cols_with_nulls}")
         
-    # Check 4: All dates are present
-    expected_dates = set(pd.date_range(validation_start_date, end_date, freq='D').normalize())
-    actual_dates = set(pd.to_datetime(data_to_validate['date']).dt.normalize())
-    
-    missing_dates = expected_dates - actual_dates
-    
-    if missing_dates:
-        sorted_missing = sorted(list(missing_dates))
-        validation_errors.append(f"Missing data for {len(sorted_missing)} dates. "
-                                 f"First 3 missing: {[d.strftime('%Y-%m-%d') for d in sorted_missing[:3]]}")
+    # Check 4: All dates are present, at every location
+    for loc, validation_start_date, end_date in ranges:
+        expected_dates = set(pd.date_range(validation_start_date, end_date, freq='D').normalize())
+        loc_id = loc["id"]
+        loc_df = data_to_validate[data_to_validate["location"] == loc_id]
+        actual_dates = set(pd.to_datetime(loc_df['date']).dt.normalize())
+        
+        missing_dates = expected_dates - actual_dates
+        
+        if missing_dates:
+            sorted_missing = sorted(list(missing_dates))
+            validation_errors.append(f"Missing data for {len(sorted_missing)} dates at {loc_id}. "
+                                     f"First 3 missing: {[d.strftime('%Y-%m-%d') for d in sorted_missing[:3]]}")
 
     return data_to_validate, validation_errors
 
+@traced_handler("validate-processed-data")
 def lambda_handler(event, _):
 
     try:
@@ -143,7 +131,7 @@ def lambda_handler(event, _):
 
         print(f"Starting validation for transform branch: {branch_to_validate}")
 
-        lakefs_ds = LakeFSDataStore(
+        lakefs_ds = get_lakefs_store(
             repo_name=repo_name,
             endpoint=lakefs_endpoint
         )
@@ -152,7 +140,7 @@ def lambda_handler(event, _):
         lakefs_ds.checkout(branch_to_validate)
         
         # Run the validation
-        data_df, validation_errors = validate_processed_data(lakefs_ds, default_start_date)
+        data_df, validation_errors = validate_processed_data(lakefs_ds, default_start_date, event.get("locations"))
         
         if validation_errors:
             print("Validation FAILED.")
@@ -169,7 +157,14 @@ def lambda_handler(event, _):
                 })
             }
         
-        # Validation successful, merge to main
+        # Validation successful, refresh the drift reference profile so it merges with the data
+        try:
+            profile = update_reference_profile(lakefs_ds)
+            lakefs_ds.commit(message = f"Reference profile for {profile['version']}")
+        except Exception as e:
+            print(f"Could not update reference profile: {e}")
+
+        # Merge to main
         print("Validation SUCCEEDED. Merging to main...")
         
         # We are already on branch_to_validate
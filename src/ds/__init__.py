@@ -1,2 +1,22 @@
-from src.ds.lakefs_ds import LakeFSDataStore
-from src.ds.s3_ds import S3DataStore
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.ds.lakefs_ds import LakeFSDataStore
+    from src.ds.s3_ds import S3DataStore
+    from src.ds.stores import get_lakefs_store, get_s3_store
+    from src.ds.clients import get_client
+
+# resolved on first access so a handler only imports the SDKs it actually uses
+_LAZY = {
+    "LakeFSDataStore": "src.ds.lakefs_ds",
+    "S3DataStore": "src.ds.s3_ds",
+    "get_lakefs_store": "src.ds.stores",
+    "get_s3_store": "src.ds.stores",
+    "get_client": "src.ds.clients"
+}
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module 'src.ds' has no attribute '{name}'")
@@ -0,0 +1,63 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+
+# botocore defaults are 10 pooled connections and legacy retries, sized for the concurrent readers
+MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "60"))
+TCP_KEEPALIVE = os.getenv("AWS_TCP_KEEPALIVE", "1") == "1"
+
+# sessions are not thread-safe, so clients are created under one lock and cached
+_lock = threading.Lock()
+_sessions = {}
+_clients = {}
+
+def client_config(**overrides) -> Config:
+    settings = {
+        "max_pool_connections": MAX_POOL_CONNECTIONS,
+        "retries": {"max_attempts": MAX_ATTEMPTS, "mode": RETRY_MODE},
+        "connect_timeout": CONNECT_TIMEOUT,
+        "read_timeout": READ_TIMEOUT,
+        "tcp_keepalive": TCP_KEEPALIVE
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+def _get_session(access_key: str | None, secret_key: str | None) -> boto3.session.Session:
+    key = (access_key, secret_key)
+    if key not in _sessions:
+        _sessions[key] = boto3.session.Session(
+            aws_access_key_id = access_key,
+            aws_secret_access_key = secret_key
+        )
+    return _sessions[key]
+
+def get_client(
+        service: str,
+        region_name: str | None = None,
+        endpoint_url: str | None = None,
+        access_key: str | None = None,
+        secret_key: str | None = None,
+        **config_overrides
+    ):
+    """
+    Returns a shared, thread-safe botocore client for the service, endpoint and credentials.
+    Clients with the same arguments reuse one connection pool for the life of the process.
+    """
+    key = (service, region_name, endpoint_url, access_key, secret_key, tuple(sorted(config_overrides.items())))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _get_session(access_key, secret_key).client(
+                service,
+                region_name = region_name,
+                endpoint_url = endpoint_url,
+                config = client_config(**config_overrides)
+            )
+        return _clients[key]
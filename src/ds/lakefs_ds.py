@@ -1,48 +1,60 @@
 import io
 import os
 import json
-import boto3
-import lakefs
 import pandas as pd
-from lakefs.client import Client
+from src.ds.clients import get_client
+from src.shared.tracing import span
 
 class LakeFSDataStore:
 
     def __init__(self, repo_name: str, endpoint: str, branch: str = "main"):
         self.repo_name = repo_name
         self.branch = branch
+        self.endpoint = endpoint
+        self._repo = None
         access_key = os.getenv("LAKEFS_USERNAME")
         secret_key = os.getenv("LAKEFS_PASSWORD")
-        self.repo = lakefs.repository(
-            repository_id = repo_name,
-            client = Client(
-                username = access_key,
-                password = secret_key,
-                host = endpoint
-            )
-        )
-        self.s3 = boto3.client(
+        self.s3 = get_client(
             "s3",
             endpoint_url = endpoint,
-            aws_access_key_id = access_key,
-            aws_secret_access_key = secret_key,
+            access_key = access_key,
+            secret_key = secret_key,
             region_name="us-east-2"
         )
 
+    @property
+    def repo(self):
+        # the lakeFS SDK is only needed for branch operations, reads and writes go through the S3 gateway
+        if self._repo is None:
+            import lakefs
+            from lakefs.client import Client
+            self._repo = lakefs.repository(
+                repository_id = self.repo_name,
+                client = Client(
+                    username = os.getenv("LAKEFS_USERNAME"),
+                    password = os.getenv("LAKEFS_PASSWORD"),
+                    host = self.endpoint
+                )
+            )
+        return self._repo
+
     def _key(self, path: str) -> str:
         return f"{self.branch}/{path.lstrip('/')}"
 
     def save_json(self, key: str, data: dict) -> None:
         key = self._key(key)
         body = json.dumps(data)
-        self.s3.put_object(Bucket=self.repo_name, Key=key, Body=body)
+        with span("lakefs.save_json", key=key, bytes=len(body)):
+            self.s3.put_object(Bucket=self.repo_name, Key=key, Body=body)
         print(f"Saved JSON to {key}")
 
     def load_json(self, key: str) -> dict | None:
         key = self._key(key)
         try:
-            obj = self.s3.get_object(Bucket=self.repo_name, Key=key)
-            return json.loads(obj["Body"].read())
+            with span("lakefs.load_json", key=key) as s:
+                body = self.s3.get_object(Bucket=self.repo_name, Key=key)["Body"].read()
+                s.set(bytes=len(body))
+            return json.loads(body)
         except self.s3.exceptions.NoSuchKey:
             return None
         except Exception as e:
@@ -51,16 +63,40 @@ class LakeFSDataStore:
 
     def save_df(self, df: pd.DataFrame, key: str) -> None:
         key = self._key(key)
-        buffer = io.StringIO()
-        df.to_csv(buffer, index=False)
-        self.s3.put_object(Bucket=self.repo_name, Key=key, Body=buffer.getvalue())
+        with span("lakefs.save_df", key=key, rows=len(df)) as s:
+            buffer = io.StringIO()
+            df.to_csv(buffer, index=False)
+            body = buffer.getvalue()
+            s.set(bytes=len(body))
+            self.s3.put_object(Bucket=self.repo_name, Key=key, Body=body)
         print(f"Saved DataFrame to {key}")
 
     def load_df(self, key: str) -> pd.DataFrame:
         key = self._key(key)
-        obj = self.s3.get_object(Bucket=self.repo_name, Key=key)
-        return pd.read_csv(io.BytesIO(obj["Body"].read()))
+        with span("lakefs.load_df", key=key) as s:
+            body = self.s3.get_object(Bucket=self.repo_name, Key=key)["Body"].read()
+            df = pd.read_csv(io.BytesIO(body))
+            s.set(bytes=len(body), rows=len(df))
+        return df
     
+    def save_parquet(self, df: pd.DataFrame, key: str) -> None:
+        key = self._key(key)
+        with span("lakefs.save_parquet", key=key, rows=len(df)) as s:
+            buffer = io.BytesIO()
+            df.to_parquet(buffer, index=False)
+            body = buffer.getvalue()
+            s.set(bytes=len(body))
+            self.s3.put_object(Bucket=self.repo_name, Key=key, Body=body)
+        print(f"Saved DataFrame to {key}")
+
+    def load_parquet(self, key: str) -> pd.DataFrame:
+        key = self._key(key)
+        with span("lakefs.load_parquet", key=key) as s:
+            body = self.s3.get_object(Bucket=self.repo_name, Key=key)["Body"].read()
+            df = pd.read_parquet(io.BytesIO(body))
+            s.set(bytes=len(body), rows=len(df))
+        return df
+
     def load_df_over_prefixes(self, prefixes: list[str]) -> pd.DataFrame:
         dfs = []
         for p in prefixes:
@@ -77,6 +113,28 @@ class LakeFSDataStore:
         else:
             return pd.DataFrame()
     
+    def list_keys(self, prefix: str) -> list[str]:
+        """Keys under prefix on the current branch, without the branch name."""
+        keys = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.repo_name, Prefix=self._key(prefix)):
+            keys.extend(obj['Key'][len(self.branch) + 1:] for obj in page.get('Contents', []))
+        return keys
+
+    def copy_key(self, source: str, dest: str) -> None:
+        self.s3.copy_object(
+            Bucket=self.repo_name,
+            Key=self._key(dest),
+            CopySource={"Bucket": self.repo_name, "Key": self._key(source)}
+        )
+
+    def delete_keys(self, keys: list[str]) -> None:
+        # delete_objects accepts at most 1000 keys per request
+        for i in range(0, len(keys), 1000):
+            batch = [{"Key": self._key(k)} for k in keys[i:i + 1000]]
+            self.s3.delete_objects(Bucket=self.repo_name, Delete={"Objects": batch, "Quiet": True})
+        print(f"Deleted {len(keys)} objects")
+
     def checkout(self, branch: str):
         if branch not in [b.id for b in list(self.repo.branches())]:
             print(f"Checkout failed. {branch} does not exist")
@@ -85,8 +143,10 @@ class LakeFSDataStore:
             print(f"Switched to branch '{branch}'")
 
     def commit(self, message: str) -> str | None:
+        import lakefs
         try:
-            res = self.repo.branch(self.branch).commit(message)
+            with span("lakefs.commit", key=self.branch):
+                res = self.repo.branch(self.branch).commit(message)
             print(f"Commit ID: {res.id} to {self.branch}")
             return res.id
         except lakefs.exceptions.BadRequestException as e:
@@ -101,7 +161,8 @@ class LakeFSDataStore:
         return res.id
 
     def merge_branch(self, dest: str, delete_after_merge: bool = False) -> str:
-        merge_commit = self.repo.branch(self.branch).merge_into(dest)
+        with span("lakefs.merge", key=f"{self.branch}->{dest}"):
+            merge_commit = self.repo.branch(self.branch).merge_into(dest)
         print(f"Merged {self.branch} into {dest}. Merge commit: {merge_commit}")
         if delete_after_merge:
             self.repo.branch(self.branch).delete()
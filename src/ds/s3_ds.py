@@ -1,8 +1,9 @@
 import io
 import os
 import json
-import boto3
 import pandas as pd
+from src.ds.clients import get_client
+from src.shared.tracing import span
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -16,23 +17,22 @@ class S3DataStore:
         access_key = os.getenv("AWS_ACCESS_KEY")
         secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
         if access_key and secret_key:
-            self.s3 = boto3.client(
-                "s3",
-                aws_access_key_id = access_key,
-                aws_secret_access_key = secret_key
-            )
+            self.s3 = get_client("s3", access_key = access_key, secret_key = secret_key)
         else:
-            self.s3 = boto3.client("s3")
+            self.s3 = get_client("s3")
 
     def save_json(self, key: str, data: dict) -> None:
         body = json.dumps(data)
-        self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=body)
+        with span("s3.save_json", key=key, bytes=len(body)):
+            self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=body)
         print(f"Saved JSON to {key}")
 
     def load_json(self, key: str) -> dict | None:
         try:
-            obj = self.s3.get_object(Bucket=self.bucket_name, Key=key)
-            return json.loads(obj["Body"].read())
+            with span("s3.load_json", key=key) as s:
+                body = self.s3.get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+                s.set(bytes=len(body))
+            return json.loads(body)
         except self.s3.exceptions.NoSuchKey:
             return None
         except Exception as e:
@@ -40,15 +40,21 @@ class S3DataStore:
             return None
     
     def save_df(self, df: pd.DataFrame, key: str) -> None:
-        buffer = io.StringIO()
-        df.to_csv(buffer, index=False)
-        self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=buffer.getvalue())
+        with span("s3.save_df", key=key, rows=len(df)) as s:
+            buffer = io.StringIO()
+            df.to_csv(buffer, index=False)
+            body = buffer.getvalue()
+            s.set(bytes=len(body))
+            self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=body)
         print(f"Saved DataFrame to {key}")
     
     def load_df(self, key: str) -> pd.DataFrame | None:
         try:
-            obj = self.s3.get_object(Bucket=self.bucket_name, Key=key)
-            return pd.read_csv(io.StringIO(obj["Body"].read().decode('utf-8')))
+            with span("s3.load_df", key=key) as s:
+                body = self.s3.get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+                df = pd.read_csv(io.StringIO(body.decode('utf-8')))
+                s.set(bytes=len(body), rows=len(df))
+            return df
         except self.s3.exceptions.NoSuchKey:
             print(f"No such key: {key}")
             return None
@@ -56,3 +62,75 @@ class S3DataStore:
             print(f"Error reading DataFrame {key}: {e}")
             return None
 
+    def get_etag(self, key: str) -> str | None:
+        try:
+            head = self.s3.head_object(Bucket=self.bucket_name, Key=key)
+            return head["ETag"].strip('"')
+        except Exception as e:
+            print(f"Error reading ETag for {key}: {e}")
+            return None
+
+    def download_file(self, key: str, path: str) -> None:
+        with span("s3.download_file", key=key):
+            self.s3.download_file(self.bucket_name, key, path)
+        print(f"Downloaded {key} to {path}")
+
+    def list_keys(self, prefix: str) -> list[str]:
+        keys = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return keys
+
+    def delete_keys(self, keys: list[str]) -> None:
+        # delete_objects accepts at most 1000 keys per request
+        for i in range(0, len(keys), 1000):
+            batch = [{"Key": k} for k in keys[i:i + 1000]]
+            self.s3.delete_objects(Bucket=self.bucket_name, Delete={"Objects": batch, "Quiet": True})
+        print(f"Deleted {len(keys)} objects")
+
+    def get_size(self, key: str) -> int | None:
+        try:
+            return self.s3.head_object(Bucket=self.bucket_name, Key=key)["ContentLength"]
+        except Exception as e:
+            print(f"Error reading size of {key}: {e}")
+            return None
+
+    def load_bytes(self, key: str, start: int = 0, end: int | None = None) -> bytes | None:
+        """
+        Reads bytes [start, end] (inclusive) of an object with a ranged GET.
+        """
+        byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end}"
+        try:
+            with span("s3.load_bytes", key=key) as s:
+                body = self.s3.get_object(Bucket=self.bucket_name, Key=key, Range=byte_range)["Body"].read()
+                s.set(bytes=len(body))
+            return body
+        except self.s3.exceptions.NoSuchKey:
+            print(f"No such key: {key}")
+            return None
+
+    def save_bytes(self, key: str, body: bytes) -> None:
+        with span("s3.save_bytes", key=key, bytes=len(body)):
+            self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=body)
+        print(f"Saved {len(body)} bytes to {key}")
+
+    def save_parquet(self, df: pd.DataFrame, key: str) -> None:
+        with span("s3.save_parquet", key=key, rows=len(df)) as s:
+            buffer = io.BytesIO()
+            df.to_parquet(buffer, index=False)
+            body = buffer.getvalue()
+            s.set(bytes=len(body))
+            self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=body)
+        print(f"Saved DataFrame to {key}")
+
+    def load_parquet(self, key: str) -> pd.DataFrame | None:
+        try:
+            with span("s3.load_parquet", key=key) as s:
+                body = self.s3.get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+                df = pd.read_parquet(io.BytesIO(body))
+                s.set(bytes=len(body), rows=len(df))
+            return df
+        except self.s3.exceptions.NoSuchKey:
+            print(f"No such key: {key}")
+            return None
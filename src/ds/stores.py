@@ -0,0 +1,22 @@
+# One store per bucket / repository per process, reused across warm Lambda invocations
+_s3_stores = {}
+_lakefs_stores = {}
+
+def get_s3_store(bucket_name: str):
+    if bucket_name not in _s3_stores:
+        from src.ds.s3_ds import S3DataStore
+        _s3_stores[bucket_name] = S3DataStore(bucket_name = bucket_name)
+    return _s3_stores[bucket_name]
+
+def get_lakefs_store(repo_name: str, endpoint: str, branch: str = "main"):
+    """
+    Returns the process-wide store for repo_name at endpoint, checked out on branch.
+    The branch is reset on every call because a previous invocation may have switched it.
+    """
+    key = (repo_name, endpoint)
+    if key not in _lakefs_stores:
+        from src.ds.lakefs_ds import LakeFSDataStore
+        _lakefs_stores[key] = LakeFSDataStore(repo_name = repo_name, endpoint = endpoint, branch = branch)
+    store = _lakefs_stores[key]
+    store.branch = branch
+    return store
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from contextlib import contextmanager
+from importlib import metadata
+
+# shipped next to train.py in source.tar.gz by scripts/deploy_model_to_s3.py
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+WHEEL_DIR = os.path.join(CODE_DIR, "wheels")
+LOCK_FILE = os.path.join(WHEEL_DIR, "lock.json")
+REQUIREMENTS_FILE = os.path.join(CODE_DIR, "requirements.txt")
+
+STARTED = time.perf_counter()
+timings = {}
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 3)
+        print(f"[startup] {name}: {timings[name]:.3f}s")
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _installed_version(name: str) -> str | None:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+def verify_lock(lock: dict) -> None:
+    """Checks every vendored wheel against the hash recorded when the archive was built."""
+    for entry in lock["packages"]:
+        path = os.path.join(WHEEL_DIR, entry["file"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Locked wheel {entry['file']} is missing from {WHEEL_DIR}")
+        if _sha256(path) != entry["sha256"]:
+            raise ValueError(f"Hash mismatch for {entry['file']}")
+
+def missing_packages(lock: dict) -> list[dict]:
+    """
+    Locked packages the container does not provide. Packages the image already
+    has are kept at their installed version rather than reinstalled.
+    """
+    missing = []
+    for entry in lock["packages"]:
+        installed = _installed_version(entry["name"])
+        if installed is None:
+            missing.append(entry)
+        elif installed != entry["version"]:
+            print(f"[startup] keeping image {entry['name']}=={installed} (locked {entry['version']})")
+    return missing
+
+def _pip_install(args: list[str]) -> None:
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "-q"] + args)
+
+def ensure_dependencies() -> None:
+    """
+    Installs the locked packages missing from the image, offline from the vendored wheels.
+    Falls back to the package index only if the archive was built without wheels
+    or the wheels do not fit this interpreter.
+    """
+    if not os.path.exists(LOCK_FILE):
+        with phase("install_online"):
+            print(f"[startup] no {LOCK_FILE}, installing {REQUIREMENTS_FILE} from the index")
+            _pip_install(["-r", REQUIREMENTS_FILE])
+        return
+    with phase("verify_lock"):
+        with open(LOCK_FILE) as f:
+            lock = json.load(f)
+        verify_lock(lock)
+        missing = missing_packages(lock)
+    if not missing:
+        print("[startup] all locked packages already installed")
+        return
+    specs = [f"{entry['name']}=={entry['version']}" for entry in missing]
+    with phase("install_offline"):
+        try:
+            _pip_install(["--no-index", "--find-links", WHEEL_DIR] + specs)
+        except subprocess.CalledProcessError as e:
+            print(f"[startup] offline install failed ({e}), retrying from the index")
+            _pip_install(specs)
+
+def report(output_dir: str | None = None) -> dict:
+    """Phase timings plus the time from interpreter start of train.py to this call."""
+    timings["since_start"] = round(time.perf_counter() - STARTED, 3)
+    print(f"[startup] timings: {json.dumps(timings)}")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "startup_timings.json"), "w") as f:
+            json.dump(timings, f)
+    return timings
@@ -0,0 +1,158 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+SEASONS = {
+    12: "DJF", 1: "DJF", 2: "DJF",
+    3: "MAM", 4: "MAM", 5: "MAM",
+    6: "JJA", 7: "JJA", 8: "JJA",
+    9: "SON", 10: "SON", 11: "SON"
+}
+
+def _encode(y_true: np.ndarray, y_pred: np.ndarray, labels: np.ndarray | None = None) -> tuple:
+    if labels is None:
+        labels = np.union1d(y_true, y_pred)
+    return labels, np.searchsorted(labels, y_true), np.searchsorted(labels, y_pred)
+
+def confusion_from_labels(y_true, y_pred, labels: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the confusion matrix in one pass with bincount. Rows are true labels, columns predictions.
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    labels, t, p = _encode(y_true, y_pred, labels)
+    k = len(labels)
+    cm = np.bincount(t * k + p, minlength=k * k).reshape(k, k)
+    return labels, cm
+
+def _safe_divide(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    # sklearn's zero_division default: 0.0 where the denominator is 0
+    return np.divide(num, den, out=np.zeros(num.shape, dtype=float), where=den != 0)
+
+def metrics_from_confusion(cm: np.ndarray, labels: np.ndarray, report: bool = True) -> dict:
+    """
+    Derives accuracy, weighted precision/recall/F1, MCC and the per-class report
+    from a single confusion matrix, matching sklearn's definitions.
+    """
+    cm = np.asarray(cm, dtype=np.int64)
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    n = support.sum()
+
+    precision = _safe_divide(tp, predicted)
+    recall = _safe_divide(tp, support)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    weights = _safe_divide(support.astype(float), np.full(support.shape, n, dtype=float))
+    accuracy = float(tp.sum() / n) if n else 0.0
+
+    cov_ytyp = tp.sum() * n - float(np.dot(support, predicted))
+    cov_ypyp = float(n) ** 2 - float(np.dot(predicted, predicted))
+    cov_ytyt = float(n) ** 2 - float(np.dot(support, support))
+    mcc = 0.0 if cov_ypyp * cov_ytyt == 0 else cov_ytyp / np.sqrt(cov_ytyt * cov_ypyp)
+
+    metrics = {
+        "accuracy": accuracy,
+        "precision": float(np.dot(weights, precision)),
+        "recall": float(np.dot(weights, recall)),
+        "f1_score": float(np.dot(weights, f1)),
+        "confusion_matrix": cm.tolist(),
+        "mcc": float(mcc),
+    }
+    if not report:
+        metrics["support"] = int(n)
+        del metrics["confusion_matrix"]
+        return metrics
+
+    class_report = {
+        str(label): {
+            "precision": float(precision[i]),
+            "recall": float(recall[i]),
+            "f1-score": float(f1[i]),
+            "support": int(support[i])
+        }
+        for i, label in enumerate(labels)
+    }
+    class_report["accuracy"] = accuracy
+    class_report["macro avg"] = {
+        "precision": float(precision.mean()),
+        "recall": float(recall.mean()),
+        "f1-score": float(f1.mean()),
+        "support": int(n)
+    }
+    class_report["weighted avg"] = {
+        "precision": metrics["precision"],
+        "recall": metrics["recall"],
+        "f1-score": metrics["f1_score"],
+        "support": int(n)
+    }
+    metrics["classification_report"] = class_report
+    return metrics
+
+def compute_metrics(y_true, y_pred) -> dict:
+    labels, cm = confusion_from_labels(y_true, y_pred)
+    return metrics_from_confusion(cm, labels)
+
+def slice_metrics(y_true, y_pred, slice_keys) -> dict:
+    """
+    Per-slice metrics (e.g. per month or season). All slice confusion
+    matrices come from a single 3-D bincount over (slice, true, pred).
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    slice_values, s = np.unique(np.asarray(slice_keys), return_inverse=True)
+    labels, t, p = _encode(y_true, y_pred)
+    k = len(labels)
+    cms = np.bincount(
+        (s * k + t) * k + p,
+        minlength=len(slice_values) * k * k
+    ).reshape(len(slice_values), k, k)
+    return {
+        str(value): metrics_from_confusion(cms[i], labels, report=False)
+        for i, value in enumerate(slice_values)
+    }
+
+def month_and_season_slices(y_true, y_pred, months) -> dict:
+    months = np.asarray(months).astype(int)
+    seasons = np.array([SEASONS[m] for m in months])
+    return {
+        "month": slice_metrics(y_true, y_pred, months),
+        "season": slice_metrics(y_true, y_pred, seasons)
+    }
+
+def time_ordered_folds(n_samples: int, n_splits: int = 5) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Expanding-window splits over time-ordered rows: each fold trains on
+    everything before its test block.
+    """
+    test_size = n_samples // (n_splits + 1)
+    if test_size == 0:
+        raise ValueError(f"Too few samples ({n_samples}) for {n_splits} folds")
+    folds = []
+    for i in range(n_splits):
+        train_end = n_samples - (n_splits - i) * test_size
+        folds.append((np.arange(train_end), np.arange(train_end, train_end + test_size)))
+    return folds
+
+def _evaluate_fold(args) -> dict:
+    model_factory, X_train, y_train, X_test, y_test, months = args
+    model = model_factory()
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    metrics = compute_metrics(y_test, y_pred)
+    del metrics["classification_report"]
+    metrics["slices"] = month_and_season_slices(y_test, y_pred, months)
+    metrics["train_size"] = int(len(y_train))
+    metrics["test_size"] = int(len(y_test))
+    return metrics
+
+def evaluate_folds(model_factory, X: np.ndarray, y: np.ndarray, months: np.ndarray, n_splits: int = 5, max_workers: int | None = None) -> list[dict]:
+    """
+    Fits and scores one model per time-ordered fold in a process pool.
+    model_factory must be picklable (e.g. functools.partial of an estimator class).
+    """
+    tasks = [
+        (model_factory, X[train_idx], y[train_idx], X[test_idx], y[test_idx], months[test_idx])
+        for train_idx, test_idx in time_ordered_folds(len(y), n_splits)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_evaluate_fold, tasks))
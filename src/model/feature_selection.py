@@ -0,0 +1,109 @@
+import numpy as np
+from datetime import datetime, timezone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.inspection import permutation_importance
+
+CORR_THRESHOLD = 0.95
+MIN_IMPORTANCE = 0.0
+VALIDATION_FRACTION = 0.2
+
+def importance_scores(model, X_test: np.ndarray, y_test: np.ndarray, n_repeats: int = 5, random_state: int = 42) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Impurity and permutation importances of a fitted model, and their average
+    after scaling each to sum to 1 (negative permutation importances count as 0).
+    """
+    impurity = model.feature_importances_
+    permutation = permutation_importance(
+        model, X_test, y_test, n_repeats=n_repeats, random_state=random_state, n_jobs=-1
+    ).importances_mean
+    clipped = np.clip(permutation, 0.0, None)
+    scaled_perm = clipped / clipped.sum() if clipped.sum() > 0 else clipped
+    scaled_imp = impurity / impurity.sum() if impurity.sum() > 0 else impurity
+    return impurity, permutation, (scaled_imp + scaled_perm) / 2
+
+def validation_split(n_samples: int, fraction: float = VALIDATION_FRACTION) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Splits time-ordered rows into a fit block and the validation block after it,
+    like the last of the evaluation folds.
+    """
+    val_size = int(n_samples * fraction)
+    if val_size == 0 or val_size == n_samples:
+        raise ValueError(f"Cannot hold out {fraction} of {n_samples} samples for validation")
+    split = n_samples - val_size
+    return np.arange(split), np.arange(split, n_samples)
+
+def correlation_clusters(X: np.ndarray, threshold: float = CORR_THRESHOLD) -> list[list[int]]:
+    """
+    Groups columns linked by |Pearson r| >= threshold (single linkage, union-find).
+    Constant columns stay in their own cluster.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.abs(np.corrcoef(X, rowvar=False))
+    corr = np.nan_to_num(corr)
+    parent = list(range(X.shape[1]))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows, cols = np.where(np.triu(corr >= threshold, k=1))
+    for i, j in zip(rows, cols):
+        parent[find(i)] = find(j)
+    clusters = {}
+    for i in range(X.shape[1]):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+def select_features(
+        X_train: np.ndarray,
+        y_train: np.ndarray,
+        feature_names: list[str],
+        params: dict,
+        corr_threshold: float = CORR_THRESHOLD,
+        min_importance: float = MIN_IMPORTANCE,
+        validation_fraction: float = VALIDATION_FRACTION
+    ) -> dict:
+    """
+    Keeps the most important feature of every correlation cluster and drops
+    features whose combined importance is at or below min_importance.
+    X_train must be in time order: the permutation importance is measured on its
+    last validation_fraction, so the holdout set stays unseen until evaluation.
+    Returns a versioned feature list with the reason each feature was dropped.
+    """
+    fit_idx, val_idx = validation_split(len(y_train), validation_fraction)
+    model = RandomForestClassifier(**{**params, "verbose": 0})
+    model.fit(X_train[fit_idx], y_train[fit_idx])
+    impurity, permutation, score = importance_scores(model, X_train[val_idx], y_train[val_idx])
+
+    dropped = {}
+    clusters = correlation_clusters(X_train, corr_threshold)
+    for cluster in clusters:
+        keep = max(cluster, key=lambda i: score[i])
+        for i in cluster:
+            if i != keep:
+                dropped[feature_names[i]] = f"correlated with {feature_names[keep]}"
+    for i, name in enumerate(feature_names):
+        if name not in dropped and min_importance > 0 and score[i] <= min_importance:
+            dropped[name] = f"importance {score[i]:.4f} <= {min_importance}"
+
+    kept = [name for name in feature_names if name not in dropped]
+    print(f"Feature selection kept {len(kept)} of {len(feature_names)} features")
+    return {
+        "version": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S"),
+        "features": kept,
+        "dropped": dropped,
+        "clusters": [[feature_names[i] for i in c] for c in clusters if len(c) > 1],
+        "importance": {
+            name: {
+                "impurity": float(impurity[i]),
+                "permutation": float(permutation[i]),
+                "score": float(score[i])
+            }
+            for i, name in enumerate(feature_names)
+        },
+        "corr_threshold": corr_threshold,
+        "min_importance": min_importance,
+        "validation_fraction": validation_fraction
+    }
@@ -1,5 +1,70 @@
-import os, joblib
+import io
+import os
+import json
+import joblib
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+NPY_CONTENT_TYPE = "application/x-npy"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
 
 # Action Test
 def model_fn(model_dir):
-    return joblib.load(os.path.join(model_dir, "model.pkl"))
\ No newline at end of file
+    # the estimator itself, so the container's default handlers keep working with it
+    model = joblib.load(os.path.join(model_dir, "model.pkl"))
+    # feature order the model was trained with, written by train.py
+    features_path = os.path.join(model_dir, "features.json")
+    if os.path.exists(features_path):
+        with open(features_path) as f:
+            model.training_features_ = json.load(f)["features"]
+    return model
+
+def input_fn(request_body, request_content_type):
+    """
+    Parses the request into a float32 matrix plus the column names sent with it.
+    application/x-npy payloads are structured arrays whose field names carry the feature order.
+    """
+    content_type = request_content_type.split(";")[0].strip()
+    if content_type == NPY_CONTENT_TYPE:
+        arr = np.load(io.BytesIO(request_body), allow_pickle=False)
+        if arr.dtype.names:
+            return {"columns": list(arr.dtype.names), "X": structured_to_unstructured(arr, dtype=np.float32)}
+        return {"columns": None, "X": np.atleast_2d(arr).astype(np.float32)}
+    if content_type == ARROW_CONTENT_TYPE:
+        if pa is None:
+            raise ValueError(f"pyarrow is not installed, cannot parse {ARROW_CONTENT_TYPE}")
+        table = pa.ipc.open_stream(request_body).read_all()
+        X = np.column_stack([col.to_numpy() for col in table.columns]).astype(np.float32)
+        return {"columns": table.column_names, "X": X}
+    if content_type == "text/csv":
+        if isinstance(request_body, bytes):
+            request_body = request_body.decode("utf-8")
+        return {"columns": None, "X": np.loadtxt(io.StringIO(request_body), delimiter=",", ndmin=2)}
+    if content_type == "application/json":
+        return {"columns": None, "X": np.array(json.loads(request_body), dtype=float, ndmin=2)}
+    raise ValueError(f"Unsupported content type: {request_content_type}")
+
+def predict_fn(input_data, model):
+    X = input_data["X"]
+    columns = input_data["columns"]
+    features = getattr(model, "training_features_", None)
+    if columns is not None and features is not None and columns != features:
+        missing = [c for c in features if c not in columns]
+        if missing:
+            raise ValueError(f"Payload is missing model features: {missing}")
+        print("Payload feature order differs from training order, reordering by name")
+        index = {c: i for i, c in enumerate(columns)}
+        X = X[:, [index[c] for c in features]]
+    return model.predict(X)
+
+def output_fn(prediction, accept):
+    accept = (accept or "application/json").split(";")[0].strip()
+    if accept == NPY_CONTENT_TYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(prediction), allow_pickle=False)
+        return buffer.getvalue()
+    return json.dumps(np.asarray(prediction).tolist())
@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import shutil
+import tarfile
+import numpy as np
+import pandas as pd
+from src.ds import S3DataStore, get_s3_store
+
+MODEL_BUCKET = os.getenv("MODEL_BUCKET", "weather-model-478492276227")
+MODEL_KEY = os.getenv("MODEL_KEY", "models/approved/model.tar.gz")
+MODEL_DIR = os.getenv("LOCAL_MODEL_DIR", "/tmp/model")
+MODEL_CHECK_INTERVAL = float(os.getenv("MODEL_CHECK_INTERVAL", "60"))
+
+# Survives across warm invocations of the same container
+_cache = {"etag": None, "model": None, "features": None}
+_version = {"etag": None, "checked_at": None}
+# the only archive members read, extracted by basename whatever their path in the archive
+MODEL_MEMBERS = ("model.pkl", "features.json")
+
+def _download_model(s3_ds: S3DataStore, etag: str) -> tuple:
+    """
+    Downloads the model tarball into /tmp and loads model.pkl and,
+    when present, the training feature order from features.json.
+    """
+    import joblib
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    archive_path = os.path.join(MODEL_DIR, "model.tar.gz")
+    s3_ds.download_file(MODEL_KEY, archive_path)
+    members = {}
+    with tarfile.open(archive_path, mode="r:*") as tar:
+        for m in tar.getmembers():
+            name = m.name.rsplit("/", 1)[-1]
+            if m.isfile() and name in MODEL_MEMBERS and name not in members:
+                # written under MODEL_DIR by basename, the member path is never used
+                path = os.path.join(MODEL_DIR, name)
+                with tar.extractfile(m) as src, open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                members[name] = path
+    os.remove(archive_path)
+    if "model.pkl" not in members:
+        raise FileNotFoundError(f"model.pkl not found in s3://{MODEL_BUCKET}/{MODEL_KEY}")
+    model = joblib.load(members["model.pkl"])
+    features = None
+    if "features.json" in members:
+        with open(members["features.json"]) as f:
+            features = json.load(f)["features"]
+    print(f"Loaded local model (ETag {etag})")
+    return model, features
+
+def get_model_version(s3_ds: S3DataStore | None = None) -> str | None:
+    """
+    ETag of the approved model artifact, re-checked at most every MODEL_CHECK_INTERVAL seconds.
+    Changes whenever validate_model promotes a new model. A missing artifact is
+    remembered for the same interval instead of being looked up on every call.
+    """
+    now = time.monotonic()
+    if _version["checked_at"] is not None and now - _version["checked_at"] < MODEL_CHECK_INTERVAL:
+        return _version["etag"]
+    if s3_ds is None:
+        s3_ds = get_s3_store(MODEL_BUCKET)
+    etag = s3_ds.get_etag(MODEL_KEY)
+    _version["checked_at"] = now
+    if etag is None:
+        # Keep the last known version if S3 is unreachable or nothing is approved yet
+        return _version["etag"]
+    _version["etag"] = etag
+    return etag
+
+def get_local_model(s3_ds: S3DataStore | None = None) -> tuple:
+    """
+    Returns the approved model and its feature order, downloading it only when the artifact's ETag changes.
+    """
+    if s3_ds is None:
+        s3_ds = get_s3_store(MODEL_BUCKET)
+    etag = get_model_version(s3_ds)
+    if etag is None:
+        raise RuntimeError(f"Model artifact s3://{MODEL_BUCKET}/{MODEL_KEY} is not available")
+    if etag != _cache["etag"]:
+        _cache["model"], _cache["features"] = _download_model(s3_ds, etag)
+        _cache["etag"] = etag
+    return _cache["model"], _cache["features"]
+
+def predict_local(input_X: pd.DataFrame) -> list:
+    model, features = get_local_model()
+    if features is not None:
+        input_X = input_X[features]
+    return model.predict(input_X.to_numpy(dtype=np.float32)).tolist()
@@ -2,62 +2,259 @@ import sys
 sys.path.append("/opt")
 sys.path.append(".")
 
+import io
+import os
 import json
-import boto3
+import time
+import numpy as np
 import pandas as pd
-from src.ds import S3DataStore
+from concurrent.futures import ThreadPoolExecutor
+from src.ds import get_s3_store
+from src.ds.clients import get_client
+from src.api import get_open_meteo_api
 from src.data.extract import fetch_data_from_api
 from src.data.transform import process_dataframe
+from src.model.local_model import predict_local, get_model_version, MODEL_CHECK_INTERVAL
+from src.model.prediction_cache import PredictionCache
+from src.monitoring.prediction_log import append_rows, LOG_KEY
+from src.shared.feature_list import active_model_features
+from src.shared.partitions import DEFAULT_LOCATION, resolve_locations
+from src.shared.tracing import span, traced_handler
 try:
     from dotenv import load_dotenv
     load_dotenv()
 except ImportError:
     pass
 
-runtime = boto3.client("sagemaker-runtime", region_name="us-east-2")
-
-def make_prediction(input_X: pd.DataFrame) -> float:
-    if len(input_X) == 1:
-        input_X = pd.concat([input_X, input_X], ignore_index=True)
-    body_bytes = input_X.to_csv(index=False, header=False).encode("utf-8")
-    resp = runtime.invoke_endpoint(
-        EndpointName="sklearn-serverless-endpoint",
-        ContentType="text/csv",
-        Accept="application/json",
-        Body=body_bytes
-    )
-    pred = json.loads(resp["Body"].read().decode("utf-8"))
-    return pred[0]
-
-def get_weather_code():
+def get_runtime():
+    # shared pooled client, sized for the concurrent chunk requests
+    return get_client("sagemaker-runtime", region_name="us-east-2")
+
+BUCKET_NAME = "weather-model-478492276227"
+
+# "endpoint" invokes SageMaker, "local" scores in-process and falls back to the endpoint
+PREDICTION_MODE = os.getenv("PREDICTION_MODE", "endpoint")
+ENDPOINT_NAME = os.getenv("ENDPOINT_NAME", "sklearn-serverless-endpoint")
+
+# Survives across warm invocations of the same container
+_endpoint_model = {"version": None, "checked_at": None}
+
+# Serverless endpoints accept payloads up to 4 MB, keep some headroom
+MAX_PAYLOAD_BYTES = int(os.getenv("MAX_PAYLOAD_BYTES", str(3 * 1024 * 1024)))
+MAX_ROWS_PER_REQUEST = int(os.getenv("MAX_ROWS_PER_REQUEST", "5000"))
+MAX_WORKERS = int(os.getenv("PREDICTION_WORKERS", "8"))
+
+# text/csv works with any deployed model; set application/x-npy once the endpoint
+# serves a model packaged with the current inference.py, older ones reject it
+ENDPOINT_CONTENT_TYPE = os.getenv("ENDPOINT_CONTENT_TYPE", "text/csv")
+
+def to_npy_payload(input_X: pd.DataFrame) -> bytes:
+    """
+    Serializes the active model features of input_X as a float32 structured array.
+    The field names travel in the .npy header so the endpoint can verify the order.
+    """
+    features = active_model_features()
+    missing = [c for c in features if c not in input_X.columns]
+    if missing:
+        raise ValueError(f"Input is missing model features: {missing}")
+    records = np.empty(len(input_X), dtype=[(c, "<f4") for c in features])
+    for c in features:
+        records[c] = input_X[c].to_numpy(dtype=np.float32)
+    buffer = io.BytesIO()
+    np.save(buffer, records, allow_pickle=False)
+    return buffer.getvalue()
+
+def invoke_endpoint(input_X: pd.DataFrame, content_type: str = ENDPOINT_CONTENT_TYPE) -> list:
+    n_rows = len(input_X)
+    if content_type == "application/x-npy":
+        body_bytes = to_npy_payload(input_X)
+    else:
+        input_X = input_X[active_model_features()]
+        if n_rows == 1:
+            input_X = pd.concat([input_X, input_X], ignore_index=True)
+        body_bytes = input_X.to_csv(index=False, header=False).encode("utf-8")
+    with span("predict.invoke_endpoint", rows = n_rows, bytes = len(body_bytes)):
+        resp = get_runtime().invoke_endpoint(
+            EndpointName=ENDPOINT_NAME,
+            ContentType=content_type,
+            Accept="application/json",
+            Body=body_bytes
+        )
+        pred = json.loads(resp["Body"].read().decode("utf-8"))
+    return pred[:n_rows]
+
+def get_endpoint_model_version() -> str | None:
+    """
+    Models behind the endpoint's current config, re-checked at most every
+    MODEL_CHECK_INTERVAL seconds. None while the endpoint is updating or
+    cannot be described, so nothing is cached against an unknown model.
+    """
+    now = time.monotonic()
+    if _endpoint_model["checked_at"] is not None and now - _endpoint_model["checked_at"] < MODEL_CHECK_INTERVAL:
+        return _endpoint_model["version"]
+    version = None
+    try:
+        sagemaker = get_client("sagemaker", region_name="us-east-2")
+        endpoint = sagemaker.describe_endpoint(EndpointName=ENDPOINT_NAME)
+        if endpoint["EndpointStatus"] == "InService":
+            config = sagemaker.describe_endpoint_config(EndpointConfigName=endpoint["EndpointConfigName"])
+            version = "+".join(sorted(v["ModelName"] for v in config["ProductionVariants"]))
+    except Exception as e:
+        print(f"Could not describe endpoint {ENDPOINT_NAME}: {e}")
+    _endpoint_model["version"] = version
+    _endpoint_model["checked_at"] = now
+    return version
+
+def get_serving_model_version(mode: str = PREDICTION_MODE) -> str | None:
+    """
+    Version of the model that answers in this mode: the approved artifact's ETag
+    in local mode, the endpoint's deployed model otherwise (and when no artifact
+    is approved, since local mode then falls back to the endpoint).
+    """
+    if mode == "local":
+        etag = get_model_version()
+        if etag is not None:
+            return f"local-{etag}"
+    return get_endpoint_model_version()
+
+def chunk_rows(input_X: pd.DataFrame, max_bytes: int = MAX_PAYLOAD_BYTES, max_rows: int = MAX_ROWS_PER_REQUEST) -> list[pd.DataFrame]:
+    """
+    Splits input_X into consecutive chunks whose payload stays under max_bytes.
+    """
+    if input_X.empty:
+        return []
+    # only the active model features are serialized
+    features = active_model_features()
+    if ENDPOINT_CONTENT_TYPE == "application/x-npy":
+        bytes_per_row = 4 * len(features)
+    else:
+        # estimate the CSV row size from a serialized sample
+        sample = input_X[features].head(100)
+        sample_bytes = len(sample.to_csv(index=False, header=False).encode("utf-8"))
+        bytes_per_row = 1.25 * sample_bytes / len(sample)
+    rows_per_chunk = max(1, min(max_rows, int(max_bytes // bytes_per_row)))
+    return [input_X.iloc[i:i + rows_per_chunk] for i in range(0, len(input_X), rows_per_chunk)]
+
+def make_batch_prediction(input_X: pd.DataFrame, mode: str = PREDICTION_MODE, max_workers: int = MAX_WORKERS) -> list:
+    """
+    Predicts every row of input_X. Endpoint requests are sent concurrently
+    and the predictions are returned in the same order as the input rows.
+    """
+    if mode == "local":
+        try:
+            with span("predict.local", rows = len(input_X)):
+                return predict_local(input_X)
+        except Exception as e:
+            print(f"Local prediction failed, falling back to endpoint: {e}")
+    chunks = chunk_rows(input_X)
+    if len(chunks) <= 1:
+        return [p for chunk in chunks for p in invoke_endpoint(chunk)]
+    print(f"Sending {len(input_X)} rows in {len(chunks)} requests")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        results = executor.map(invoke_endpoint, chunks)
+    return [p for chunk_preds in results for p in chunk_preds]
+
+def make_prediction(input_X: pd.DataFrame, mode: str = PREDICTION_MODE) -> float:
+    return make_batch_prediction(input_X, mode)[0]
+
+def _model_input(weather_df: pd.DataFrame) -> pd.DataFrame:
+    drop_cols = [c for c in ["date", "weather_code", "latitude", "longitude", "location", "day"] if c in weather_df.columns]
+    return weather_df.drop(columns=drop_cols)
+
+def get_weather_codes(start: str, end: str, locations: list[dict] | None = None, mode: str = PREDICTION_MODE) -> pd.DataFrame:
+    """
+    Scores every date between start and end for each location.
+    Locations are dicts with 'lat', 'long' and optionally 'id' and 'timezone'.
+    Dates the serving model already scored come from the prediction cache; the
+    rest are cached and logged per location like the single-date predictions,
+    so the monitors see them too.
+    """
+    s3_ds = get_s3_store(BUCKET_NAME)
+    cache = PredictionCache(s3_ds)
+    model_version = get_serving_model_version(mode)
+    api = get_open_meteo_api()
+    frames = []
+    for loc in resolve_locations(locations):
+        # process per location so NaNs are filled from that location's medians
+        weather_df = fetch_data_from_api(
+            start, end, api,
+            lat = loc["lat"],
+            long = loc["long"],
+            timezone = loc["timezone"]
+        )
+        weather_df = process_dataframe(weather_df)
+        weather_df["latitude"] = loc["lat"]
+        weather_df["longitude"] = loc["long"]
+        weather_df["location"] = loc["id"]
+        # the location's calendar day, the key of its cache entries
+        weather_df["day"] = pd.to_datetime(weather_df["date"], utc=True).dt.tz_convert(loc["timezone"]).dt.strftime("%Y-%m-%d")
+        cached = cache.get_many(weather_df["day"].tolist(), loc["id"], model_version)
+        weather_df["prediction"] = weather_df["day"].map(cached)
+        frames.append(weather_df)
+    weather_df = pd.concat(frames, ignore_index=True)
+
+    new = weather_df["prediction"].isna()
+    print(f"{int((~new).sum())} of {len(weather_df)} predictions served from the cache")
+    if new.any():
+        weather_df.loc[new, "prediction"] = make_batch_prediction(_model_input(weather_df[new]), mode)
+        scored = weather_df[new]
+        for loc_id, loc_df in scored.groupby("location", sort=False):
+            cache.put_many(dict(zip(loc_df["day"], loc_df["prediction"])), loc_id, model_version)
+        log_df = scored.drop(columns=["latitude", "longitude", "day"])
+        log_df["model_version"] = model_version
+        append_rows(s3_ds, log_df, LOG_KEY)
+    return weather_df.drop(columns=["day"])
+
+def get_weather_code(mode: str = PREDICTION_MODE):
     
     # get today's date
     end = pd.Timestamp.now().strftime("%Y-%m-%d")
     start = end
+
+    # return early if today was already scored with the current model
+    s3_ds = get_s3_store(BUCKET_NAME)
+    cache = PredictionCache(s3_ds)
+    location = DEFAULT_LOCATION["id"]
+    model_version = get_serving_model_version(mode)
+    cached = cache.get(end, location, model_version)
+    if cached is not None:
+        print(f"Using cached prediction for {end} at {location}")
+        return cached
     
     # fetch data from api and process
     weather_df = fetch_data_from_api(start, end)
     weather_df = process_dataframe(weather_df)
-    drop_cols = [c for c in ["date", "weather_code"] if c in weather_df.columns]
-    X = weather_df.drop(columns=drop_cols)
+    X = _model_input(weather_df)
     
     # make prediction
-    weather_code = make_prediction(X)
-    # add prediction to weather_df
+    weather_code = make_prediction(X, mode)
+    # add prediction to weather_df, with the location and model the log rows are keyed by
     weather_df["prediction"] = weather_code
+    weather_df["location"] = location
+    weather_df["model_version"] = model_version
 
-    # log prediction to s3
-    s3_ds = S3DataStore(bucket_name="weather-model-478492276227")
-    existing_log = s3_ds.load_df("logs/daily_predictions.csv")
-    if existing_log is None:
-        existing_log = pd.DataFrame()
-    existing_log = pd.concat([existing_log, weather_df], ignore_index=True)
-    s3_ds.save_df(existing_log, "logs/daily_predictions.csv")
+    # log prediction to s3, appended so the monitors' byte cursors stay valid
+    append_rows(s3_ds, weather_df, LOG_KEY)
+    cache.put(end, location, model_version, weather_code)
     
     return weather_code
 
+@traced_handler("predict-weather-code")
 def lambda_handler(event, context):
-    weather_code = get_weather_code()
+    if "start_date" in event:
+        # batch re-scoring of a date range, optionally over several locations
+        weather_df = get_weather_codes(
+            start = event["start_date"],
+            end = event.get("end_date", event["start_date"]),
+            locations = event.get("locations"),
+            mode = event.get("prediction_mode", PREDICTION_MODE)
+        )
+        weather_df["date"] = pd.to_datetime(weather_df["date"]).dt.strftime("%Y-%m-%d")
+        return {
+            'statusCode': 200,
+            'predictions': weather_df[["date", "latitude", "longitude", "prediction"]].to_dict(orient="records")
+        }
+    weather_code = get_weather_code(event.get("prediction_mode", PREDICTION_MODE))
     return {
         'statusCode': 200,
         'weather': f"The weather code for today is : {weather_code}"
@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from src.ds import S3DataStore
+
+CACHE_PREFIX = "cache/predictions"
+# concurrent S3 requests of get_many / put_many
+CACHE_WORKERS = int(os.getenv("PREDICTION_CACHE_WORKERS", "16"))
+
+# In-memory tier, survives across warm invocations of the same container
+_memory = {"version": None, "entries": {}}
+
+class PredictionCache:
+    """
+    Two-tier cache of predictions keyed by (date, location, model version).
+    Entries live in process memory and in S3 under a per-version prefix,
+    so deploying a new model (a new version from predict.get_serving_model_version)
+    never serves stale results.
+    """
+
+    def __init__(self, s3_ds: S3DataStore, prefix: str = CACHE_PREFIX):
+        self.s3_ds = s3_ds
+        self.prefix = prefix.rstrip("/")
+
+    def _key(self, date: str, location: str, version: str) -> str:
+        return f"{self.prefix}/version={version}/location={location}/date={date}.json"
+
+    def _use_version(self, version: str) -> None:
+        if _memory["version"] != version:
+            if _memory["version"] is not None:
+                print(f"Model version changed to {version}, invalidating prediction cache")
+                self.invalidate(keep_version=version)
+            _memory["version"] = version
+            _memory["entries"] = {}
+
+    def get(self, date: str, location: str, version: str | None):
+        if version is None:
+            return None
+        self._use_version(version)
+        if (date, location) in _memory["entries"]:
+            return _memory["entries"][(date, location)]
+        cached = self.s3_ds.load_json(self._key(date, location, version))
+        if cached is None:
+            return None
+        _memory["entries"][(date, location)] = cached["prediction"]
+        return cached["prediction"]
+
+    def put(self, date: str, location: str, version: str | None, prediction) -> None:
+        if version is None:
+            return
+        self._use_version(version)
+        _memory["entries"][(date, location)] = prediction
+        self.s3_ds.save_json(
+            self._key(date, location, version),
+            {"date": date, "location": location, "model_version": version, "prediction": prediction}
+        )
+
+    def get_many(self, dates: list[str], location: str, version: str | None) -> dict:
+        """
+        {date: prediction} of the dates that are cached for location and version.
+        Entries missing from memory are looked up in S3 concurrently.
+        """
+        if version is None:
+            return {}
+        self._use_version(version)
+        found = {d: _memory["entries"][(d, location)] for d in dates if (d, location) in _memory["entries"]}
+        missing = [d for d in dates if d not in found]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(CACHE_WORKERS, len(missing))) as executor:
+                loaded = executor.map(lambda d: self.s3_ds.load_json(self._key(d, location, version)), missing)
+                for date, cached in zip(missing, loaded):
+                    if cached is not None:
+                        _memory["entries"][(date, location)] = cached["prediction"]
+                        found[date] = cached["prediction"]
+        return found
+
+    def put_many(self, predictions: dict, location: str, version: str | None) -> None:
+        if version is None or not predictions:
+            return
+        self._use_version(version)
+        with ThreadPoolExecutor(max_workers=min(CACHE_WORKERS, len(predictions))) as executor:
+            list(executor.map(lambda item: self.put(item[0], location, version, item[1]), predictions.items()))
+
+    def invalidate(self, keep_version: str | None = None) -> None:
+        """
+        Deletes S3 entries of every model version except keep_version.
+        """
+        keep = f"{self.prefix}/version={keep_version}/" if keep_version else None
+        stale = [k for k in self.s3_ds.list_keys(f"{self.prefix}/") if keep is None or not k.startswith(keep)]
+        if stale:
+            self.s3_ds.delete_keys(stale)
+        if keep_version is None:
+            _memory["version"] = None
+            _memory["entries"] = {}
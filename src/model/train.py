@@ -1,27 +1,24 @@
-import os
-import json
-import boto3
-import joblib
-import subprocess, sys
-subprocess.check_call([sys.executable, "-m", "pip", "install", "mlflow"])
-subprocess.check_call([sys.executable, "-m", "pip", "install", "lakefs"])
-
-import mlflow
-import lakefs
-import pandas as pd
-from lakefs.client import Client
-from lakefs.repository import Repository
-from mlflow.models.signature import infer_signature
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, 
-    f1_score, confusion_matrix, classification_report,
-    matthews_corrcoef
-)
+import bootstrap
+# installs the locked packages the image lacks from the wheels vendored in source.tar.gz
+bootstrap.ensure_dependencies()
 
-subprocess.check_call([sys.executable, "-m", "pip", "install", "mlflow"])
-subprocess.check_call([sys.executable, "-m", "pip", "install", "lakefs"])
+with bootstrap.phase("imports"):
+    import os
+    import json
+    import joblib
+    import lakefs
+    import memory
+    import numpy as np
+    import pandas as pd
+    from functools import partial
+    from lakefs.client import Client
+    from lakefs.repository import Repository
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split, GridSearchCV
+    from clients import get_client
+    from partitions import DEFAULT_LOCATION, location_prefix
+    from evaluate import compute_metrics, month_and_season_slices, evaluate_folds
+    from feature_selection import select_features
 
 # lakeFS configuration
 lakefs_endpoint = os.environ.get("LAKEFS_ENDPOINT") + "/api/v1"
@@ -34,35 +31,58 @@ clt = Client(
 )
 
 # S3 setup for lakeFS
-s3 = boto3.client(
+s3 = get_client(
     "s3",
     endpoint_url=lakefs_endpoint,
-    aws_access_key_id=access_key,
-    aws_secret_access_key=secret_key
+    access_key=access_key,
+    secret_key=secret_key
 )
 
 # Directories for model and output
 model_dir = os.environ.get("SM_MODEL_DIR", "/opt/ml/model")
 output_dir = os.environ.get("SM_OUTPUT_DATA_DIR", "/opt/ml/output/data")
 
-def load_data(repo: Repository, branch: str = "main"): 
+# comma separated location ids whose partitions are trained on
+TRAINING_LOCATIONS = os.environ.get("TRAINING_LOCATIONS", DEFAULT_LOCATION["id"]).split(",")
+TRAINING_YEARS = [2022, 2023, 2024]
+
+def load_data(repo: Repository, branch: str = "main", locations: list[str] = TRAINING_LOCATIONS, years: list[int] = TRAINING_YEARS): 
     ref = repo.ref(branch)
-    # list & read CSVs (prefix filtering)
-    prefixes = ["data/processed/year=2022", "data/processed/year=2023", "data/processed/year=2024"]
+    # list & read CSVs (prefix filtering), only the partitions of the requested locations and years
+    prefixes = [f"{location_prefix('processed', loc_id)}/year={year}/" for loc_id in locations for year in years]
     dfs = []
+    # complete columns of every partition, to name the ones with gaps
+    complete = {}
     for p in prefixes:
         for obj in ref.objects(prefix=p):  # iterator of objects
             if obj.path.endswith(".csv"):
                 with ref.object(obj.path).reader(mode="r") as f:
                     df = pd.read_csv(f)
                     dfs.append(df)
+                    complete[obj.path] = set(df.columns[df.notnull().all()])
     processed_data = pd.concat(dfs, ignore_index=True)
+    del dfs
+    # partitions extracted while an older build pruned raw columns lack them; training
+    # on what is left would silently shrink the features, so they are re-extracted instead
+    gaps = {path: sorted(set(processed_data.columns) - cols) for path, cols in complete.items()}
+    gaps = {path: cols for path, cols in gaps.items() if cols}
+    if gaps:
+        details = "; ".join(f"{path}: {', '.join(cols)}" for path, cols in gaps.items())
+        raise ValueError(
+            f"{len(gaps)} partitions have missing values, re-extract them with "
+            f"scripts/reextract_partitions.py before training: {details}"
+        )
+    memory.checkpoint("load_data.loaded", processed_data)
+    # keep rows in time order for the time-ordered evaluation folds
+    processed_data["date"] = pd.to_datetime(processed_data["date"])
+    processed_data = processed_data.sort_values("date", kind="stable", ignore_index=True)
     processed_data = processed_data.drop(columns=["date"])
     # Separate data
     target_name = 'weather_code'
-    X = processed_data.drop(columns=[target_name]).values
+    X = processed_data.drop(columns=[target_name])
     y = processed_data[target_name].values
-    return X, y
+    memory.checkpoint("load_data.features", X)
+    return X.values, y, list(X.columns)
 
 def fit_model(X_train, y_train, params, grid_search=False):
     start_model = RandomForestClassifier(**params)
@@ -89,19 +109,47 @@ def fit_model(X_train, y_train, params, grid_search=False):
         best_model.fit(X_train, y_train)
     return best_model
 
-# Useful values for classification
+def publish_feature_list(feature_list: dict):
+    """
+    Writes the selected feature list next to the model and to S3 as
+    features/<training job>.json; validate_model promotes it with the model.
+    """
+    for directory in (model_dir, output_dir):
+        with open(os.path.join(directory, "feature_list.json"), "w") as f:
+            json.dump(feature_list, f)
+    job_name = os.environ.get("TRAINING_JOB_NAME", feature_list["version"])
+    key = f"features/{job_name}.json"
+    get_client("s3").put_object(
+        Bucket=os.environ.get("FEATURE_LIST_BUCKET", "weather-model-478492276227"),
+        Key=key,
+        Body=json.dumps(feature_list)
+    )
+    print(f"Published feature list to {key}")
+
+def publish_metrics(metrics: dict):
+    """
+    Writes the metrics next to the SageMaker output archive so validate_model
+    can read them without downloading output.tar.gz.
+    """
+    job_name = os.environ.get("TRAINING_JOB_NAME")
+    if not job_name:
+        print("TRAINING_JOB_NAME not set, skipping metrics sidecar")
+        return
+    key = f"{os.environ.get('MODELS_PREFIX', 'models')}/{job_name}/output/metrics.json"
+    get_client("s3").put_object(
+        Bucket=os.environ.get("MODEL_BUCKET", "weather-model-478492276227"),
+        Key=key,
+        Body=json.dumps(metrics)
+    )
+    print(f"Published metrics to {key}")
+
+# Useful values for classification, all derived from one confusion matrix
 def calculate_performance_metrics(y_test, y_pred):
-    return {
-        "accuracy": accuracy_score(y_test, y_pred),
-        "precision": precision_score(y_test, y_pred, average='weighted'),
-        "recall": recall_score(y_test, y_pred, average='weighted'),
-        "f1_score": f1_score(y_test, y_pred, average='weighted'),
-        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
-        "mcc": matthews_corrcoef(y_test, y_pred),
-        "classification_report": classification_report(y_test, y_pred, output_dict=True)
-    }
+    return compute_metrics(y_test, y_pred)
     
 #TODO: Set proper tracking arn and expirement tag
+# mlflow is not part of the locked training dependencies, add it to requirements.txt
+# and import mlflow / infer_signature here when tracking is re-enabled
 # mlflow.set_tracking_uri("arn:aws:sagemaker:us-east-2:478492276227:mlflow-tracking-server/TrackingServerV1")
 # mlflow.set_experiment("some-experiment")
 
@@ -126,21 +174,63 @@ if __name__ == "__main__":
     commit_id = branch.get_commit().id
 
     # load data
-    X, y = load_data(repo, branch_name)
-    # Get train and test sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    with bootstrap.phase("load_data"):
+        X, y, feature_names = load_data(repo, branch_name)
+    # startup cost up to the first training batch
+    bootstrap.report(output_dir)
+    memory.checkpoint("load_data.arrays")
+    months = X[:, feature_names.index("month")]
+    # Get train and test sets, training rows back in time order for the validation split
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    train_idx = np.sort(train_idx)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+    months_test = months[test_idx]
+    # Optionally shrink the inputs to a pruned, versioned feature list, scored on
+    # a validation block of the training rows so the holdout only sees the final model
+    feature_list = None
+    if os.environ.get("FEATURE_SELECTION", "0") == "1":
+        feature_list = select_features(
+            X_train, y_train, feature_names, params,
+            corr_threshold=float(os.environ.get("FEATURE_CORR_THRESHOLD", "0.95")),
+            min_importance=float(os.environ.get("FEATURE_MIN_IMPORTANCE", "0.0")),
+            validation_fraction=float(os.environ.get("FEATURE_VALIDATION_FRACTION", "0.2"))
+        )
+        keep = [feature_names.index(name) for name in feature_list["features"]]
+        X, X_train, X_test = X[:, keep], X_train[:, keep], X_test[:, keep]
+        feature_names = feature_list["features"]
     # Fit model
     model = fit_model(X_train, y_train, params, grid_search=False)
     # Test predictions
     y_pred = model.predict(X_test)
     # Evaluate model
     metrics_rf = calculate_performance_metrics(y_test, y_pred)
+    evaluation = {
+        "holdout": metrics_rf,
+        "holdout_slices": month_and_season_slices(y_test, y_pred, months_test),
+        # one single-threaded model per fold, folds run in parallel processes
+        "time_folds": evaluate_folds(
+            partial(RandomForestClassifier, **{**params, "n_jobs": 1, "verbose": 0}),
+            X, y, months,
+            n_splits=int(os.environ.get("EVAL_N_SPLITS", "5"))
+        )
+    }
     
     # Save model and accuracy
     joblib.dump(model, os.path.join(model_dir, "model.pkl"))
+    # feature order checked by inference.py against the request payload
+    with open(os.path.join(model_dir, "features.json"), "w") as f:
+        json.dump({"features": feature_names}, f)
     output_path = os.path.join(output_dir, "accuracy.json")
     with open(output_path, "w") as f:
         json.dump({"accuracy": metrics_rf["accuracy"]}, f)
+    with open(os.path.join(output_dir, "evaluation.json"), "w") as f:
+        json.dump(evaluation, f)
+    memory.checkpoint("trained")
+    with open(os.path.join(output_dir, "memory.json"), "w") as f:
+        json.dump(memory.summarize(), f)
+    publish_metrics({"accuracy": metrics_rf["accuracy"], "holdout": metrics_rf, "features": feature_names})
+    if feature_list is not None:
+        publish_feature_list(feature_list)
 
     # with mlflow.start_run():
     #     run_id = mlflow.active_run().info.run_id
@@ -1,23 +1,223 @@
+import sys
+sys.path.append("/opt")
+sys.path.append(".")
+
 import json
 import os
-import io
 import tarfile
-import boto3
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from src.ds.clients import get_client
+from src.shared.tracing import span, traced, traced_handler
 
 BUCKET = os.getenv("BUCKET", "weather-model-478492276227")
 MODELS_PREFIX = os.getenv("MODELS_PREFIX", "models")
 INNER_JSON = os.getenv("INNER_JSON", "accuracy.json")
+METRICS_JSON = os.getenv("METRICS_JSON", "metrics.json")
 DEFAULT_THRESHOLD = float(os.getenv("THRESHOLD", "0.8"))
+FEATURES_PREFIX = os.getenv("FEATURES_PREFIX", "features")
+METRICS_INDEX_KEY = f"{MODELS_PREFIX}/metrics_index.json"
+# the artifact local prediction mode serves, see local_model.MODEL_KEY
+APPROVED_DIR = "approved"
+APPROVED_MODEL_KEY = os.getenv("MODEL_KEY", f"{MODELS_PREFIX}/{APPROVED_DIR}/model.tar.gz")
+MAX_WORKERS = int(os.getenv("METRICS_WORKERS", "16"))
+
+s3 = get_client("s3")
+
+def _read_sidecar(model_name: str) -> dict | None:
+    key = f"{MODELS_PREFIX}/{model_name}/output/{METRICS_JSON}"
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=key)
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(obj["Body"].read().decode("utf-8"))
+
+def _stream_member_json(key: str, target_name: str) -> dict | None:
+    """
+    Decodes the archive while it downloads and stops at the first member named
+    target_name, so memory use does not depend on the archive size.
+    """
+    with span("validate_model.stream_archive", key = key):
+        body = s3.get_object(Bucket=BUCKET, Key=key)["Body"]
+        try:
+            with tarfile.open(fileobj=body, mode="r|gz") as tar:
+                for m in tar:
+                    if m.isfile() and m.name.rsplit("/", 1)[-1] == target_name:
+                        return json.loads(tar.extractfile(m).read().decode("utf-8"))
+            return None
+        finally:
+            body.close()
+
+@traced()
+def load_model_metrics(model_name: str, inner_json: str = INNER_JSON) -> dict:
+    """
+    Metrics of a training job: the metrics.json sidecar written by train.py,
+    or inner_json streamed out of output.tar.gz for jobs trained before it existed.
+    """
+    if inner_json == INNER_JSON:
+        metrics = _read_sidecar(model_name)
+        if metrics is not None:
+            return metrics
+    key = f"{MODELS_PREFIX}/{model_name}/output/output.tar.gz"
+    metrics = _stream_member_json(key, inner_json)
+    if metrics is None:
+        raise FileNotFoundError(f"{inner_json} not found in s3://{BUCKET}/{key}")
+    return metrics
+
+def promote_feature_list(model_name: str) -> str | None:
+    """
+    Makes the feature list the deployed model was trained with the one the
+    prediction and drift functions use, or removes the promoted list when the
+    model was trained on every feature. Run once the endpoint serves the model,
+    so the payload never changes ahead of the deployment.
+    """
+    source = f"{FEATURES_PREFIX}/{model_name}.json"
+    current = f"{FEATURES_PREFIX}/current.json"
+    try:
+        s3.head_object(Bucket=BUCKET, Key=source)
+    except s3.exceptions.ClientError:
+        s3.delete_object(Bucket=BUCKET, Key=current)
+        print(f"{model_name} has no feature list, removed {current}")
+        return None
+    s3.copy_object(
+        Bucket=BUCKET,
+        Key=current,
+        CopySource={"Bucket": BUCKET, "Key": source}
+    )
+    print(f"Promoted feature list {source}")
+    return source
+
+def _promote_artifact(model_name: str):
+    """Copies the model archive of a passing training job to APPROVED_MODEL_KEY."""
+    source = f"{MODELS_PREFIX}/{model_name}/output/model.tar.gz"
+    s3.copy_object(
+        Bucket=BUCKET,
+        Key=APPROVED_MODEL_KEY,
+        CopySource={"Bucket": BUCKET, "Key": source}
+    )
+    print(f"Promoted {source} to {APPROVED_MODEL_KEY}")
+
+def load_metrics_index() -> dict:
+    """
+    {"production": model name or None, "models": {model name: scalar metrics}},
+    so promotion decisions never re-read a training job's outputs.
+    """
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=METRICS_INDEX_KEY)
+    except s3.exceptions.NoSuchKey:
+        return {"production": None, "models": {}}
+    return json.loads(obj["Body"].read().decode("utf-8"))
+
+def save_metrics_index(index: dict) -> None:
+    s3.put_object(Bucket=BUCKET, Key=METRICS_INDEX_KEY, Body=json.dumps(index))
+
+def _index_entry(metrics: dict) -> dict:
+    entry = {k: v for k, v in metrics.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    entry["recorded_at"] = datetime.now(timezone.utc).isoformat()
+    return entry
 
-s3 = boto3.client("s3")
+def list_candidates(prefix: str) -> list[str]:
+    """Training jobs whose output folder under MODELS_PREFIX starts with prefix."""
+    paginator = s3.get_paginator("list_objects_v2")
+    names = []
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=f"{MODELS_PREFIX}/{prefix}", Delimiter="/"):
+        for common in page.get("CommonPrefixes", []):
+            name = common["Prefix"][len(MODELS_PREFIX) + 1:].rstrip("/")
+            # the approved copy is not a training job
+            if name != APPROVED_DIR:
+                names.append(name)
+    return names
 
-def _find_member_by_name(tar: tarfile.TarFile, target_name: str):
-    for m in tar.getmembers():
-        if m.isfile() and m.name.rsplit("/", 1)[-1] == target_name:
-            return m
-    return None
+def index_candidates(index: dict, candidates: list[str], inner_json: str = INNER_JSON) -> dict[str, str]:
+    """
+    Adds the metrics of candidates missing from the index, fetched concurrently.
+    Returns the candidates whose metrics could not be read, with the reason.
+    """
+    missing = [name for name in candidates if name not in index["models"]]
+    errors = {}
+    if not missing:
+        return errors
 
+    def fetch(name):
+        try:
+            return name, load_model_metrics(name, inner_json), None
+        except Exception as e:
+            return name, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(missing))) as executor:
+        for name, metrics, error in executor.map(fetch, missing):
+            if error is not None or "accuracy" not in metrics:
+                errors[name] = error or "Missing 'accuracy' in JSON"
+            else:
+                index["models"][name] = _index_entry(metrics)
+    return errors
+
+def _production_accuracy(index: dict) -> tuple[str | None, float | None]:
+    production = index["production"]
+    return production, index["models"].get(production, {}).get("accuracy") if production else None
+
+def _passes(index: dict, model_name: str, accuracy: float, threshold: float, min_improvement: float) -> bool:
+    """
+    A model passes if it clears the threshold and beats the production model by
+    at least min_improvement (re-validating the production model itself only needs the threshold).
+    """
+    production, current = _production_accuracy(index)
+    return accuracy > threshold and (
+        current is None or model_name == production
+        or accuracy >= current + min_improvement
+    )
+
+@traced()
+def compare_candidates(event: dict) -> dict:
+    """
+    Picks the most accurate candidate and passes it only if it clears the threshold
+    and beats the production model by at least min_improvement.
+    """
+    threshold = float(event.get("threshold", DEFAULT_THRESHOLD))
+    min_improvement = float(event.get("min_improvement", 0.0))
+    candidates = event.get("Candidates") or list_candidates(event["CandidatePrefix"])
+    if not candidates:
+        return {"validation_result": "Failed", "error": "No candidate models found"}
+
+    index = load_metrics_index()
+    errors = index_candidates(index, candidates, event.get("inner_json", INNER_JSON))
+    scored = {name: index["models"][name]["accuracy"] for name in candidates if name in index["models"]}
+    if not scored:
+        save_metrics_index(index)
+        return {"validation_result": "Failed", "error": "No candidate has metrics", "errors": errors}
+
+    best = max(scored, key=scored.get)
+    production, current = _production_accuracy(index)
+    passed = _passes(index, best, scored[best], threshold, min_improvement)
+    if passed:
+        _promote_artifact(best)
+        index["production"] = best
+    save_metrics_index(index)
+    return {
+        "validation_result": "Passed" if passed else "Failed",
+        "ModelName": best,
+        "accuracy": scored[best],
+        "production": {"ModelName": production, "accuracy": current},
+        "candidates": scored,
+        "errors": errors
+    }
+
+@traced_handler("model-accuracy")
 def lambda_handler(event, context):
+    # called again by the state machine after the endpoint update with {"Deployed": true, "ModelName": ...}
+    if event.get("Deployed"):
+        try:
+            source = promote_feature_list(event["ModelName"])
+            return {"statusCode": 200, "ModelName": event["ModelName"], "feature_list": source}
+        except Exception as e:
+            return {"statusCode": 500, "error": f"Error promoting the feature list: {e}"}
+
+    if event.get("Candidates") or "CandidatePrefix" in event:
+        try:
+            return compare_candidates(event)
+        except Exception as e:
+            return {"validation_result": "Failed", "error": f"Error comparing candidates: {e}"}
+
     model_name = event.get("ModelName")
     threshold = float(event.get("threshold", DEFAULT_THRESHOLD))
     inner_json = event.get("inner_json", INNER_JSON)
@@ -26,32 +226,30 @@ def lambda_handler(event, context):
         # Always include validation_result so the Choice state works
         return {"validation_result": "Failed", "error": "Missing ModelName"}
 
-    key = f"{MODELS_PREFIX}/{model_name}/output/output.tar.gz"
-
     try:
-        obj = s3.get_object(Bucket=BUCKET, Key=key)
-        tar_bytes = obj["Body"].read()
-
-        with tarfile.open(fileobj=io.BytesIO(tar_bytes), mode="r:*") as tar:
-            member = _find_member_by_name(tar, inner_json)
-            if not member:
-                return {
-                    "validation_result": "Failed",
-                    "error": f"{inner_json} not found in s3://{BUCKET}/{key}"
-                }
-            with tar.extractfile(member) as f:
-                data = json.loads(f.read().decode("utf-8"))
-
+        data = load_model_metrics(model_name, inner_json)
         if "accuracy" not in data:
             return {"validation_result": "Failed", "error": "Missing 'accuracy' in JSON"}
 
         accuracy = float(data["accuracy"])
+        # a single model only has to clear the threshold, use Candidates or
+        # CandidatePrefix to also compare it against production
         result = "Passed" if accuracy > threshold else "Failed"
+        if result == "Passed":
+            _promote_artifact(model_name)
+        try:
+            index = load_metrics_index()
+            index["models"][model_name] = _index_entry(data)
+            if result == "Passed":
+                index["production"] = model_name
+            save_metrics_index(index)
+        except Exception as e:
+            print(f"Could not update {METRICS_INDEX_KEY}: {e}")
         return {"validation_result": result, "accuracy": accuracy}
 
     except Exception as e:
         # Keep a consistent shape for Step Functions
         return {
             "validation_result": "Failed",
-            "error": f"Error processing s3://{BUCKET}/{key}: {e}"
+            "error": f"Error reading metrics of {model_name} from s3://{BUCKET}/{MODELS_PREFIX}: {e}"
         }
\ No newline at end of file
@@ -1,28 +1,61 @@
+import math
 import pandas as pd
 import numpy as np
-from src.ds import LakeFSDataStore, S3DataStore
+from fractions import Fraction
+from src.ds import LakeFSDataStore, get_lakefs_store, get_s3_store
 from src.data.utils import get_data_from_main
+from src.monitoring.reference_profile import load_reference_profile, profile_to_arrays, build_reference_profile
+from src.monitoring.drift_monitor import StreamingDriftMonitor
+from src.monitoring.drift_history import DriftHistory
+from src.monitoring.drift_metrics import histogram_drift_metrics, chi_square_predictions, code_counts
+from src.shared.feature_list import active_model_features
+from src.shared.tracing import traced, traced_handler
+from src.shared.memory import checkpoint
 
-def get_reference_dataframe() -> pd.DataFrame:
-    """
-    Fetches the reference dataset from LakeFS and returns it as a pandas DataFrame.
-    """
-    lakefs_ds = LakeFSDataStore(
+def _get_lakefs_ds() -> LakeFSDataStore:
+    return get_lakefs_store(
         repo_name = "weather-data",
         endpoint = "http://18.222.212.217:8000"
     )
+
+@traced()
+def get_reference_dataframe(lakefs_ds: LakeFSDataStore | None = None) -> pd.DataFrame:
+    """
+    Fetches the reference dataset from LakeFS and returns it as a pandas DataFrame.
+    """
+    if lakefs_ds is None:
+        lakefs_ds = _get_lakefs_ds()
     end_date = pd.Timestamp(lakefs_ds.load_json(key = "data/processed/manifest.json")["last_updated_date"])
-    start_date = end_date - pd.Timedelta(years = 2)
+    start_date = end_date - pd.DateOffset(years = 2)
     df = get_data_from_main(
         lakefs_ds = lakefs_ds,
         type = "processed",
         start_date = start_date,
         end_date = end_date
     )
+    checkpoint("get_reference_dataframe", df)
     return df
 
+def get_reference(lakefs_ds: LakeFSDataStore | None = None) -> dict:
+    """
+    Returns the precomputed reference profile from main or, when no profile has
+    been built yet, an exact profile of the reference DataFrame.
+    """
+    if lakefs_ds is None:
+        lakefs_ds = _get_lakefs_ds()  # on main by default
+    profile = load_reference_profile(lakefs_ds)
+    if profile is not None:
+        print(f"Using reference profile version {profile['version']}")
+        return profile
+    print("No reference profile found, loading reference data")
+    df = get_reference_dataframe(lakefs_ds)
+    # converted to float arrays once here instead of by every drift test and window
+    columns = [c for c in active_drift_columns() + ["weather_code"] if c in df.columns]
+    return build_reference_profile(df[columns], version = "main", max_points = max(1, len(df)))
+
+@traced()
 def get_current_dataframe(n_rows = 14) -> pd.DataFrame:
-    s3_ds = S3DataStore(bucket_name = "weather-model-478492276227")
+    s3_ds = get_s3_store("weather-model-478492276227")
     df = s3_ds.load_df(key = "logs/daily_predictions.csv")
     return df.tail(n_rows)
 
@@ -57,8 +90,88 @@ def _ks_2samp_pvalue(d: float, n: int, m: int) -> float:
             break
     return float(min(max(p, 0.0), 1.0))
 
+# Exact p-values when the smaller sample is small and the path lattice stays cheap
+EXACT_KS_MAX_SMALL = 100
+EXACT_KS_MAX_CELLS = 100_000
+
+# (small, large) -> {h: p-value}, where h = D * n * m is always an integer
+_KS_EXACT_TABLES: dict[tuple[int, int], dict[int, float]] = {}
+
+def _ks_2samp_exact_pvalue(d: float, n: int, m: int) -> float:
+    """
+    Exact two-sided P(D >= d) under H0 by counting lattice paths that stay
+    strictly inside |i/a - j/b| < d. Results are memoized per (n, m).
+    """
+    a, b = min(n, m), max(n, m)
+    h = int(round(d * a * b))
+    table = _KS_EXACT_TABLES.setdefault((a, b), {})
+    if h in table:
+        return table[h]
+    if h <= 0:
+        table[h] = 1.0
+        return 1.0
+    # row i holds path counts to (i, j); inside points of a row form one interval of j
+    row = [0] * (b + 1)
+    for i in range(a + 1):
+        lo = max(0, (i * b - h) // a + 1)
+        hi = min(b, -((-(i * b + h)) // a) - 1)
+        new_row = [0] * (b + 1)
+        running = 1 if i == 0 else 0
+        for j in range(lo, hi + 1):
+            running += row[j]
+            new_row[j] = running
+        row = new_row
+    total = math.comb(a + b, a)
+    p = float(Fraction(total - row[b], total))
+    table[h] = p
+    return p
+
+def _use_exact_ks(n: int, m: int) -> bool:
+    return 0 < min(n, m) <= EXACT_KS_MAX_SMALL and (n + 1) * (m + 1) <= EXACT_KS_MAX_CELLS
+
+def _ks_2samp_matrix(ref: np.ndarray, cur: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    KS D statistics for every column of two 2-D arrays at once. NaNs are masked per column.
+    Returns (D, n_ref, n_cur); D is NaN where either side has no values.
+    """
+    ref_valid = ~np.isnan(ref)
+    cur_valid = ~np.isnan(cur)
+    n = ref_valid.sum(axis=0)
+    m = cur_valid.sum(axis=0)
+    values = np.concatenate([ref, cur], axis=0)
+    from_ref = np.concatenate([ref_valid, np.zeros(cur.shape, dtype=bool)], axis=0)
+    from_cur = np.concatenate([np.zeros(ref.shape, dtype=bool), cur_valid], axis=0)
+    order = np.argsort(values, axis=0, kind="stable")  # NaNs sort last
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    # integer counts keep the ECDFs exact, like the searchsorted version
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cdf_ref = np.cumsum(np.take_along_axis(from_ref, order, axis=0), axis=0) / n
+        cdf_cur = np.cumsum(np.take_along_axis(from_cur, order, axis=0), axis=0) / m
+    cdf_diff = cdf_ref - cdf_cur
+    # Only evaluate the ECDFs after the last of each run of tied values
+    run_end = np.ones(sorted_values.shape, dtype=bool)
+    run_end[:-1] = sorted_values[:-1] != sorted_values[1:]
+    D = np.max(np.where(run_end, np.abs(cdf_diff), 0.0), axis=0, initial=0.0)
+    D = np.where((n > 0) & (m > 0), D, np.nan)
+    return D, n, m
+
+def _ks_2samp_pvalue_vec(d: np.ndarray, n: np.ndarray, m: np.ndarray) -> np.ndarray:
+    """Vectorized _ks_2samp_pvalue, including its truncation of the series."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        en = n * m / (n + m)
+        lam = (np.sqrt(en) + 0.12 + 0.11 / np.sqrt(en)) * d
+    k = np.arange(1, 200)[:, None]
+    terms = np.exp(-2.0 * (k * k) * (lam * lam)[None, :])
+    # the scalar loop stops after the first term below 1e-10
+    previous = np.vstack([np.ones((1, terms.shape[1])), terms[:-1]])
+    signs = np.where(k % 2 == 1, 2.0, -2.0)
+    p = np.sum(np.where(previous >= 1e-10, signs * terms, 0.0), axis=0)
+    p = np.clip(p, 0.0, 1.0)
+    return np.where((n > 0) & (m > 0) & np.isfinite(d), p, np.nan)
+
+@traced()
 def detect_data_drift(
-    reference_df: pd.DataFrame,
+    reference_df: pd.DataFrame | dict,
     current_df: pd.DataFrame,
     alpha: float = 0.01,
     missing_threshold: float = 0.10,
@@ -66,51 +179,55 @@ def detect_data_drift(
 ) -> tuple[bool, dict]:
     """
     Per-feature two-sample KS test with Missingness drift check (Δ missing rate > missing_threshold)
+    All columns are tested at once on 2-D arrays. reference_df may also be a
+    reference profile (see reference_profile.py) covering current_df's columns.
     Returns: (overall_drift: bool, details: dict)
     """
-    assert list(reference_df.columns) == list(current_df.columns), "Column order/names must match."
+    cur = current_df.to_numpy(dtype=float)
+    if isinstance(reference_df, dict):
+        columns = list(current_df.columns)
+        ref, n_ref, miss_ref = profile_to_arrays(reference_df, columns)
+    else:
+        assert list(reference_df.columns) == list(current_df.columns), "Column order/names must match."
+        columns = list(reference_df.columns)
+        ref = reference_df.to_numpy(dtype=float)
+        n_ref = None
+        with np.errstate(invalid="ignore"):
+            miss_ref = np.isnan(ref).mean(axis=0)
 
-    details = {}
-    drifted = 0
-    total = len(reference_df.columns)
-
-    for col in reference_df.columns:
-        ref_col = reference_df[col]
-        cur_col = current_df[col]
-
-        # Missingness drift
-        miss_ref = ref_col.isna().mean()
-        miss_cur = cur_col.isna().mean()
-        miss_delta = abs(miss_ref - miss_cur)
-        miss_flag = miss_delta > missing_threshold
-        
-        # KS test for numeric drift
-        r_num = ref_col.astype(float)
-        c_num = cur_col.astype(float)
-        r = r_num.dropna().astype(float).values
-        c = c_num.dropna().astype(float).values
-        if len(r) == 0 or len(c) == 0:
-            D = np.nan
-            p = np.nan
-            ks_flag = False
-        else:
-            D = _ks_2samp_statistic(r, c)
-            p = _ks_2samp_pvalue(D, len(r), len(c))
-            ks_flag = (p < alpha)
+    # Missingness drift
+    with np.errstate(invalid="ignore"):
+        miss_delta = np.abs(miss_ref - np.isnan(cur).mean(axis=0))
+    miss_delta = np.nan_to_num(miss_delta)
+    miss_flags = miss_delta > missing_threshold
 
+    # KS test for numeric drift
+    D, n, m = _ks_2samp_matrix(ref, cur)
+    if n_ref is not None:
+        # a quantile sketch stands in for the full sample, keep its real size
+        n = np.where(n > 0, n_ref, 0)
+    p = _ks_2samp_pvalue_vec(D, n, m)
+    # the asymptotic formula is unreliable for small windows
+    for i in range(len(columns)):
+        if np.isfinite(D[i]) and _use_exact_ks(int(n[i]), int(m[i])):
+            p[i] = _ks_2samp_exact_pvalue(float(D[i]), int(n[i]), int(m[i]))
+    with np.errstate(invalid="ignore"):
+        ks_flags = p < alpha
+
+    details = {}
+    for i, col in enumerate(columns):
         details[col] = {
             "type": "numeric",
-            "D": None if not np.isfinite(D) else float(D),
-            "p_value": None if not np.isfinite(p) else float(p),
-            "missing_delta": float(miss_delta),
-            "missing_flag": miss_flag,
-            "ks_flag": ks_flag,
-            "drift": bool(ks_flag or miss_flag),
+            "D": None if not np.isfinite(D[i]) else float(D[i]),
+            "p_value": None if not np.isfinite(p[i]) else float(p[i]),
+            "missing_delta": float(miss_delta[i]),
+            "missing_flag": bool(miss_flags[i]),
+            "ks_flag": bool(ks_flags[i]),
+            "drift": bool(ks_flags[i] or miss_flags[i]),
         }
 
-        if details[col]["drift"]:
-            drifted += 1
-
+    drifted = int(np.sum(ks_flags | miss_flags))
+    total = len(columns)
     frac = drifted / max(1, total)
     overall = (frac >= require_frac) if require_frac > 0 else (drifted > 0)
     return overall, details
@@ -130,52 +247,150 @@ def craft_drift_alert(details: dict) -> str:
     return alert_message
     
 
+DRIFT_COLUMNS = [
+    'temperature_2m_max', 'temperature_2m_min',
+    'apparent_temperature_max', 'apparent_temperature_min',
+    'daylight_duration', 'sunshine_duration',
+    'rain_sum', 'showers_sum', 'snowfall_sum',
+    'precipitation_sum', 'precipitation_hours', 'wind_speed_10m_max',
+    'wind_gusts_10m_max', 'wind_direction_10m_dominant',
+    'shortwave_radiation_sum', 'et0_fao_evapotranspiration',
+    'apparent_temperature_mean', 'temperature_2m_mean', 'cape_mean',
+    'cape_max', 'cape_min', 'cloud_cover_mean', 'cloud_cover_max',
+    'cloud_cover_min', 'dew_point_2m_mean', 'dew_point_2m_max',
+    'dew_point_2m_min', 'et0_fao_evapotranspiration_sum',
+    'relative_humidity_2m_mean', 'relative_humidity_2m_max',
+    'relative_humidity_2m_min', 'snowfall_water_equivalent_sum',
+    'pressure_msl_mean', 'pressure_msl_max', 'pressure_msl_min',
+    'surface_pressure_mean', 'surface_pressure_max', 'surface_pressure_min',
+    'visibility_mean', 'visibility_min', 'visibility_max',
+    'winddirection_10m_dominant', 'wind_gusts_10m_mean',
+    'wind_speed_10m_mean', 'wind_gusts_10m_min', 'wind_speed_10m_min',
+    'wet_bulb_temperature_2m_mean', 'wet_bulb_temperature_2m_max',
+    'wet_bulb_temperature_2m_min', 'vapour_pressure_deficit_max',
+    'soil_moisture_0_to_10cm_mean'
+]
+
+def active_drift_columns() -> list[str]:
+    """DRIFT_COLUMNS still used by the promoted feature list."""
+    features = set(active_model_features())
+    return [c for c in DRIFT_COLUMNS if c in features]
+
+@traced()
+def compute_drift_metrics(reference: pd.DataFrame | dict, current_df: pd.DataFrame) -> dict:
+    """
+    Histogram metrics (PSI, Wasserstein, Jensen-Shannon) for the active drift columns and a
+    chi-square test of the logged predictions against reference weather codes.
+    """
+    columns = active_drift_columns()
+    if isinstance(reference, dict):
+        ref, _, _ = profile_to_arrays(reference, columns)
+        ref_codes = reference.get("weather_code_counts", {})
+    else:
+        ref = reference[columns].to_numpy(dtype=float)
+        ref_codes = code_counts(reference["weather_code"]) if "weather_code" in reference.columns else {}
+    metrics = {
+        "histogram": histogram_drift_metrics(ref, current_df[columns].to_numpy(dtype=float), columns)
+    }
+    if "prediction" in current_df.columns and ref_codes:
+        metrics["prediction_chi_square"] = chi_square_predictions(ref_codes, current_df["prediction"])
+    return metrics
+
+def craft_metrics_alert(metrics: dict) -> str:
+    lines = [
+        f"Feature '{col}': PSI = {res['psi']:.3f}, Wasserstein = {res['wasserstein']:.4f}, JS = {res['jensen_shannon']:.3f}."
+        for col, res in metrics["histogram"].items() if res["psi_flag"]
+    ]
+    chi = metrics.get("prediction_chi_square")
+    if chi and chi["drift"]:
+        lines.append(f"Predicted weather_code distribution shifted (chi2 = {chi['statistic']:.2f}, dof = {chi['dof']}, p-value = {chi['p_value']:.4f}).")
+    if not lines:
+        return ""
+    return "Histogram drift metrics:\n" + "\n".join(lines)
+
+def record_drift_run(history: DriftHistory | None, details: dict, overall: bool, window: int | None = None) -> None:
+    if history is None:
+        return
+    try:
+        run_id = history.record(details, overall, window)
+        print(f"Recorded drift run {run_id}")
+    except Exception as e:
+        print(f"Could not record drift history: {e}")
+
+def detect_window_drift(reference: pd.DataFrame | dict, windows: list[int], history: DriftHistory | None = None) -> dict:
+    """
+    Updates the streaming monitor with the newly logged rows and tests every window.
+    """
+    columns = active_drift_columns()
+    monitor = StreamingDriftMonitor(
+        s3_ds = get_s3_store("weather-model-478492276227"),
+        columns = columns + ["prediction"],
+        windows = windows
+    )
+    added = monitor.update()
+    print(f"Drift monitor received {added} new rows")
+    results = {}
+    for size in monitor.windows:
+        curr_df = monitor.window(size)
+        if curr_df.empty:
+            continue
+        overall_drift, details = detect_data_drift(
+            reference_df=reference if isinstance(reference, dict) else reference[columns],
+            current_df=curr_df[columns],
+            alpha=0.01,
+            missing_threshold=0.10,
+            require_frac=0.35
+        )
+        record_drift_run(history, details, overall_drift, window = size)
+        start, end = monitor.window_dates(size)
+        results[size] = {
+            "rows": len(curr_df),
+            "start": start,
+            "end": end,
+            "drift_detected": bool(overall_drift),
+            "message": craft_drift_alert(details) if overall_drift else "No data drift detected.",
+            "metrics": compute_drift_metrics(reference, curr_df)
+        }
+    monitor.save()
+    return results
+
+@traced_handler("detect-data-drift")
 def lambda_handler(event, context):
-    reference_df = get_reference_dataframe()
+    reference = get_reference()
+    history = DriftHistory(get_s3_store("weather-model-478492276227"))
+    if event and event.get("windows"):
+        results = detect_window_drift(reference, event["windows"], history)
+        return {
+            "statusCode": 200,
+            "drift_detected": any(r["drift_detected"] for r in results.values()),
+            "windows": results
+        }
     curr_df = get_current_dataframe()
-    columns_to_use = [
-        'temperature_2m_max', 'temperature_2m_min',
-        'apparent_temperature_max', 'apparent_temperature_min',
-        'daylight_duration', 'sunshine_duration',
-        'rain_sum', 'showers_sum', 'snowfall_sum',
-        'precipitation_sum', 'precipitation_hours', 'wind_speed_10m_max',
-        'wind_gusts_10m_max', 'wind_direction_10m_dominant',
-        'shortwave_radiation_sum', 'et0_fao_evapotranspiration',
-        'apparent_temperature_mean', 'temperature_2m_mean', 'cape_mean',
-        'cape_max', 'cape_min', 'cloud_cover_mean', 'cloud_cover_max',
-        'cloud_cover_min', 'dew_point_2m_mean', 'dew_point_2m_max',
-        'dew_point_2m_min', 'et0_fao_evapotranspiration_sum',
-        'relative_humidity_2m_mean', 'relative_humidity_2m_max',
-        'relative_humidity_2m_min', 'snowfall_water_equivalent_sum',
-        'pressure_msl_mean', 'pressure_msl_max', 'pressure_msl_min',
-        'surface_pressure_mean', 'surface_pressure_max', 'surface_pressure_min',
-        'visibility_mean', 'visibility_min', 'visibility_max',
-        'winddirection_10m_dominant', 'wind_gusts_10m_mean',
-        'wind_speed_10m_mean', 'wind_gusts_10m_min', 'wind_speed_10m_min',
-        'wet_bulb_temperature_2m_mean', 'wet_bulb_temperature_2m_max',
-        'wet_bulb_temperature_2m_min', 'vapour_pressure_deficit_max',
-        'soil_moisture_0_to_10cm_mean'
-    ]
-    reference_df = reference_df[columns_to_use]
-    curr_df = curr_df[columns_to_use]
+    columns = active_drift_columns()
+    metrics = compute_drift_metrics(reference, curr_df)
     overall_drift, details = detect_data_drift(
-        reference_df=reference_df,
-        current_df=curr_df,
+        reference_df=reference if isinstance(reference, dict) else reference[columns],
+        current_df=curr_df[columns],
         alpha=0.01,
         missing_threshold=0.10,
         require_frac=0.35
     )
+    record_drift_run(history, details, overall_drift)
+    metrics_message = craft_metrics_alert(metrics)
     if overall_drift:
         drift_message = craft_drift_alert(details)
+        if metrics_message:
+            drift_message += "\n" + metrics_message
         return {
             "statusCode": 200,
             "drift_detected": True,
-            "message": drift_message
+            "message": drift_message,
+            "metrics": metrics
         }
     else:
         return {
             "statusCode": 200,
             "drift_detected": False,
-            "message": "No data drift detected."
+            "message": "No data drift detected." + ("\n" + metrics_message if metrics_message else ""),
+            "metrics": metrics
         }
-    
@@ -0,0 +1,105 @@
+import pandas as pd
+from datetime import datetime, timezone
+from src.ds import S3DataStore
+
+HISTORY_PREFIX = "monitoring/drift_history"
+
+class DriftHistory:
+    """
+    Stores each drift run as one row per feature in a date-partitioned
+    Parquet object, plus a compact JSON index (per-run summary and per-feature
+    D statistics) that answers trend queries without reading the partitions.
+    """
+
+    def __init__(self, s3_ds: S3DataStore, prefix: str = HISTORY_PREFIX):
+        self.s3_ds = s3_ds
+        self.prefix = prefix.rstrip("/")
+        self.index_key = f"{self.prefix}/index.json"
+        self._index = None
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            self._index = self.s3_ds.load_json(self.index_key) or {"runs": [], "D": {}}
+        return self._index
+
+    def record(self, details: dict, overall: bool, window: int | None = None, run_time: datetime | None = None) -> str:
+        """
+        Persists one run's details dict and updates the index. Returns the run id.
+        """
+        run_time = run_time or datetime.now(timezone.utc)
+        run_id = run_time.strftime("%Y%m%dT%H%M%S") + (f"-w{window}" if window else "")
+        run_date = run_time.strftime("%Y-%m-%d")
+        rows = pd.DataFrame([
+            {
+                "run_id": run_id,
+                "run_date": run_date,
+                "window": window,
+                "feature": col,
+                "D": res["D"],
+                "p_value": res["p_value"],
+                "missing_delta": res["missing_delta"],
+                "missing_flag": res["missing_flag"],
+                "ks_flag": res["ks_flag"],
+                "drift": res["drift"]
+            }
+            for col, res in details.items()
+        ])
+        key = f"{self.prefix}/date={run_date}/run={run_id}.parquet"
+        try:
+            self.s3_ds.save_parquet(rows, key)
+        except ImportError:
+            # no Parquet engine in this runtime
+            key = key.replace(".parquet", ".csv")
+            self.s3_ds.save_df(rows, key)
+
+        index = self.index
+        n_runs = len(index["runs"])
+        index["runs"].append({
+            "run_id": run_id,
+            "date": run_date,
+            "window": window,
+            "key": key,
+            "overall": bool(overall),
+            "drifted": [col for col, res in details.items() if res["drift"]]
+        })
+        # D series stay aligned with runs, None where a feature was not tested
+        for col in set(index["D"]) | set(details):
+            series = index["D"].setdefault(col, [None] * n_runs)
+            series.append(details[col]["D"] if col in details else None)
+        self.s3_ds.save_json(self.index_key, index)
+        return run_id
+
+    def _recent_runs(self, n: int | None, window: int | None) -> list[int]:
+        positions = [i for i, run in enumerate(self.index["runs"]) if run["window"] == window]
+        return positions if n is None else positions[-n:]
+
+    def features_drifting_in_last_runs(self, n: int, window: int | None = None) -> dict[str, int]:
+        """
+        How many of the last n runs flagged each feature, most frequent first.
+        """
+        counts = {}
+        for i in self._recent_runs(n, window):
+            for col in self.index["runs"][i]["drifted"]:
+                counts[col] = counts.get(col, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+    def d_statistic_trend(self, column: str, n: int | None = None, window: int | None = None) -> pd.DataFrame:
+        """
+        D statistic of one feature over the runs, oldest first.
+        """
+        series = self.index["D"].get(column, [])
+        positions = self._recent_runs(n, window)
+        return pd.DataFrame({
+            "run_id": [self.index["runs"][i]["run_id"] for i in positions],
+            "date": [self.index["runs"][i]["date"] for i in positions],
+            "D": [series[i] if i < len(series) else None for i in positions]
+        })
+
+    def load_run(self, run_id: str) -> pd.DataFrame | None:
+        run = next((r for r in self.index["runs"] if r["run_id"] == run_id), None)
+        if run is None:
+            return None
+        if run["key"].endswith(".parquet"):
+            return self.s3_ds.load_parquet(run["key"])
+        return self.s3_ds.load_df(run["key"])
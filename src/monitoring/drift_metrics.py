@@ -0,0 +1,133 @@
+import math
+import numpy as np
+import pandas as pd
+
+N_BINS = 10
+PSI_THRESHOLD = 0.2
+EPS = 1e-4
+
+def shared_bin_edges(ref: np.ndarray, n_bins: int = N_BINS) -> np.ndarray:
+    """
+    Per-column quantile bin edges of the reference, shape (n_bins + 1, n_columns).
+    Every histogram metric of a run reuses these edges.
+    """
+    with np.errstate(invalid="ignore"):
+        return np.nanquantile(ref, np.linspace(0, 1, n_bins + 1), axis=0)
+
+def binned_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Histogram counts of every column at once, shape (n_bins, n_columns).
+    Values outside the reference range fall into the first/last bin, NaNs are ignored.
+    """
+    n_bins = edges.shape[0] - 1
+    inner = edges[1:-1]
+    idx = (values[:, None, :] >= inner[None, :, :]).sum(axis=1)
+    valid = ~np.isnan(values)
+    counts = np.zeros((n_bins, values.shape[1]))
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    np.add.at(counts, (idx[valid], cols[valid]), 1)
+    return counts
+
+def _proportions(counts: np.ndarray) -> np.ndarray:
+    totals = counts.sum(axis=0, keepdims=True)
+    return np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+def psi(ref_counts: np.ndarray, cur_counts: np.ndarray) -> np.ndarray:
+    p = np.clip(_proportions(ref_counts), EPS, None)
+    q = np.clip(_proportions(cur_counts), EPS, None)
+    return np.sum((q - p) * np.log(q / p), axis=0)
+
+def jensen_shannon(ref_counts: np.ndarray, cur_counts: np.ndarray) -> np.ndarray:
+    """Jensen-Shannon distance (base 2, in [0, 1])."""
+    p = _proportions(ref_counts)
+    q = _proportions(cur_counts)
+    mid = (p + q) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kl_p = np.where(p > 0, p * np.log2(p / mid), 0.0).sum(axis=0)
+        kl_q = np.where(q > 0, q * np.log2(q / mid), 0.0).sum(axis=0)
+    return np.sqrt(np.clip((kl_p + kl_q) / 2, 0.0, None))
+
+def wasserstein(ref_counts: np.ndarray, cur_counts: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """1-D Wasserstein distance between the binned CDFs, integrated over bin widths."""
+    cdf_diff = np.cumsum(_proportions(ref_counts) - _proportions(cur_counts), axis=0)
+    widths = np.diff(edges, axis=0)
+    return np.nansum(np.abs(cdf_diff) * widths, axis=0)
+
+def histogram_drift_metrics(ref: np.ndarray, cur: np.ndarray, columns: list[str], n_bins: int = N_BINS) -> dict:
+    """
+    PSI, Wasserstein and Jensen-Shannon for every column from one shared binning.
+    """
+    edges = shared_bin_edges(ref, n_bins)
+    ref_counts = binned_counts(ref, edges)
+    cur_counts = binned_counts(cur, edges)
+    has_data = (ref_counts.sum(axis=0) > 0) & (cur_counts.sum(axis=0) > 0)
+    psi_values = psi(ref_counts, cur_counts)
+    w_values = wasserstein(ref_counts, cur_counts, edges)
+    js_values = jensen_shannon(ref_counts, cur_counts)
+    metrics = {}
+    for i, col in enumerate(columns):
+        if not has_data[i]:
+            metrics[col] = {"psi": None, "wasserstein": None, "jensen_shannon": None, "psi_flag": False}
+            continue
+        metrics[col] = {
+            "psi": float(psi_values[i]),
+            "wasserstein": float(w_values[i]),
+            "jensen_shannon": float(js_values[i]),
+            "psi_flag": bool(psi_values[i] > PSI_THRESHOLD)
+        }
+    return metrics
+
+def _upper_incomplete_gamma(a: float, x: float) -> float:
+    """Regularized upper incomplete gamma Q(a, x) (series / continued fraction)."""
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        ap = a
+        for _ in range(1000):
+            ap += 1
+            term *= x / ap
+            total += term
+            if abs(term) < abs(total) * 1e-14:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    b = x + 1 - a
+    c = 1.0 / 1e-300
+    d = 1.0 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1e-300 if abs(d) < 1e-300 else d
+        c = b + an / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-14:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+def chi_square_predictions(ref_counts: dict, predictions: pd.Series, alpha: float = 0.01) -> dict:
+    """
+    Pearson chi-square test of the predicted weather_code distribution against
+    the reference weather_code frequencies. ref_counts maps str(float(code)) to counts;
+    unseen codes get a 0.5 pseudo-count.
+    """
+    observed = predictions.dropna().astype(float).value_counts()
+    codes = sorted(set(float(c) for c in ref_counts) | set(observed.index))
+    if len(codes) < 2 or observed.sum() == 0:
+        return {"statistic": None, "p_value": None, "dof": 0, "drift": False}
+    ref_freq = np.array([ref_counts.get(str(c), 0) for c in codes], dtype=float) + 0.5
+    expected = ref_freq / ref_freq.sum() * observed.sum()
+    obs = np.array([observed.get(c, 0) for c in codes], dtype=float)
+    statistic = float(np.sum((obs - expected) ** 2 / expected))
+    dof = len(codes) - 1
+    p_value = _upper_incomplete_gamma(dof / 2, statistic / 2)
+    return {"statistic": statistic, "p_value": p_value, "dof": dof, "drift": bool(p_value < alpha)}
+
+def code_counts(codes: pd.Series) -> dict:
+    counts = codes.dropna().astype(float).value_counts()
+    return {str(code): int(count) for code, count in counts.items()}
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from src.ds import S3DataStore
+from src.monitoring.prediction_log import read_new_rows, LOG_KEY
+from src.shared.partitions import DEFAULT_LOCATION
+
+STATE_KEY = "monitoring/drift_state.json"
+WINDOWS = [7, 14, 30, 90]
+
+class StreamingDriftMonitor:
+    """
+    Keeps the logged rows of the last max(windows) days in a small state object
+    on S3 and only reads the rows appended since the previous run. A day that
+    is scored again (re-scoring, batch runs) keeps only its latest row per
+    location, and each window is every row of its `size` most recent days.
+    """
+
+    def __init__(self, s3_ds: S3DataStore, columns: list[str], windows: list[int] = WINDOWS, state_key: str = STATE_KEY):
+        self.s3_ds = s3_ds
+        self.columns = list(columns)
+        self.windows = sorted(windows)
+        self.state_key = state_key
+        state = s3_ds.load_json(state_key)
+        if (
+            not state or state.get("columns") != self.columns
+            or state.get("capacity", 0) < self.windows[-1] or "locations" not in state
+        ):
+            print("Starting drift monitor state from scratch")
+            state = self._empty_state()
+        self.state = state
+
+    def _empty_state(self) -> dict:
+        return {
+            "columns": self.columns,
+            "capacity": self.windows[-1],
+            "cursor": None,
+            "dates": [],
+            "locations": [],
+            "values": {c: [] for c in self.columns}
+        }
+
+    def _buffer(self) -> pd.DataFrame:
+        df = pd.DataFrame({c: self.state["values"][c] for c in self.columns}, columns=self.columns, dtype=float)
+        df.insert(0, "location", self.state["locations"])
+        df.insert(0, "date", self.state["dates"])
+        return df
+
+    def update(self) -> int:
+        """
+        Merges the new log rows into the buffer and returns how many were read.
+        """
+        new_rows, cursor = read_new_rows(self.s3_ds, self.state["cursor"], LOG_KEY)
+        if cursor.get("reset"):
+            # log was rewritten, rebuild the buffer from the rows we just read
+            self.state["dates"] = []
+            self.state["locations"] = []
+            self.state["values"] = {c: [] for c in self.columns}
+        self.state["cursor"] = cursor
+        if new_rows.empty or "date" not in new_rows.columns:
+            return 0
+        new = pd.DataFrame({
+            "date": _to_day(new_rows["date"]),
+            "location": new_rows["location"].fillna(DEFAULT_LOCATION["id"]).astype(str)
+                if "location" in new_rows.columns else DEFAULT_LOCATION["id"]
+        })
+        for col in self.columns:
+            new[col] = pd.to_numeric(new_rows[col], errors="coerce").astype(float) if col in new_rows.columns else np.nan
+        buffer = pd.concat([self._buffer(), new], ignore_index=True)
+        # later rows of a (day, location) replace earlier ones, then keep the most recent days
+        buffer = buffer.drop_duplicates(subset=["date", "location"], keep="last")
+        buffer = buffer.sort_values("date", kind="stable")
+        buffer = buffer[buffer["date"].isin(_last_days(buffer["date"], self.state["capacity"]))]
+        self.state["dates"] = buffer["date"].tolist()
+        self.state["locations"] = buffer["location"].tolist()
+        for col in self.columns:
+            # NaN is not valid JSON, missing values are stored as null
+            self.state["values"][col] = [None if pd.isna(v) else float(v) for v in buffer[col]]
+        return len(new_rows)
+
+    def _window_rows(self, size: int) -> pd.DataFrame:
+        buffer = self._buffer()
+        return buffer[buffer["date"].isin(_last_days(buffer["date"], size))]
+
+    def window(self, size: int) -> pd.DataFrame:
+        return self._window_rows(size)[self.columns].reset_index(drop=True)
+
+    def window_dates(self, size: int) -> tuple[str | None, str | None]:
+        dates = self._window_rows(size)["date"]
+        return (dates.iloc[0], dates.iloc[-1]) if len(dates) else (None, None)
+
+    def save(self) -> None:
+        self.s3_ds.save_json(self.state_key, self.state)
+
+def _to_day(dates: pd.Series) -> pd.Series:
+    return pd.to_datetime(dates, utc=True).dt.strftime("%Y-%m-%d")
+
+def _last_days(dates: pd.Series, size: int) -> list[str]:
+    return sorted(dates.unique())[-size:]
@@ -0,0 +1,149 @@
+import sys
+sys.path.append("/opt")
+sys.path.append(".")
+
+import pandas as pd
+from src.ds import LakeFSDataStore, S3DataStore, get_lakefs_store, get_s3_store
+from src.data.utils import location_dates
+from src.monitoring.prediction_log import read_new_rows, LOG_KEY
+from src.shared.tracing import traced, traced_handler
+from src.shared.partitions import DEFAULT_LOCATION, partition_key
+
+STATE_KEY = "monitoring/performance_state.json"
+
+def _to_day(dates: pd.Series) -> pd.Series:
+    return pd.to_datetime(dates, utc=True).dt.strftime("%Y-%m-%d")
+
+def _column(df: pd.DataFrame, name: str, default: str) -> list[str]:
+    # rows logged before the column existed get the default
+    if name not in df.columns:
+        return [default] * len(df)
+    return df[name].fillna(default).astype(str).tolist()
+
+class PerformanceMonitor:
+    """
+    Joins logged predictions with the weather codes observed later in the raw data.
+    Predictions are keyed by "day|location|model version". Unmatched ones are kept
+    in a pending store and matched ones are folded into per-month confusion counts,
+    so neither dataset is rescanned. The pair each key was counted with is kept, so
+    a day the same model predicts again replaces its count instead of adding one.
+    """
+
+    def __init__(self, s3_ds: S3DataStore, lakefs_ds: LakeFSDataStore, state_key: str = STATE_KEY):
+        self.s3_ds = s3_ds
+        self.lakefs_ds = lakefs_ds
+        self.state_key = state_key
+        state = s3_ds.load_json(state_key)
+        if not state or "joined" not in state:
+            # state from before predictions were keyed by location and model, rebuilt from the whole log
+            state = {
+                "log_cursor": None,
+                "pending": {},
+                "joined": {},
+                "joined_through": None,
+                "confusion": {}
+            }
+        self.state = state
+
+    @traced("performance.ingest_predictions")
+    def ingest_predictions(self) -> int:
+        new_rows, cursor = read_new_rows(self.s3_ds, self.state["log_cursor"], LOG_KEY)
+        if cursor.get("reset"):
+            # the whole log comes back, rebuild the counts from it instead of counting rows twice
+            self.state["pending"] = {}
+            self.state["joined"] = {}
+            self.state["confusion"] = {}
+            self.state["joined_through"] = None
+        self.state["log_cursor"] = cursor
+        if new_rows.empty or "prediction" not in new_rows.columns:
+            return 0
+        days = _to_day(new_rows["date"])
+        locations = _column(new_rows, "location", DEFAULT_LOCATION["id"])
+        versions = _column(new_rows, "model_version", "")
+        # a re-scored day keeps its latest prediction
+        for day, location, version, prediction in zip(days, locations, versions, new_rows["prediction"]):
+            self.state["pending"][f"{day}|{location}|{version}"] = float(prediction)
+        return len(new_rows)
+
+    @traced("performance.join_observations")
+    def join_observations(self) -> int:
+        """
+        Matches pending predictions whose dates are now covered by merged raw partitions.
+        """
+        manifest = self.lakefs_ds.load_json(key = "data/raw/manifest.json")
+        if not manifest:
+            return 0
+        observed_through = location_dates(manifest)
+        candidates = {}
+        for key in self.state["pending"]:
+            day, location, _ = key.split("|", 2)
+            if location in observed_through and day <= observed_through[location]:
+                # only read the months that contain pending predictions
+                candidates.setdefault((location, int(day[:4]), int(day[5:7])), []).append(key)
+        matched = 0
+        for (location, year, month), keys in sorted(candidates.items()):
+            key = partition_key("raw", location, year, month)
+            try:
+                raw = self.lakefs_ds.load_df(key)
+            except Exception as e:
+                print(f"Error loading {key}: {e}")
+                continue
+            observed = dict(zip(_to_day(raw["date"]), raw["weather_code"]))
+            counts = self.state["confusion"].setdefault(f"{year:04d}-{month:02d}", {})
+            for key in keys:
+                day = key.split("|", 1)[0]
+                prediction = self.state["pending"].pop(key)
+                if day not in observed or pd.isna(observed[day]):
+                    # the raw data for this day is final, it will never be observed
+                    print(f"No observed weather_code for {key}, dropping its prediction")
+                    continue
+                previous = self.state["joined"].get(key)
+                if previous is not None:
+                    counts[previous] -= 1
+                    if not counts[previous]:
+                        del counts[previous]
+                pair = f"{float(observed[day])},{prediction}"
+                counts[pair] = counts.get(pair, 0) + 1
+                self.state["joined"][key] = pair
+                matched += 1
+        self.state["joined_through"] = manifest["last_updated_date"]
+        return matched
+
+    def summary(self) -> dict:
+        months = {}
+        total = correct = 0
+        for month, counts in sorted(self.state["confusion"].items()):
+            n = sum(counts.values())
+            hits = sum(c for pair, c in counts.items() if pair.split(",")[0] == pair.split(",")[1])
+            months[month] = {"n": n, "accuracy": hits / n if n else None}
+            total += n
+            correct += hits
+        return {
+            "accuracy": correct / total if total else None,
+            "matched": total,
+            "pending": len(self.state["pending"]),
+            "months": months
+        }
+
+    def save(self) -> None:
+        self.s3_ds.save_json(self.state_key, self.state)
+
+@traced_handler("monitor-model-performance")
+def lambda_handler(event, _):
+    monitor = PerformanceMonitor(
+        s3_ds = get_s3_store(event.get("bucket_name", "weather-model-478492276227")),
+        lakefs_ds = get_lakefs_store(
+            repo_name = event.get("repo_name", "weather-data"),
+            endpoint = event.get("lakefs_endpoint", "http://18.222.212.217:8000")
+        )
+    )
+    ingested = monitor.ingest_predictions()
+    matched = monitor.join_observations()
+    monitor.save()
+    print(f"Ingested {ingested} predictions, matched {matched} with observations")
+    return {
+        "statusCode": 200,
+        "ingested": ingested,
+        "newly_matched": matched,
+        "performance": monitor.summary()
+    }
@@ -0,0 +1,93 @@
+import io
+import csv
+import zlib
+import pandas as pd
+from src.ds import S3DataStore
+
+LOG_KEY = "logs/daily_predictions.csv"
+HEADER_PROBE_BYTES = 64 * 1024
+# bytes before a cursor's offset whose checksum must still match to resume there
+TAIL_CHECK_BYTES = 4096
+
+def _read_header(s3_ds: S3DataStore, key: str) -> bytes | None:
+    probe = s3_ds.load_bytes(key, 0, HEADER_PROBE_BYTES - 1)
+    if probe is None:
+        return None
+    end = probe.find(b"\n")
+    return probe if end == -1 else probe[:end + 1]
+
+def _csv_bytes(df: pd.DataFrame, header: bool) -> bytes:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=header)
+    return buffer.getvalue().encode("utf-8")
+
+def append_rows(s3_ds: S3DataStore, df: pd.DataFrame, key: str = LOG_KEY) -> None:
+    """
+    Appends df to the log without re-serializing the rows already in it, so the
+    bytes before any reader's cursor never change. Only rows with columns the
+    header lacks rewrite the log, under a new header that makes readers start over.
+    """
+    size = s3_ds.get_size(key)
+    existing = s3_ds.load_bytes(key) if size else None
+    if not existing:
+        s3_ds.save_bytes(key, _csv_bytes(df, header=True))
+        return
+    end = existing.find(b"\n")
+    header = next(csv.reader([existing[:end if end != -1 else len(existing)].decode("utf-8")]))
+    if not set(df.columns) <= set(header):
+        print(f"New columns {sorted(set(df.columns) - set(header))}, rewriting {key}")
+        combined = pd.concat([pd.read_csv(io.BytesIO(existing)), df], ignore_index=True)
+        s3_ds.save_bytes(key, _csv_bytes(combined, header=True))
+        return
+    if not existing.endswith(b"\n"):
+        existing += b"\n"
+    s3_ds.save_bytes(key, existing + _csv_bytes(df.reindex(columns=header), header=False))
+
+def read_new_rows(s3_ds: S3DataStore, cursor: dict | None, key: str = LOG_KEY) -> tuple[pd.DataFrame, dict]:
+    """
+    Returns the rows appended to the prediction log since cursor and the new cursor.
+    Only the bytes after the cursor's offset are downloaded, together with the few
+    bytes before it whose checksum the cursor recorded. If the header changed, the
+    log shrank or those bytes changed, the whole log is read again and reset is set
+    in the returned cursor.
+    """
+    size = s3_ds.get_size(key)
+    if not size:
+        return pd.DataFrame(), cursor or {}
+    header = _read_header(s3_ds, key)
+    if header is None:
+        return pd.DataFrame(), cursor or {}
+
+    resume = (
+        cursor is not None
+        and cursor.get("header") == header.decode("utf-8")
+        and "tail_crc" in cursor
+        and len(header) <= cursor.get("offset", 0) <= size
+    )
+    if resume:
+        tail_length = cursor["tail_length"]
+        chunk = s3_ds.load_bytes(key, cursor["offset"] - tail_length) or b""
+        resume = len(chunk) >= tail_length and zlib.crc32(chunk[:tail_length]) == cursor["tail_crc"]
+        if not resume:
+            print(f"{key} changed before the cursor, reading it again")
+    if resume:
+        offset = cursor["offset"]
+        seen, body = chunk[:tail_length], chunk[tail_length:]
+    else:
+        offset = len(header)
+        seen = header
+        body = (s3_ds.load_bytes(key, offset) or b"") if offset < size else b""
+
+    tail = (seen + body)[-TAIL_CHECK_BYTES:]
+    new_cursor = {
+        "offset": offset + len(body),
+        "header": header.decode("utf-8"),
+        "tail_length": len(tail),
+        "tail_crc": zlib.crc32(tail),
+        "reset": not resume
+    }
+    if not body:
+        return pd.DataFrame(), new_cursor
+    df = pd.read_csv(io.BytesIO(header + body))
+    print(f"Read {len(df)} new rows from {key} (bytes {offset}-{new_cursor['offset']})")
+    return df, new_cursor
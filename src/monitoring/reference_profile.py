@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from src.ds import LakeFSDataStore
+from src.data.utils import load_partitions, local_dates
+from src.shared.columns import CALENDAR_FEATURES
+from src.monitoring.drift_metrics import code_counts
+
+PROFILE_KEY = "data/reference/profile.json"
+MAX_POINTS = 1000
+REFERENCE_YEARS = 2
+
+def build_reference_profile(df: pd.DataFrame, version: str, max_points: int = MAX_POINTS) -> dict:
+    """
+    Summarizes each numeric column as its sorted values (or max_points evenly
+    spaced quantiles when larger) together with its size and missing rate.
+    """
+    columns = [c for c in df.columns if c != "date" and c not in CALENDAR_FEATURES]
+    profile = {"version": version, "rows": int(len(df)), "columns": {}}
+    if "weather_code" in df.columns:
+        # observed code frequencies for the chi-square test on predictions
+        profile["weather_code_counts"] = code_counts(df["weather_code"])
+    for col in columns:
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        valid = np.sort(values[~np.isnan(values)])
+        exact = len(valid) <= max_points
+        if not exact:
+            valid = np.quantile(valid, np.linspace(0, 1, max_points))
+        profile["columns"][col] = {
+            "n": int((~np.isnan(values)).sum()),
+            "missing_rate": float(np.isnan(values).mean()) if len(values) else 0.0,
+            "exact": exact,
+            "values": valid.tolist()
+        }
+    return profile
+
+def profile_to_arrays(profile: dict, columns: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns (values, n, missing_rate) for columns. values is NaN-padded to a 2-D array
+    so it can go straight into the vectorized KS engine; n is the original sample size.
+    """
+    missing = [c for c in columns if c not in profile["columns"]]
+    if missing:
+        raise KeyError(f"Reference profile {profile['version']} has no columns {missing}")
+    entries = [profile["columns"][c] for c in columns]
+    length = max((len(e["values"]) for e in entries), default=0)
+    values = np.full((length, len(columns)), np.nan)
+    for i, e in enumerate(entries):
+        values[:len(e["values"]), i] = e["values"]
+    n = np.array([e["n"] for e in entries])
+    missing_rate = np.array([e["missing_rate"] for e in entries])
+    return values, n, missing_rate
+
+def update_reference_profile(lakefs_ds: LakeFSDataStore) -> dict:
+    """
+    Builds the profile of the last REFERENCE_YEARS of processed data on the current
+    branch, versioned by the processed manifest date.
+    """
+    version = lakefs_ds.load_json(key = "data/processed/manifest.json")["last_updated_date"]
+    end_date = pd.Timestamp(version)
+    start_date = end_date - pd.DateOffset(years = REFERENCE_YEARS)
+    df = load_partitions(lakefs_ds, "processed", start_date, end_date)
+    # extracted dates are UTC-aware, the manifest bounds are naive local days of the production site
+    df["date"] = local_dates(df["date"])
+    df = df[(df["date"] > start_date) & (df["date"] <= end_date)]
+    profile = build_reference_profile(df, version)
+    lakefs_ds.save_json(key = f"data/reference/version={version}/profile.json", data = profile)
+    lakefs_ds.save_json(key = PROFILE_KEY, data = profile)
+    return profile
+
+def load_reference_profile(lakefs_ds: LakeFSDataStore, version: str | None = None) -> dict | None:
+    key = PROFILE_KEY if version is None else f"data/reference/version={version}/profile.json"
+    return lakefs_ds.load_json(key = key)
@@ -1 +1 @@
-from src.shared.columns import FEATURES, REMOVE
\ No newline at end of file
+from src.shared.columns import FEATURES, REMOVE, CALENDAR_FEATURES, MODEL_FEATURES
\ No newline at end of file
@@ -51,4 +51,25 @@ REMOVE = [
     'precipitation_probability_min', 'updraft_max', 'soil_moisture_0_to_100cm_mean', 'soil_moisture_0_to_7cm_mean', 'soil_moisture_28_to_100cm_mean',
     'soil_moisture_7_to_28cm_mean', 'soil_temperature_0_to_100cm_mean', 'soil_temperature_0_to_7cm_mean',
     'soil_temperature_28_to_100cm_mean', 'soil_temperature_7_to_28cm_mean' 
-]
\ No newline at end of file
+]
+
+# requested in hourly ingestion mode, see src/data/hourly.py
+HOURLY_FEATURES = [
+    "weather_code", "temperature_2m", "apparent_temperature",
+    "dew_point_2m", "relative_humidity_2m", "wet_bulb_temperature_2m",
+    "precipitation", "rain", "showers", "snowfall",
+    "cloud_cover", "pressure_msl", "surface_pressure",
+    "wind_speed_10m", "wind_gusts_10m", "wind_direction_10m",
+    "shortwave_radiation", "sunshine_duration", "is_day",
+    "et0_fao_evapotranspiration", "vapour_pressure_deficit",
+    "cape", "visibility", "uv_index", "uv_index_clear_sky"
+]
+
+# calendar features added by process_dataframe
+CALENDAR_FEATURES = [
+    "year", "month", "day_of_month", "day_of_week", "day_of_year",
+    "month_sin", "month_cos", "year_sin", "year_cos"
+]
+
+# model input order: processed columns without date and target
+MODEL_FEATURES = [c for c in FEATURES if c not in REMOVE and c != "weather_code"] + CALENDAR_FEATURES
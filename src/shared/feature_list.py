@@ -0,0 +1,54 @@
+import os
+import json
+import time
+from src.shared.columns import MODEL_FEATURES
+
+FEATURE_LIST_BUCKET = os.getenv("FEATURE_LIST_BUCKET", "weather-model-478492276227")
+FEATURE_LIST_KEY = os.getenv("FEATURE_LIST_KEY", "features/current.json")
+FEATURE_LIST_CHECK_INTERVAL = float(os.getenv("FEATURE_LIST_CHECK_INTERVAL", "60"))
+
+# Survives across warm invocations, re-checked by ETag so a promotion reaches running containers
+_cache = {"etag": None, "feature_list": None, "checked_at": None}
+
+def load_feature_list() -> dict | None:
+    """
+    The promoted feature list written by train.py, or None when no list is
+    promoted (every consumer then falls back to the full column set). The ETag
+    is re-checked at most every FEATURE_LIST_CHECK_INTERVAL seconds and the
+    list is only downloaded again when it changed or was removed.
+    """
+    now = time.monotonic()
+    if _cache["checked_at"] is not None and now - _cache["checked_at"] < FEATURE_LIST_CHECK_INTERVAL:
+        return _cache["feature_list"]
+    from src.ds.clients import get_client
+    s3 = get_client("s3")
+    try:
+        etag = s3.head_object(Bucket=FEATURE_LIST_BUCKET, Key=FEATURE_LIST_KEY)["ETag"]
+    except s3.exceptions.ClientError:
+        etag = None
+    except Exception as e:
+        # keep the last known list while S3 is unreachable
+        print(f"Could not check {FEATURE_LIST_KEY}: {e}")
+        return _cache["feature_list"]
+    if etag != _cache["etag"] or _cache["checked_at"] is None:
+        if etag is None:
+            print(f"No feature list at {FEATURE_LIST_KEY}, using all features")
+            _cache["feature_list"] = None
+        else:
+            obj = s3.get_object(Bucket=FEATURE_LIST_BUCKET, Key=FEATURE_LIST_KEY)
+            _cache["feature_list"] = json.loads(obj["Body"].read().decode("utf-8"))
+            print(f"Using feature list {_cache['feature_list'].get('version')}")
+        _cache["etag"] = etag
+    _cache["checked_at"] = now
+    return _cache["feature_list"]
+
+def active_model_features() -> list[str]:
+    """
+    Model input columns, in MODEL_FEATURES order. The list only narrows the model
+    input: extract, validation and storage always keep every column.
+    """
+    feature_list = load_feature_list()
+    if feature_list is None:
+        return MODEL_FEATURES
+    selected = set(feature_list["features"])
+    return [c for c in MODEL_FEATURES if c in selected]
@@ -0,0 +1,86 @@
+import os
+import sys
+import resource
+import threading
+
+# also shipped next to train.py in source.tar.gz, so only the standard library is imported here
+# log the checkpoint summary of every handler invocation, see tracing.emit_memory
+REPORT = os.getenv("MEMORY_REPORT", "0") == "1"
+TOP_N = int(os.getenv("MEMORY_TOP_N", "5"))
+MB = 2 ** 20
+
+_lock = threading.Lock()
+_checkpoints = []
+
+def rss_mb() -> float | None:
+    """Current resident set size, None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / MB, 1)
+
+def peak_rss_mb() -> float:
+    """
+    Highest resident set size of the process so far. In a warm Lambda container
+    this covers earlier invocations too, compare it with the checkpoints' rss_mb.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / MB if sys.platform == "darwin" else peak / 1024, 1)
+
+def frame_usage(df, top: int = 3) -> dict:
+    """Deep memory usage of a DataFrame and its largest columns."""
+    usage = df.memory_usage(deep=True)
+    largest = usage.drop("Index", errors="ignore").sort_values(ascending=False).head(top)
+    return {
+        "rows": int(len(df)),
+        "columns": int(df.shape[1]),
+        "frame_mb": round(float(usage.sum()) / MB, 3),
+        "largest_columns": {str(c): round(float(b) / MB, 3) for c, b in largest.items()}
+    }
+
+def checkpoint(stage: str, df=None) -> dict:
+    """
+    Records RSS at a stage boundary, together with the deep size of df when given.
+    """
+    entry = {"stage": stage, "rss_mb": rss_mb(), "peak_rss_mb": peak_rss_mb()}
+    if df is not None:
+        entry.update(frame_usage(df))
+    with _lock:
+        _checkpoints.append(entry)
+    frame = f", frame {entry['frame_mb']:.2f} MB ({entry['rows']} rows)" if df is not None else ""
+    print(f"[memory] {stage}: rss {entry['rss_mb']} MB, peak {entry['peak_rss_mb']} MB{frame}")
+    return entry
+
+def reset() -> None:
+    with _lock:
+        _checkpoints.clear()
+
+def summarize(top: int = TOP_N) -> dict:
+    """
+    Checkpoints of the invocation with the largest DataFrames and the
+    largest RSS increases between consecutive checkpoints.
+    """
+    with _lock:
+        checkpoints = list(_checkpoints)
+    frames = sorted((c for c in checkpoints if "frame_mb" in c), key=lambda c: c["frame_mb"], reverse=True)
+    growth = []
+    for prev, cur in zip(checkpoints, checkpoints[1:]):
+        if prev["rss_mb"] is not None and cur["rss_mb"] is not None:
+            growth.append({
+                "from": prev["stage"],
+                "to": cur["stage"],
+                "rss_increase_mb": round(cur["rss_mb"] - prev["rss_mb"], 1)
+            })
+    growth.sort(key=lambda g: g["rss_increase_mb"], reverse=True)
+    return {
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_mb": rss_mb(),
+        "largest_frames": [
+            {k: c[k] for k in ("stage", "frame_mb", "rows", "largest_columns")} for c in frames[:top]
+        ],
+        "largest_increases": [g for g in growth[:top] if g["rss_increase_mb"] > 0],
+        "checkpoints": checkpoints
+    }
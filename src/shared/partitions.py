@@ -0,0 +1,57 @@
+"""
+Keys of the data/{raw,processed,hourly,intraday}/location=/year=/month=/ partitions.
+Also shipped next to train.py in source.tar.gz, so only the standard library is imported here.
+"""
+
+# the production site
+LATITUDE = 43.7064
+LONGITUDE = -79.3986
+TIMEZONE = "America/New_York"
+
+def location_id(lat: float, long: float) -> str:
+    return f"{lat:.4f}_{long:.4f}"
+
+DEFAULT_LOCATION = {"id": location_id(LATITUDE, LONGITUDE), "lat": LATITUDE, "long": LONGITUDE, "timezone": TIMEZONE}
+
+def resolve_locations(locations: list[dict] | None = None) -> list[dict]:
+    """
+    Locations are dicts with 'lat', 'long' and optionally 'id' and 'timezone'.
+    None means the production site only.
+    """
+    if not locations:
+        return [DEFAULT_LOCATION]
+    return [
+        {
+            "id": loc.get("id") or location_id(loc["lat"], loc["long"]),
+            "lat": loc["lat"],
+            "long": loc["long"],
+            "timezone": loc.get("timezone", TIMEZONE)
+        }
+        for loc in locations
+    ]
+
+def location_prefix(type: str, loc_id: str) -> str:
+    return f"data/{type}/location={loc_id}"
+
+def partition_key(type: str, loc_id: str, year: int, month: int, filename: str = "data.csv") -> str:
+    return f"{location_prefix(type, loc_id)}/year={year}/month={month}/{filename}"
+
+def months_between(start_date, end_date) -> list[tuple[int, int]]:
+    """(year, month) of every month overlapping start_date..end_date, any date-like values."""
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def plan_partitions(type: str, start_date, end_date, locations: list[dict] | None = None) -> list[tuple[str, str]]:
+    """
+    (location id, key) of the only partitions a job between start_date and end_date
+    over locations has to read, location by location in date order.
+    """
+    return [
+        (loc["id"], partition_key(type, loc["id"], year, month))
+        for loc in resolve_locations(locations)
+        for year, month in months_between(start_date, end_date)
+    ]
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from src.shared import memory
+
+NAMESPACE = os.getenv("TRACE_NAMESPACE", "WeatherPipeline")
+MAX_KEYS = 5
+
+# finished spans of the current invocation; handlers may record from worker threads
+_lock = threading.Lock()
+_spans = []
+_local = threading.local()
+
+class Span:
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.duration_ms = 0.0
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Times the enclosed block. Attributes such as key, bytes and rows can be
+    passed up front or added with span.set() once they are known.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    current = Span(name, attrs)
+    current.parent = stack[-1].name if stack else None
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        stack.pop()
+        with _lock:
+            _spans.append(current)
+
+def traced(name: str | None = None):
+    """Decorator form of span(), named after the function by default."""
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def summarize() -> dict[str, dict]:
+    """Spans of the invocation aggregated by name."""
+    with _lock:
+        spans = list(_spans)
+    summary = {}
+    for s in spans:
+        entry = summary.setdefault(s.name, {
+            "Count": 0, "Duration": 0.0, "MaxDuration": 0.0,
+            "Bytes": 0, "Rows": 0, "parent": s.parent, "keys": [], "errors": 0
+        })
+        entry["Count"] += 1
+        entry["Duration"] += s.duration_ms
+        entry["MaxDuration"] = max(entry["MaxDuration"], s.duration_ms)
+        entry["Bytes"] += int(s.attrs.get("bytes", 0) or 0)
+        entry["Rows"] += int(s.attrs.get("rows", 0) or 0)
+        if "key" in s.attrs and len(entry["keys"]) < MAX_KEYS:
+            entry["keys"].append(s.attrs["key"])
+        if "error" in s.attrs:
+            entry["errors"] += 1
+    for entry in summary.values():
+        entry["Duration"] = round(entry["Duration"], 2)
+        entry["MaxDuration"] = round(entry["MaxDuration"], 2)
+    return summary
+
+def emit(function_name: str) -> dict[str, dict]:
+    """
+    Prints one CloudWatch Embedded Metric Format line per span name and clears
+    the recorded spans. Returns the aggregated spans.
+    """
+    summary = summarize()
+    timestamp = int(time.time() * 1000)
+    for name, entry in summary.items():
+        print(json.dumps({
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [["Function", "Span"]],
+                    "Metrics": [
+                        {"Name": "Count", "Unit": "Count"},
+                        {"Name": "Duration", "Unit": "Milliseconds"},
+                        {"Name": "MaxDuration", "Unit": "Milliseconds"},
+                        {"Name": "Bytes", "Unit": "Bytes"},
+                        {"Name": "Rows", "Unit": "Count"}
+                    ]
+                }]
+            },
+            "Function": function_name,
+            "Span": name,
+            **entry
+        }))
+    with _lock:
+        _spans.clear()
+    return summary
+
+def emit_memory(function_name: str) -> dict:
+    """
+    Prints the memory summary of the invocation as one EMF line with the
+    peak RSS as a metric. Returns the summary.
+    """
+    summary = memory.summarize()
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["Function"]],
+                "Metrics": [{"Name": "PeakRss", "Unit": "Megabytes"}]
+            }]
+        },
+        "Function": function_name,
+        "PeakRss": summary["peak_rss_mb"],
+        "memory": summary
+    }))
+    return summary
+
+def traced_handler(function_name: str | None = None):
+    """
+    Wraps a Lambda handler in a root span and emits the invocation's spans when it returns,
+    and its memory checkpoints with MEMORY_REPORT=1. The handler's result is returned unchanged.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            name = function_name or os.getenv("AWS_LAMBDA_FUNCTION_NAME", handler.__module__)
+            with _lock:
+                _spans.clear()
+            memory.reset()
+            try:
+                with span("handler"):
+                    result = handler(event, context)
+            finally:
+                emit(name)
+                if memory.REPORT:
+                    emit_memory(name)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeAWS
+
+@pytest.fixture
+def aws(monkeypatch):
+    """
+    Fresh in-process S3, lakeFS and SageMaker runtime stand-ins. Modules that
+    already bound get_client or a store are pointed at this test's fakes.
+    """
+    fake = FakeAWS()
+    fake.install()
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src.") and hasattr(module, "get_client"):
+            monkeypatch.setattr(module, "get_client", fake.get_client)
+    import src.ds.stores as stores
+    monkeypatch.setattr(stores, "_s3_stores", {})
+    monkeypatch.setattr(stores, "_lakefs_stores", {})
+    return fake
@@ -0,0 +1,56 @@
+import json
+import hashlib
+import pytest
+from src.model import bootstrap
+
+@pytest.fixture
+def wheels(tmp_path, monkeypatch):
+    monkeypatch.setattr(bootstrap, "WHEEL_DIR", str(tmp_path))
+    monkeypatch.setattr(bootstrap, "LOCK_FILE", str(tmp_path / "lock.json"))
+    wheel = tmp_path / "examplepkg-1.0-py3-none-any.whl"
+    wheel.write_bytes(b"wheel contents")
+    lock = {"packages": [{
+        "name": "examplepkg",
+        "version": "1.0",
+        "file": wheel.name,
+        "sha256": hashlib.sha256(b"wheel contents").hexdigest()
+    }]}
+    (tmp_path / "lock.json").write_text(json.dumps(lock))
+    return tmp_path, lock
+
+def test_verify_lock_accepts_matching_wheels(wheels):
+    _, lock = wheels
+    bootstrap.verify_lock(lock)
+
+def test_verify_lock_rejects_tampered_wheel(wheels):
+    directory, lock = wheels
+    (directory / lock["packages"][0]["file"]).write_bytes(b"something else")
+    with pytest.raises(ValueError, match="Hash mismatch"):
+        bootstrap.verify_lock(lock)
+
+def test_verify_lock_rejects_missing_wheel(wheels):
+    directory, lock = wheels
+    (directory / lock["packages"][0]["file"]).unlink()
+    with pytest.raises(FileNotFoundError):
+        bootstrap.verify_lock(lock)
+
+def test_missing_packages_keeps_installed_versions():
+    lock = {"packages": [
+        {"name": "pytest", "version": "0.0.1", "file": "x.whl", "sha256": ""},
+        {"name": "surely-not-installed-pkg", "version": "1.0", "file": "y.whl", "sha256": ""}
+    ]}
+    assert [e["name"] for e in bootstrap.missing_packages(lock)] == ["surely-not-installed-pkg"]
+
+def test_ensure_dependencies_installs_offline(wheels, monkeypatch):
+    directory, _ = wheels
+    calls = []
+    monkeypatch.setattr(bootstrap, "_pip_install", calls.append)
+    bootstrap.ensure_dependencies()
+    assert calls == [["--no-index", "--find-links", str(directory), "examplepkg==1.0"]]
+
+def test_ensure_dependencies_refuses_tampered_lock(wheels, monkeypatch):
+    directory, lock = wheels
+    (directory / lock["packages"][0]["file"]).write_bytes(b"tampered")
+    monkeypatch.setattr(bootstrap, "_pip_install", lambda args: pytest.fail("installed from a tampered lock"))
+    with pytest.raises(ValueError):
+        bootstrap.ensure_dependencies()
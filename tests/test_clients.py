@@ -0,0 +1,36 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+pytest.importorskip("boto3")
+
+@pytest.fixture
+def clients(monkeypatch):
+    from src.ds import clients
+    monkeypatch.setattr(clients, "_clients", {})
+    monkeypatch.setattr(clients, "_sessions", {})
+    return clients
+
+def test_same_arguments_share_one_client(clients):
+    s3 = clients.get_client("s3", region_name="us-east-1")
+    assert clients.get_client("s3", region_name="us-east-1") is s3
+    assert clients.get_client("s3", region_name="us-east-1", endpoint_url="http://lakefs.local:8000") is not s3
+    assert clients.get_client("s3", region_name="us-east-1", read_timeout=5) is not s3
+
+def test_clients_use_the_pooled_config(clients):
+    config = clients.get_client("s3", region_name="us-east-1").meta.config
+    assert config.max_pool_connections == clients.MAX_POOL_CONNECTIONS
+    # botocore counts the first attempt in total_max_attempts
+    assert config.retries == {"total_max_attempts": clients.MAX_ATTEMPTS + 1, "mode": clients.RETRY_MODE}
+    assert config.tcp_keepalive == clients.TCP_KEEPALIVE
+    assert clients.get_client("s3", region_name="us-east-1", read_timeout=5).meta.config.read_timeout == 5
+
+def test_concurrent_callers_get_the_same_client(clients):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda _: clients.get_client("sagemaker-runtime", region_name="us-east-1"), range(64)))
+    assert len({id(c) for c in results}) == 1
+
+def test_credentials_get_their_own_session(clients):
+    a = clients.get_client("s3", region_name="us-east-1", access_key="a", secret_key="x")
+    b = clients.get_client("s3", region_name="us-east-1", access_key="b", secret_key="y")
+    assert a is not b
+    assert len(clients._sessions) == 2
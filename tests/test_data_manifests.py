@@ -0,0 +1,67 @@
+import json
+import pandas as pd
+import pytest
+
+REPO = "weather-data"
+START = "2024-12-31"
+
+@pytest.fixture
+def pipeline(aws):
+    from src.data import extract, validate_extract, transform, validate_transform
+
+    def run(locations: list[dict]) -> list[dict]:
+        event = {
+            "repo_name": REPO,
+            "lakefs_endpoint": "http://lakefs.local:8000",
+            "default_start_date": START,
+            "locations": locations
+        }
+        results = []
+        for module in (extract, validate_extract, transform, validate_transform):
+            result = module.lambda_handler(event, None)
+            assert result["statusCode"] == 200, result
+            results.append(result)
+        return results
+    return run
+
+def _manifest(aws, type: str) -> dict:
+    return json.loads(aws.s3.objects[(REPO, f"main/data/{type}/manifest.json")])
+
+def test_legacy_manifest_only_covers_the_production_site(aws):
+    from src.data.utils import manifest_dates
+    from src.shared.partitions import DEFAULT_LOCATION
+    other = {"id": "other", "lat": 45.0, "long": -75.0}
+    dates = manifest_dates({"last_updated_date": "2025-03-31"}, START, [DEFAULT_LOCATION, other])
+    assert dates == {DEFAULT_LOCATION["id"]: "2025-03-31", "other": START}
+
+def test_update_keeps_the_dates_of_other_locations(aws):
+    from src.data.utils import update_manifest
+    manifest = update_manifest({"locations": {"a": "2025-03-31", "b": "2025-02-28"}}, {"b": "2025-03-31"})
+    assert manifest == {"last_updated_date": "2025-03-31", "locations": {"a": "2025-03-31", "b": "2025-03-31"}}
+
+def test_new_location_is_backfilled(aws, pipeline):
+    from src.shared.partitions import DEFAULT_LOCATION, partition_key
+    other = {"id": "other", "lat": 45.0, "long": -75.0}
+    pipeline([DEFAULT_LOCATION])
+    through = _manifest(aws, "raw")["locations"][DEFAULT_LOCATION["id"]]
+
+    weather_calls = aws.open_meteo.requests["weather_api"]
+    pipeline([DEFAULT_LOCATION, other])
+    # the production site is up to date, only the new site is fetched, from the default start
+    assert aws.open_meteo.requests["weather_api"] > weather_calls
+    for type in ("raw", "processed"):
+        assert _manifest(aws, type)["locations"] == {DEFAULT_LOCATION["id"]: through, "other": through}
+    first = pd.Timestamp(START) + pd.Timedelta(days=1)
+    assert (REPO, f"main/{partition_key('processed', 'other', first.year, first.month)}") in aws.s3.objects
+
+def test_local_dates_keep_the_local_day():
+    from src.data.utils import local_dates
+    stamps = pd.Series(["2025-01-31 05:00:00+00:00", "2025-01-30 15:00:00+00:00"])
+    assert local_dates(stamps).tolist() == [pd.Timestamp("2025-01-31"), pd.Timestamp("2025-01-30")]
+    assert local_dates(stamps[1:], "Asia/Tokyo").tolist() == [pd.Timestamp("2025-01-31")]
+
+def test_fake_days_start_at_local_midnight(aws):
+    from src.api.open_meteo import get_open_meteo_api
+    from src.data.extract import fetch_data_from_api
+    df = fetch_data_from_api("2025-01-01", "2025-01-31", get_open_meteo_api())
+    assert df["date"].iloc[-1] == pd.Timestamp("2025-01-31 05:00", tz="UTC")
@@ -0,0 +1,67 @@
+import sys
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+@pytest.fixture(scope="module")
+def deploy():
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+    import deploy_to_lambda
+    return deploy_to_lambda
+
+def _closure(deploy, entry: str) -> set[str]:
+    return {p.relative_to(deploy.PROJECT_ROOT).as_posix() for p in deploy.import_closure(entry)}
+
+def test_extract_bundle_is_its_import_closure(deploy):
+    files = _closure(deploy, "src/data/extract.py")
+    assert {
+        "src/data/extract.py", "src/data/utils.py", "src/data/hourly.py",
+        "src/api/__init__.py", "src/api/open_meteo.py",
+        "src/ds/__init__.py", "src/ds/lakefs_ds.py", "src/ds/clients.py",
+        "src/shared/__init__.py", "src/shared/partitions.py", "src/shared/tracing.py"
+    } <= files
+    assert not any(f.startswith(("src/model/", "src/monitoring/", "benchmarks/", "scripts/")) for f in files)
+
+def test_every_handler_bundle_contains_its_local_imports(deploy):
+    for entry in deploy.function_to_handler.values():
+        files = _closure(deploy, entry)
+        assert entry in files
+        for path in files:
+            for module in deploy._imported_modules(deploy.PROJECT_ROOT / path):
+                source = deploy._module_file(module)
+                if source is not None:
+                    assert source.relative_to(deploy.PROJECT_ROOT).as_posix() in files, (entry, module)
+
+def test_validate_model_bundle_leaves_out_the_data_pipeline(deploy):
+    files = _closure(deploy, "src/model/validate_model.py")
+    assert "src/ds/clients.py" in files
+    assert not any(f.startswith("src/data/") for f in files)
+
+def test_zip_hash_is_deterministic(deploy, tmp_path):
+    files = deploy.import_closure("src/model/validate_model.py")
+    first = deploy.create_lambda_zip(tmp_path / "a.zip", files)
+    second = deploy.create_lambda_zip(tmp_path / "b.zip", list(reversed(files)))
+    assert first == second
+    assert (tmp_path / "a.zip").read_bytes() == (tmp_path / "b.zip").read_bytes()
+
+def test_function_missing_in_aws_is_skipped(deploy, tmp_path):
+    class ResourceNotFoundException(Exception):
+        pass
+
+    class Client:
+        class exceptions:
+            pass
+        exceptions.ResourceNotFoundException = ResourceNotFoundException
+        uploads = 0
+
+        def get_function(self, FunctionName):
+            raise ResourceNotFoundException(FunctionName)
+
+        def update_function_code(self, **_):
+            Client.uploads += 1
+
+    result = deploy.deploy(Client(), "monitor-model-performance", "src/monitoring/performance_monitor.py", tmp_path)
+    assert result == "missing"
+    assert Client.uploads == 0
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+from datetime import datetime, timezone
+
+BUCKET = "weather-model-478492276227"
+
+@pytest.fixture
+def history(aws):
+    from src.ds import get_s3_store
+    from src.monitoring.drift_history import DriftHistory
+    return lambda: DriftHistory(get_s3_store(BUCKET))
+
+def _details(**drifted) -> dict:
+    return {
+        col: {"D": d, "p_value": 0.001 if flag else 0.5, "missing_delta": 0.0,
+              "missing_flag": False, "ks_flag": flag, "drift": flag}
+        for col, (d, flag) in drifted.items()
+    }
+
+def _run(history, day: int, window: int | None = None, **drifted) -> str:
+    return history.record(_details(**drifted), any(f for _, f in drifted.values()), window,
+                          run_time=datetime(2025, 1, day, tzinfo=timezone.utc))
+
+def test_runs_are_stored_and_indexed(history):
+    h = history()
+    run_id = _run(h, 1, a=(0.1, False), b=(0.4, True))
+    assert run_id == "20250101T000000"
+    rows = h.load_run(run_id)
+    assert sorted(rows["feature"]) == ["a", "b"]
+    assert rows.set_index("feature").loc["b", "D"] == pytest.approx(0.4)
+    # the index survives a new instance
+    run = history().index["runs"][0]
+    assert run["overall"] and run["drifted"] == ["b"]
+    assert run["key"].startswith("monitoring/drift_history/date=2025-01-01/")
+    assert history().load_run("missing") is None
+
+def test_d_series_stay_aligned_with_runs(history):
+    h = history()
+    _run(h, 1, a=(0.1, False))
+    _run(h, 2, a=(0.2, False), b=(0.3, False))
+    _run(h, 3, b=(0.5, True))
+    trend = history().d_statistic_trend("a")
+    assert trend["D"].tolist()[:2] == [0.1, 0.2]
+    assert pd.isna(trend["D"].tolist()[2])
+    assert history().d_statistic_trend("b", n=2)["D"].tolist() == [0.3, 0.5]
+
+def test_drifting_features_are_counted_per_window(history):
+    h = history()
+    _run(h, 1, a=(0.4, True), b=(0.4, True))
+    _run(h, 2, a=(0.4, True))
+    _run(h, 3, a=(0.1, False), b=(0.4, True))
+    _run(h, 3, window=7, b=(0.4, True))
+    assert h.features_drifting_in_last_runs(3) == {"a": 2, "b": 2}
+    assert h.features_drifting_in_last_runs(2) == {"a": 1, "b": 1}
+    assert h.features_drifting_in_last_runs(5, window=7) == {"b": 1}
+    assert h.d_statistic_trend("b", window=7)["run_id"].tolist() == ["20250103T000000-w7"]
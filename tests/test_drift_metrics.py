@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.monitoring.drift_metrics import (
+    binned_counts, chi_square_predictions, code_counts, histogram_drift_metrics,
+    jensen_shannon, psi, shared_bin_edges, wasserstein
+)
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(0)
+    ref = rng.normal(0, 1, (2000, 2))
+    cur = np.column_stack([rng.normal(0, 1, 1000), rng.normal(1.5, 1, 1000)])
+    return ref, cur
+
+def test_counts_use_the_reference_bins(samples):
+    ref, cur = samples
+    edges = shared_bin_edges(ref, 10)
+    counts = binned_counts(ref, edges)
+    # quantile bins hold a tenth of the reference each
+    assert counts.sum(axis=0).tolist() == [2000, 2000]
+    assert np.allclose(counts, 200, atol=1)
+    # values beyond the reference range land in the outer bins, NaNs are skipped
+    outside = np.array([[-100.0, np.nan], [100.0, 0.0]])
+    assert binned_counts(outside, edges)[[0, -1], 0].tolist() == [1, 1]
+    assert binned_counts(outside, edges)[:, 1].sum() == 1
+
+def test_psi_matches_its_definition():
+    ref = np.array([[50.0], [30.0], [20.0]])
+    cur = np.array([[20.0], [30.0], [50.0]])
+    p, q = np.array([0.5, 0.3, 0.2]), np.array([0.2, 0.3, 0.5])
+    assert psi(ref, cur)[0] == pytest.approx(np.sum((q - p) * np.log(q / p)))
+
+def test_jensen_shannon_matches_scipy():
+    distance = pytest.importorskip("scipy.spatial.distance")
+    ref = np.array([[10.0], [0.0], [30.0], [60.0]])
+    cur = np.array([[25.0], [25.0], [25.0], [25.0]])
+    expected = distance.jensenshannon(ref[:, 0], cur[:, 0], base=2)
+    assert jensen_shannon(ref, cur)[0] == pytest.approx(expected)
+
+def test_wasserstein_of_a_shift_is_close_to_the_shift():
+    edges = np.arange(0.0, 11.0)[:, None]
+    ref = np.zeros((10, 1))
+    cur = np.zeros((10, 1))
+    ref[2, 0] = cur[5, 0] = 1
+    assert wasserstein(ref, cur, edges)[0] == pytest.approx(3.0)
+
+def test_only_the_shifted_column_is_flagged(samples):
+    ref, cur = samples
+    metrics = histogram_drift_metrics(ref, cur, ["same", "shifted"])
+    assert not metrics["same"]["psi_flag"] and metrics["shifted"]["psi_flag"]
+    assert metrics["shifted"]["wasserstein"] > metrics["same"]["wasserstein"]
+    assert 0 <= metrics["same"]["jensen_shannon"] < metrics["shifted"]["jensen_shannon"] <= 1
+
+def test_column_without_data_has_no_metrics(samples):
+    ref, cur = samples
+    cur = cur.copy()
+    cur[:, 1] = np.nan
+    metrics = histogram_drift_metrics(ref, cur, ["a", "b"])
+    assert metrics["b"] == {"psi": None, "wasserstein": None, "jensen_shannon": None, "psi_flag": False}
+
+def test_chi_square_matches_scipy():
+    stats = pytest.importorskip("scipy.stats")
+    ref_counts = {"0.0": 500, "3.0": 300, "61.0": 200}
+    predictions = pd.Series([0.0] * 40 + [3.0] * 40 + [61.0] * 20)
+    result = chi_square_predictions(ref_counts, predictions)
+    ref = np.array([500.5, 300.5, 200.5])
+    expected = stats.chisquare([40, 40, 20], ref / ref.sum() * 100)
+    assert result["statistic"] == pytest.approx(expected.statistic)
+    assert result["p_value"] == pytest.approx(expected.pvalue, rel=1e-9)
+    assert result["dof"] == 2
+
+def test_chi_square_flags_an_unseen_code():
+    ref_counts = code_counts(pd.Series([0, 3, 3, 61] * 100))
+    result = chi_square_predictions(ref_counts, pd.Series([95.0] * 50))
+    assert result["drift"] and result["dof"] == 3
+
+def test_chi_square_needs_two_codes():
+    assert chi_square_predictions({"0.0": 10}, pd.Series([0.0]))["statistic"] is None
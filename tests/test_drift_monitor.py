@@ -0,0 +1,54 @@
+import io
+import pandas as pd
+import pytest
+
+BUCKET = "weather-model-478492276227"
+LOG_KEY = "logs/daily_predictions.csv"
+
+@pytest.fixture
+def monitor_factory(aws):
+    from src.ds import get_s3_store
+    from src.monitoring.drift_monitor import StreamingDriftMonitor
+    return lambda windows=[2, 3]: StreamingDriftMonitor(get_s3_store(BUCKET), ["x"], windows)
+
+def _log(aws, df: pd.DataFrame):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    aws.s3.put_object(Bucket=BUCKET, Key=LOG_KEY, Body=buffer.getvalue().encode("utf-8"))
+
+def _append(aws, rows: str):
+    body = aws.s3.objects[(BUCKET, LOG_KEY)]
+    aws.s3.put_object(Bucket=BUCKET, Key=LOG_KEY, Body=body + rows.encode("utf-8"))
+
+def _run(monitor_factory):
+    monitor = monitor_factory()
+    monitor.update()
+    monitor.save()
+    return monitor
+
+def test_windows_cover_days_not_rows(aws, monitor_factory):
+    days = ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"]
+    _log(aws, pd.DataFrame({
+        "date": days * 2,
+        "location": ["a"] * 4 + ["b"] * 4,
+        "x": [1.0, 2.0, 3.0, 4.0, 10.0, 20.0, 30.0, 40.0]
+    }))
+    monitor = _run(monitor_factory)
+    assert monitor.window_dates(2) == ("2024-01-03", "2024-01-04")
+    assert sorted(monitor.window(2)["x"]) == [3.0, 4.0, 30.0, 40.0]
+    # the buffer holds the largest window's days only
+    assert len(monitor.window(3)) == 6
+
+def test_rescored_day_keeps_its_latest_row(aws, monitor_factory):
+    _log(aws, pd.DataFrame({"date": ["2024-01-01", "2024-01-02"], "location": ["a", "a"], "x": [1.0, 2.0]}))
+    _run(monitor_factory)
+    # re-scoring an older day after the buffer was filled
+    _append(aws, "2024-01-01,a,5.0\n2024-01-01,a,6.0\n")
+    monitor = _run(monitor_factory)
+    assert monitor.window_dates(2) == ("2024-01-01", "2024-01-02")
+    assert monitor.window(2)["x"].tolist() == [6.0, 2.0]
+
+def test_rows_logged_without_a_location(aws, monitor_factory):
+    _log(aws, pd.DataFrame({"date": ["2024-01-01", "2024-01-01", "2024-01-02"], "x": [1.0, 2.0, 3.0]}))
+    monitor = _run(monitor_factory)
+    assert monitor.window(3)["x"].tolist() == [2.0, 3.0]
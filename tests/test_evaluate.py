@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from src.model.evaluate import compute_metrics, slice_metrics, time_ordered_folds
+
+metrics = pytest.importorskip("sklearn.metrics")
+
+@pytest.fixture
+def labels():
+    rng = np.random.default_rng(0)
+    codes = np.array([0, 1, 2, 3, 51, 61, 71])
+    y_true = rng.choice(codes, 500)
+    # mostly right, some classes never predicted, one class only predicted
+    y_pred = np.where(rng.uniform(size=500) < 0.6, y_true, rng.choice([0, 3, 61, 95], 500))
+    return y_true, y_pred
+
+def test_metrics_match_sklearn(labels):
+    y_true, y_pred = labels
+    ours = compute_metrics(y_true, y_pred)
+    assert ours["accuracy"] == pytest.approx(metrics.accuracy_score(y_true, y_pred))
+    for name, fn in [("precision", metrics.precision_score), ("recall", metrics.recall_score), ("f1_score", metrics.f1_score)]:
+        assert ours[name] == pytest.approx(fn(y_true, y_pred, average="weighted", zero_division=0))
+    assert ours["mcc"] == pytest.approx(metrics.matthews_corrcoef(y_true, y_pred))
+    assert ours["confusion_matrix"] == metrics.confusion_matrix(y_true, y_pred).tolist()
+
+def test_classification_report_matches_sklearn(labels):
+    y_true, y_pred = labels
+    ours = compute_metrics(y_true, y_pred)["classification_report"]
+    theirs = metrics.classification_report(y_true, y_pred, output_dict=True, zero_division=0)
+    assert set(ours) == set(theirs)
+    for key, row in theirs.items():
+        if key == "accuracy":
+            assert ours[key] == pytest.approx(row)
+            continue
+        for field, value in row.items():
+            assert ours[key][field] == pytest.approx(value), (key, field)
+
+def test_slices_match_per_slice_sklearn(labels):
+    y_true, y_pred = labels
+    months = np.arange(len(y_true)) % 12 + 1
+    slices = slice_metrics(y_true, y_pred, months)
+    assert set(slices) == {str(m) for m in range(1, 13)}
+    for month in (1, 7, 12):
+        mask = months == month
+        assert slices[str(month)]["accuracy"] == pytest.approx(metrics.accuracy_score(y_true[mask], y_pred[mask]))
+        assert slices[str(month)]["f1_score"] == pytest.approx(
+            metrics.f1_score(y_true[mask], y_pred[mask], average="weighted", zero_division=0)
+        )
+        assert slices[str(month)]["support"] == mask.sum()
+
+def test_single_class_mcc_is_zero():
+    assert compute_metrics([3, 3, 3], [3, 3, 3])["mcc"] == 0.0
+
+def test_time_ordered_folds_expand_and_never_look_ahead():
+    folds = time_ordered_folds(60, n_splits=5)
+    assert len(folds) == 5
+    for i, (train, test) in enumerate(folds):
+        assert train.max() < test.min()
+        assert len(test) == 10
+        assert len(train) == 10 * (i + 1)
+    with pytest.raises(ValueError):
+        time_ordered_folds(3, n_splits=5)
@@ -0,0 +1,58 @@
+import json
+import pytest
+
+BUCKET = "weather-model-478492276227"
+
+@pytest.fixture
+def feature_list(aws, monkeypatch):
+    from src.shared import feature_list
+    monkeypatch.setattr(feature_list, "_cache", {"etag": None, "feature_list": None, "checked_at": None})
+    return feature_list
+
+def _promote(aws, features: list[str], version: str):
+    aws.s3.put_object(
+        Bucket=BUCKET,
+        Key="features/current.json",
+        Body=json.dumps({"version": version, "features": features})
+    )
+
+def _past_interval(feature_list):
+    feature_list._cache["checked_at"] -= feature_list.FEATURE_LIST_CHECK_INTERVAL + 1
+
+def test_every_feature_is_used_without_a_list(aws, feature_list):
+    from src.shared.columns import MODEL_FEATURES
+    assert feature_list.active_model_features() == MODEL_FEATURES
+
+def test_list_is_checked_once_per_interval(aws, feature_list):
+    from src.shared.columns import MODEL_FEATURES
+    _promote(aws, MODEL_FEATURES[:2], "job-1")
+    assert feature_list.active_model_features() == MODEL_FEATURES[:2]
+    assert feature_list.active_model_features() == MODEL_FEATURES[:2]
+    assert aws.s3.requests["HeadObject"] == 1
+    assert aws.s3.requests["GetObject"] == 1
+
+def test_unchanged_list_is_not_downloaded_again(aws, feature_list):
+    from src.shared.columns import MODEL_FEATURES
+    _promote(aws, MODEL_FEATURES[:2], "job-1")
+    feature_list.load_feature_list()
+    _past_interval(feature_list)
+    feature_list.load_feature_list()
+    assert aws.s3.requests["HeadObject"] == 2
+    assert aws.s3.requests["GetObject"] == 1
+
+def test_new_promotion_reaches_a_warm_container(aws, feature_list):
+    from src.shared.columns import MODEL_FEATURES
+    _promote(aws, MODEL_FEATURES[:2], "job-1")
+    feature_list.load_feature_list()
+    _promote(aws, MODEL_FEATURES[:3], "job-2")
+    _past_interval(feature_list)
+    assert feature_list.load_feature_list()["version"] == "job-2"
+    assert feature_list.active_model_features() == MODEL_FEATURES[:3]
+
+def test_removed_list_falls_back_to_every_feature(aws, feature_list):
+    from src.shared.columns import MODEL_FEATURES
+    _promote(aws, MODEL_FEATURES[:2], "job-1")
+    feature_list.load_feature_list()
+    del aws.s3.objects[(BUCKET, "features/current.json")]
+    _past_interval(feature_list)
+    assert feature_list.active_model_features() == MODEL_FEATURES
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from src.model.feature_selection import select_features, validation_split
+
+def test_validation_split_holds_out_the_latest_rows():
+    fit_idx, val_idx = validation_split(10, 0.2)
+    assert fit_idx.tolist() == list(range(8))
+    assert val_idx.tolist() == [8, 9]
+
+def test_validation_split_rejects_empty_blocks():
+    with pytest.raises(ValueError):
+        validation_split(3, 0.2)
+
+def test_select_features_only_uses_training_rows():
+    rng = np.random.default_rng(0)
+    signal = rng.integers(0, 3, 400)
+    X = np.column_stack([signal, signal * 2.0, rng.normal(size=400)])
+    y = signal
+    feature_list = select_features(
+        X, y, ["signal", "copy", "noise"],
+        {"n_estimators": 10, "random_state": 0, "n_jobs": 1}
+    )
+    assert len(set(feature_list["features"]) & {"signal", "copy"}) == 1
+    assert "noise" in feature_list["features"]
+    assert feature_list["validation_fraction"] == 0.2
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+OFFSET = -5 * 3600
+
+@pytest.fixture
+def hourly(aws):
+    from src.data import hourly
+    return hourly
+
+@pytest.fixture
+def hours():
+    # two local days in New York winter time, starting at local midnight
+    time = pd.date_range("2025-01-01 05:00", periods=48, freq="h", tz="UTC")
+    hour = np.arange(48) % 24
+    return pd.DataFrame({
+        "time": time,
+        "temperature_2m": np.where(hour == 15, 10.0, 0.0) + np.arange(48) // 24,
+        "precipitation": np.where(hour == 7, 2.0, 0.0) * (np.arange(48) < 24),
+        "wind_speed_10m": np.ones(48),
+        "wind_direction_10m": np.full(48, 90.0),
+        "is_day": ((hour >= 7) & (hour < 17)).astype(float),
+        "pressure_msl": 1000.0 + np.arange(48)
+    })
+
+def test_local_days_start_at_local_midnight(hourly):
+    times = pd.Series(pd.to_datetime(["2025-01-01 04:59", "2025-01-01 05:00"], utc=True))
+    assert hourly.local_days(times, OFFSET).tolist() == [
+        pd.Timestamp("2024-12-31 05:00", tz="UTC"), pd.Timestamp("2025-01-01 05:00", tz="UTC")
+    ]
+
+def test_hours_are_reduced_per_local_day(hourly, hours):
+    features = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum", "precipitation_hours",
+                "daylight_duration", "wind_direction_10m_dominant", "rain_sum"]
+    daily = hourly.aggregate_daily(hours, features, OFFSET)
+    assert daily["date"].tolist() == [pd.Timestamp("2025-01-01 05:00", tz="UTC"), pd.Timestamp("2025-01-02 05:00", tz="UTC")]
+    # columns the hourly data cannot provide are left out, the rest keeps the request order
+    assert list(daily.columns) == ["date"] + [f for f in features if f != "rain_sum"]
+    assert daily["temperature_2m_max"].tolist() == [10.0, 11.0]
+    assert daily["temperature_2m_min"].tolist() == [0.0, 1.0]
+    assert daily["precipitation_sum"].tolist() == [2.0, 0.0]
+    assert daily["precipitation_hours"].tolist() == [1.0, 0.0]
+    assert daily["daylight_duration"].tolist() == [36000.0, 36000.0]
+    assert daily["wind_direction_10m_dominant"].tolist() == pytest.approx([90.0, 90.0])
+    assert (daily.drop(columns="date").dtypes == np.float32).all()
+
+def test_a_utc_grouping_would_split_the_day(hourly, hours):
+    assert len(hourly.aggregate_daily(hours, ["precipitation_sum"], 0)) == 3
+
+def test_intraday_peaks_use_local_hours(hourly, hours):
+    intraday = hourly.intraday_features(hours, OFFSET)
+    assert intraday["temperature_2m_max_hour"].tolist() == [15.0, 15.0]
+    assert intraday["temperature_2m_range"].tolist() == [10.0, 10.0]
+    assert intraday["precipitation_peak_hour"].iloc[0] == 7.0
+    # a dry day has no peak
+    assert np.isnan(intraday["precipitation_peak_hour"].iloc[1])
+    assert intraday["pressure_msl_change"].tolist() == [23.0, 23.0]
+
+def test_daily_only_features_are_not_aggregated(hourly):
+    assert hourly.daily_only_features(["temperature_2m_max", "sunrise", "wind_direction_10m_dominant"]) == ["sunrise"]
@@ -0,0 +1,77 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("joblib")
+
+class SumModel:
+    """Predicts a weighted sum, so the result depends on the column order."""
+
+    def predict(self, X):
+        return X @ np.arange(1, X.shape[1] + 1, dtype=np.float32)
+
+@pytest.fixture
+def inference():
+    from src.model import inference
+    return inference
+
+@pytest.fixture
+def predict(aws, monkeypatch):
+    from src.model import predict
+    from src.shared import feature_list
+    monkeypatch.setattr(feature_list, "_cache", {"etag": None, "feature_list": None, "checked_at": None})
+    return predict
+
+def _frame(features: list[str], rows: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(size=(rows, len(features))).astype(np.float32), columns=features)
+
+def test_npy_payload_round_trips(inference, predict):
+    from src.shared.columns import MODEL_FEATURES
+    X = _frame(MODEL_FEATURES)
+    parsed = inference.input_fn(predict.to_npy_payload(X), "application/x-npy")
+    assert parsed["columns"] == MODEL_FEATURES
+    assert parsed["X"].dtype == np.float32
+    np.testing.assert_array_equal(parsed["X"], X.to_numpy())
+
+def test_payload_is_reordered_to_the_training_order(inference):
+    model = SumModel()
+    model.training_features_ = ["a", "b", "c"]
+    X = _frame(["a", "b", "c"])
+    expected = model.predict(X.to_numpy())
+    shuffled = X[["c", "a", "b"]]
+    parsed = {"columns": list(shuffled.columns), "X": shuffled.to_numpy()}
+    np.testing.assert_allclose(inference.predict_fn(parsed, model), expected)
+
+def test_payload_missing_a_training_feature_is_rejected(inference):
+    model = SumModel()
+    model.training_features_ = ["a", "b", "c"]
+    X = _frame(["a", "b"])
+    with pytest.raises(ValueError, match="missing model features"):
+        inference.predict_fn({"columns": ["a", "b"], "X": X.to_numpy()}, model)
+
+def test_csv_payloads_still_work(inference):
+    parsed = inference.input_fn(b"1,2,3\n4,5,6\n", "text/csv")
+    assert parsed["columns"] is None
+    assert SumModel().predict(parsed["X"]).tolist() == [14.0, 32.0]
+
+def test_model_fn_returns_the_estimator(inference, tmp_path):
+    import json
+    import joblib
+    joblib.dump(SumModel(), tmp_path / "model.pkl")
+    (tmp_path / "features.json").write_text(json.dumps({"features": ["a", "b"]}))
+    model = inference.model_fn(str(tmp_path))
+    assert isinstance(model, SumModel)
+    assert model.training_features_ == ["a", "b"]
+
+def test_npy_chunks_are_sized_by_the_serialized_features(aws, predict, monkeypatch):
+    from src.shared.columns import MODEL_FEATURES
+    monkeypatch.setattr(predict, "ENDPOINT_CONTENT_TYPE", "application/x-npy")
+    # extra columns that never reach the payload must not shrink the chunks
+    X = _frame(MODEL_FEATURES, rows=100).assign(**{f"extra_{i}": 0.0 for i in range(50)})
+    max_bytes = 4 * len(MODEL_FEATURES) * 10
+    chunks = predict.chunk_rows(X, max_bytes=max_bytes)
+    assert [len(c) for c in chunks] == [10] * 10
+    records = np.load(io.BytesIO(predict.to_npy_payload(chunks[0])), allow_pickle=False)
+    assert records.nbytes == max_bytes
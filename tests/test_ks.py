@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+stats = pytest.importorskip("scipy.stats")
+
+@pytest.fixture
+def drift(aws):
+    from src.monitoring import check_data_drift
+    return check_data_drift
+
+@pytest.mark.parametrize("n, m", [(5, 7), (10, 10), (8, 20), (30, 45), (100, 14)])
+def test_exact_pvalue_matches_scipy(drift, n, m):
+    rng = np.random.default_rng(n * 1000 + m)
+    x = rng.normal(size=n)
+    y = rng.normal(0.5, 1.2, size=m)
+    expected = stats.ks_2samp(x, y, method="exact")
+    d = drift._ks_2samp_statistic(x, y)
+    assert d == pytest.approx(expected.statistic)
+    assert drift._ks_2samp_exact_pvalue(d, n, m) == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-12)
+    # argument order does not matter
+    assert drift._ks_2samp_exact_pvalue(d, m, n) == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-12)
+
+def test_matrix_statistic_matches_scipy_with_nans_and_ties(drift):
+    rng = np.random.default_rng(1)
+    ref = np.round(rng.normal(size=(200, 4)), 1)
+    cur = np.round(rng.normal(0.3, 1, size=(40, 4)), 1)
+    ref[rng.uniform(size=ref.shape) < 0.1] = np.nan
+    cur[rng.uniform(size=cur.shape) < 0.1] = np.nan
+    # a constant column and one without current values
+    ref[:, 2], cur[:, 2] = 1.0, 1.0
+    cur[:, 3] = np.nan
+    D, n, m = drift._ks_2samp_matrix(ref, cur)
+    for i in range(3):
+        x, y = ref[:, i][~np.isnan(ref[:, i])], cur[:, i][~np.isnan(cur[:, i])]
+        assert D[i] == pytest.approx(stats.ks_2samp(x, y).statistic)
+        assert (n[i], m[i]) == (len(x), len(y))
+    assert np.isnan(D[3]) and m[3] == 0
+
+def test_vectorized_pvalue_matches_scalar(drift):
+    d = np.array([0.0, 0.05, 0.1, 0.3, 0.9, np.nan])
+    n = np.array([500, 500, 1000, 300, 200, 100])
+    m = np.array([400, 300, 900, 250, 150, 0])
+    p = drift._ks_2samp_pvalue_vec(d, n, m)
+    for i in range(5):
+        assert p[i] == pytest.approx(drift._ks_2samp_pvalue(d[i], n[i], m[i]))
+    assert np.isnan(p[5])
+
+def test_small_windows_use_exact_pvalues(drift):
+    rng = np.random.default_rng(2)
+    ref = pd.DataFrame({"a": rng.normal(size=60), "b": rng.normal(size=60)})
+    cur = pd.DataFrame({"a": rng.normal(1.0, 1, size=14), "b": rng.normal(size=14)})
+    _, details = drift.detect_data_drift(ref, cur)
+    for col in ("a", "b"):
+        expected = stats.ks_2samp(ref[col], cur[col], method="exact")
+        assert details[col]["D"] == pytest.approx(expected.statistic)
+        assert details[col]["p_value"] == pytest.approx(expected.pvalue, rel=1e-9)
@@ -0,0 +1,55 @@
+import io
+import json
+import pickle
+import tarfile
+import pytest
+
+joblib = pytest.importorskip("joblib")
+
+BUCKET = "weather-model-478492276227"
+
+@pytest.fixture
+def local_model(aws, tmp_path, monkeypatch):
+    from src.model import local_model
+    monkeypatch.setattr(local_model, "MODEL_DIR", str(tmp_path / "model"))
+    monkeypatch.setattr(local_model, "_cache", {"etag": None, "model": None, "features": None})
+    monkeypatch.setattr(local_model, "_version", {"etag": None, "checked_at": None})
+    return local_model
+
+def _archive(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def _model_bytes(model) -> bytes:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getvalue()
+
+def test_missing_artifact_is_not_looked_up_on_every_call(aws, local_model):
+    assert local_model.get_model_version() is None
+    assert local_model.get_model_version() is None
+    assert aws.s3.requests["HeadObject"] == 1
+
+def test_members_are_extracted_by_basename_only(aws, local_model, tmp_path):
+    aws.s3.put_object(Bucket=BUCKET, Key=local_model.MODEL_KEY, Body=_archive({
+        "../../escaped.txt": b"outside",
+        "nested/dir/model.pkl": _model_bytes({"kind": "model"}),
+        "features.json": json.dumps({"features": ["a", "b"]}).encode("utf-8"),
+        "code/train.py": b"print('not extracted')"
+    }))
+    model, features = local_model.get_local_model()
+    assert model == {"kind": "model"}
+    assert features == ["a", "b"]
+    assert sorted(p.name for p in (tmp_path / "model").iterdir()) == ["features.json", "model.pkl"]
+    assert not (tmp_path / "escaped.txt").exists()
+
+def test_model_is_downloaded_once_per_etag(aws, local_model):
+    aws.s3.put_object(Bucket=BUCKET, Key=local_model.MODEL_KEY, Body=_archive({"model.pkl": _model_bytes(1)}))
+    local_model.get_local_model()
+    local_model.get_local_model()
+    assert aws.s3.requests["GetObject"] == 1
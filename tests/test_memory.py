@@ -0,0 +1,53 @@
+import json
+import pandas as pd
+import pytest
+from src.shared import memory, tracing
+
+@pytest.fixture(autouse=True)
+def clean():
+    memory.reset()
+    yield
+    memory.reset()
+
+def test_checkpoint_records_the_frame_size():
+    df = pd.DataFrame({"small": [1] * 100, "text": ["x" * 50] * 100})
+    entry = memory.checkpoint("loaded", df)
+    assert entry["rows"] == 100 and entry["columns"] == 2
+    assert list(entry["largest_columns"]) == ["text", "small"]
+    assert entry["peak_rss_mb"] > 0
+
+def test_summary_ranks_frames_and_rss_increases(monkeypatch):
+    rss = iter([100.0, 150.0, 120.0, 120.0])
+    monkeypatch.setattr(memory, "rss_mb", lambda: next(rss))
+    memory.checkpoint("a", pd.DataFrame({"x": range(10)}))
+    memory.checkpoint("b", pd.DataFrame({"x": range(1000)}))
+    memory.checkpoint("c")
+    summary = memory.summarize()
+    assert [f["stage"] for f in summary["largest_frames"]] == ["b", "a"]
+    assert summary["largest_increases"] == [{"from": "a", "to": "b", "rss_increase_mb": 50.0}]
+    assert len(summary["checkpoints"]) == 3
+
+def test_handler_result_is_left_unchanged(monkeypatch, capsys):
+    monkeypatch.setattr(memory, "REPORT", True)
+
+    @tracing.traced_handler("fn")
+    def handler(event, context):
+        memory.checkpoint("work")
+        return {"statusCode": 200}
+
+    assert handler({}, None) == {"statusCode": 200}
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines() if l.startswith("{")]
+    report = [l for l in lines if "memory" in l]
+    assert len(report) == 1
+    assert report[0]["Function"] == "fn"
+    assert report[0]["memory"]["checkpoints"][0]["stage"] == "work"
+
+def test_memory_is_only_reported_when_enabled(monkeypatch, capsys):
+    monkeypatch.setattr(memory, "REPORT", False)
+
+    @tracing.traced_handler("fn")
+    def handler(event, context):
+        return {"statusCode": 200}
+
+    assert handler({}, None) == {"statusCode": 200}
+    assert '"memory"' not in capsys.readouterr().out
@@ -0,0 +1,36 @@
+import pandas as pd
+from src.shared.partitions import (
+    DEFAULT_LOCATION, months_between, partition_key, plan_partitions, resolve_locations
+)
+
+def test_mid_month_start_keeps_its_month():
+    months = months_between(pd.Timestamp("2024-01-15"), pd.Timestamp("2024-03-01"))
+    assert months == [(2024, 1), (2024, 2), (2024, 3)]
+
+def test_month_edges():
+    assert months_between(pd.Timestamp("2024-01-31"), pd.Timestamp("2024-02-01")) == [(2024, 1), (2024, 2)]
+    assert months_between(pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-29")) == [(2024, 2)]
+    assert months_between(pd.Timestamp("2023-12-31"), pd.Timestamp("2024-01-01")) == [(2023, 12), (2024, 1)]
+    assert months_between(pd.Timestamp("2024-05-10"), pd.Timestamp("2024-05-10")) == [(2024, 5)]
+    assert months_between(pd.Timestamp("2024-05-10"), pd.Timestamp("2024-04-30")) == []
+
+def test_plan_defaults_to_production_site():
+    plan = plan_partitions("raw", pd.Timestamp("2023-11-20"), pd.Timestamp("2024-01-05"))
+    loc = DEFAULT_LOCATION["id"]
+    assert plan == [
+        (loc, f"data/raw/location={loc}/year=2023/month=11/data.csv"),
+        (loc, f"data/raw/location={loc}/year=2023/month=12/data.csv"),
+        (loc, f"data/raw/location={loc}/year=2024/month=1/data.csv"),
+    ]
+
+def test_plan_over_locations_is_location_major():
+    locations = [{"lat": 1.0, "long": 2.0}, {"lat": 3.0, "long": 4.0, "id": "site-b"}]
+    plan = plan_partitions("processed", pd.Timestamp("2024-02-15"), pd.Timestamp("2024-03-15"), locations)
+    assert [loc for loc, _ in plan] == ["1.0000_2.0000", "1.0000_2.0000", "site-b", "site-b"]
+    assert plan[-1][1] == "data/processed/location=site-b/year=2024/month=3/data.csv"
+
+def test_resolve_locations_fills_ids_and_timezone():
+    (loc,) = resolve_locations([{"lat": 43.70641, "long": -79.39859}])
+    assert loc["id"] == "43.7064_-79.3986"
+    assert loc["timezone"] == DEFAULT_LOCATION["timezone"]
+    assert partition_key("hourly", "x", 2024, 7, filename="data.parquet") == "data/hourly/location=x/year=2024/month=7/data.parquet"
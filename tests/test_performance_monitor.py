@@ -0,0 +1,103 @@
+import io
+import json
+import pandas as pd
+import pytest
+
+REPO = "weather-data"
+BUCKET = "weather-model-478492276227"
+LOG_KEY = "logs/daily_predictions.csv"
+
+@pytest.fixture
+def monitor_factory(aws):
+    from src.ds import get_lakefs_store, get_s3_store
+    from src.monitoring.performance_monitor import PerformanceMonitor
+    return lambda: PerformanceMonitor(get_s3_store(BUCKET), get_lakefs_store(REPO, "http://lakefs.local:8000"))
+
+def _put(aws, bucket: str, key: str, body: bytes):
+    aws.s3.put_object(Bucket=bucket, Key=key, Body=body)
+
+def _observe(aws, dates: list[str], codes: list[float]):
+    from src.shared.partitions import DEFAULT_LOCATION, partition_key
+    raw = pd.DataFrame({"date": dates, "weather_code": codes})
+    for (year, month), part in raw.groupby([pd.to_datetime(raw["date"]).dt.year, pd.to_datetime(raw["date"]).dt.month]):
+        key = partition_key("raw", DEFAULT_LOCATION["id"], year, month)
+        _put(aws, REPO, f"main/{key}", part.to_csv(index=False).encode("utf-8"))
+    _put(aws, REPO, "main/data/raw/manifest.json", json.dumps({"last_updated_date": max(dates)}).encode("utf-8"))
+
+def _log(aws, df: pd.DataFrame, **to_csv):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, **to_csv)
+    _put(aws, BUCKET, LOG_KEY, buffer.getvalue().encode("utf-8"))
+
+def _run(monitor_factory) -> dict:
+    monitor = monitor_factory()
+    monitor.ingest_predictions()
+    monitor.join_observations()
+    monitor.save()
+    return monitor.summary()
+
+def test_reset_log_is_not_counted_twice(aws, monitor_factory):
+    dates = ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02"]
+    _observe(aws, dates, [3.0, 61.0, 3.0, 3.0])
+    log = pd.DataFrame({"date": dates[:3], "temperature_2m_max": [1.5, 2.5, 3.5], "prediction": [3.0, 3.0, 3.0]})
+    _log(aws, log)
+    first = _run(monitor_factory)
+    assert first["matched"] == 3 and first["accuracy"] == pytest.approx(2 / 3)
+
+    # predict rewrote the log under another header and appended a day
+    rewritten = pd.concat([log, pd.DataFrame({"date": ["2024-02-02"], "temperature_2m_max": [4.5], "prediction": [3.0]})])
+    _log(aws, rewritten.assign(extra=0.0))
+    second = _run(monitor_factory)
+    assert second["matched"] == 4
+    assert second["accuracy"] == pytest.approx(3 / 4)
+    assert second["months"]["2024-01"]["n"] == 2
+
+def test_appended_rows_are_counted_once(aws, monitor_factory):
+    dates = ["2024-03-01", "2024-03-02"]
+    _observe(aws, dates, [3.0, 3.0])
+    _log(aws, pd.DataFrame({"date": dates[:1], "prediction": [3.0]}))
+    _run(monitor_factory)
+    body = aws.s3.objects[(BUCKET, LOG_KEY)]
+    _put(aws, BUCKET, LOG_KEY, body + b"2024-03-02,1.0\n")
+    summary = _run(monitor_factory)
+    assert summary["matched"] == 2 and summary["accuracy"] == pytest.approx(1 / 2)
+
+def _append(aws, rows: str):
+    body = aws.s3.objects[(BUCKET, LOG_KEY)]
+    _put(aws, BUCKET, LOG_KEY, body + rows.encode("utf-8"))
+
+def test_repredicted_day_replaces_its_count(aws, monitor_factory):
+    dates = ["2024-04-01", "2024-04-02"]
+    _observe(aws, dates, [3.0, 3.0])
+    _log(aws, pd.DataFrame({"date": dates, "prediction": [3.0, 3.0], "model_version": ["m1", "m1"]}))
+    assert _run(monitor_factory)["matched"] == 2
+    # the same model scores the first day again after it was joined
+    _append(aws, "2024-04-01,1.0,m1\n")
+    summary = _run(monitor_factory)
+    assert summary["matched"] == 2
+    assert summary["accuracy"] == pytest.approx(1 / 2)
+
+def test_each_model_version_is_counted_once_per_day(aws, monitor_factory):
+    dates = ["2024-05-01"]
+    _observe(aws, dates, [3.0])
+    _log(aws, pd.DataFrame({"date": dates, "prediction": [3.0], "model_version": ["m1"]}))
+    _run(monitor_factory)
+    _append(aws, "2024-05-01,1.0,m2\n2024-05-01,1.0,m2\n")
+    summary = _run(monitor_factory)
+    assert summary["matched"] == 2
+    assert summary["accuracy"] == pytest.approx(1 / 2)
+
+def test_predictions_are_joined_with_their_own_location(aws, monitor_factory):
+    from src.shared.partitions import DEFAULT_LOCATION, partition_key
+    _observe(aws, ["2024-06-01"], [3.0])
+    other = pd.DataFrame({"date": ["2024-06-01"], "weather_code": [61.0]})
+    _put(aws, REPO, f"main/{partition_key('raw', 'other', 2024, 6)}", other.to_csv(index=False).encode("utf-8"))
+    manifest = {"last_updated_date": "2024-06-01", "locations": {DEFAULT_LOCATION["id"]: "2024-06-01", "other": "2024-06-01"}}
+    _put(aws, REPO, "main/data/raw/manifest.json", json.dumps(manifest).encode("utf-8"))
+    _log(aws, pd.DataFrame({
+        "date": ["2024-06-01", "2024-06-01"],
+        "prediction": [3.0, 61.0],
+        "location": [DEFAULT_LOCATION["id"], "other"]
+    }))
+    summary = _run(monitor_factory)
+    assert summary["matched"] == 2 and summary["accuracy"] == 1.0
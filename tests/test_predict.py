@@ -0,0 +1,60 @@
+import io
+import pandas as pd
+import pytest
+
+BUCKET = "weather-model-478492276227"
+LOG_KEY = "logs/daily_predictions.csv"
+OTHER = {"id": "other", "lat": 45.0, "long": -75.0, "timezone": "America/Toronto"}
+
+@pytest.fixture
+def predict(aws, monkeypatch):
+    from src.api import open_meteo
+    from src.model import predict, prediction_cache
+    from src.shared import feature_list
+    monkeypatch.setattr(open_meteo, "_clients", {})
+    monkeypatch.setattr(feature_list, "_cache", {"etag": None, "feature_list": None, "checked_at": None})
+    monkeypatch.setattr(prediction_cache, "_memory", {"version": None, "entries": {}})
+    monkeypatch.setattr(predict, "_endpoint_model", {"version": None, "checked_at": None})
+    return predict
+
+def _log(aws) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(aws.s3.objects[(BUCKET, LOG_KEY)]))
+
+def test_chunks_keep_the_row_order_and_the_size_limits(aws, predict):
+    from src.shared.columns import MODEL_FEATURES
+    X = pd.DataFrame({c: [0.5] * 1000 for c in MODEL_FEATURES})
+    chunks = predict.chunk_rows(X, max_bytes=20000, max_rows=300)
+    assert len(chunks) > 1
+    assert pd.concat(chunks).equals(X)
+    for chunk in chunks:
+        assert len(chunk) <= 300
+        assert len(chunk.to_csv(index=False, header=False).encode("utf-8")) <= 20000
+
+def test_empty_input_has_no_chunks(aws, predict):
+    assert predict.chunk_rows(pd.DataFrame({"a": []})) == []
+
+def test_batch_predictions_are_logged_per_location(aws, predict):
+    from src.shared.partitions import DEFAULT_LOCATION
+    df = predict.get_weather_codes("2025-01-01", "2025-01-10", [DEFAULT_LOCATION, OTHER], "endpoint")
+    assert len(df) == 20
+    log = _log(aws)
+    assert len(log) == 20
+    assert sorted(log["location"].unique()) == sorted([DEFAULT_LOCATION["id"], "other"])
+    assert set(log["model_version"]) == {"bench-model"}
+
+def test_batch_rescoring_is_served_from_the_cache(aws, predict):
+    first = predict.get_weather_codes("2025-01-01", "2025-01-10", [OTHER], "endpoint")
+    invocations = aws.runtime.requests["InvokeEndpoint"]
+    # one more day: only that day is scored and logged
+    second = predict.get_weather_codes("2025-01-01", "2025-01-11", [OTHER], "endpoint")
+    assert aws.runtime.requests["InvokeEndpoint"] == invocations + 1
+    assert second["prediction"].head(10).tolist() == first["prediction"].tolist()
+    assert len(_log(aws)) == 11
+
+def test_batch_and_single_date_share_cache_entries(aws, predict):
+    from src.shared.partitions import DEFAULT_LOCATION
+    today = pd.Timestamp.now().strftime("%Y-%m-%d")
+    predict.get_weather_codes(today, today, [DEFAULT_LOCATION], "endpoint")
+    invocations = aws.runtime.requests["InvokeEndpoint"]
+    predict.get_weather_code("endpoint")
+    assert aws.runtime.requests["InvokeEndpoint"] == invocations
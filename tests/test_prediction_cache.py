@@ -0,0 +1,65 @@
+import pytest
+
+BUCKET = "weather-model-478492276227"
+
+@pytest.fixture
+def predict(aws, monkeypatch):
+    from src.api import open_meteo
+    from src.model import predict, prediction_cache
+    from src.shared import feature_list
+    monkeypatch.setattr(open_meteo, "_clients", {})
+    monkeypatch.setattr(feature_list, "_cache", {"etag": None, "feature_list": None, "checked_at": None})
+    monkeypatch.setattr(prediction_cache, "_memory", {"version": None, "entries": {}})
+    monkeypatch.setattr(predict, "_endpoint_model", {"version": None, "checked_at": None})
+    return predict
+
+def _cache_keys(aws) -> list[str]:
+    return sorted(k for b, k in aws.s3.objects if b == BUCKET and k.startswith("cache/predictions/"))
+
+def _forget_in_memory(monkeypatch):
+    from src.model import prediction_cache
+    monkeypatch.setattr(prediction_cache, "_memory", {"version": None, "entries": {}})
+
+def test_second_call_is_served_from_the_cache(aws, predict, monkeypatch):
+    first = predict.get_weather_code("endpoint")
+    assert aws.runtime.requests["InvokeEndpoint"] == 1
+    (key,) = _cache_keys(aws)
+    assert key.startswith("cache/predictions/version=bench-model/")
+
+    # a cold container finds the entry in S3
+    _forget_in_memory(monkeypatch)
+    weather_calls = aws.open_meteo.requests["weather_api"]
+    assert predict.get_weather_code("endpoint") == first
+    assert aws.runtime.requests["InvokeEndpoint"] == 1
+    assert aws.open_meteo.requests["weather_api"] == weather_calls
+
+def test_redeployed_endpoint_misses_and_drops_old_entries(aws, predict, monkeypatch):
+    predict.get_weather_code("endpoint")
+    aws.sagemaker.deploy(predict.ENDPOINT_NAME, "model-2")
+    # past the re-check interval
+    monkeypatch.setattr(predict, "_endpoint_model", {"version": None, "checked_at": None})
+    predict.get_weather_code("endpoint")
+    assert aws.runtime.requests["InvokeEndpoint"] == 2
+    (key,) = _cache_keys(aws)
+    assert key.startswith("cache/predictions/version=model-2/")
+
+def test_nothing_is_cached_while_the_endpoint_updates(aws, predict):
+    aws.sagemaker.status = "Updating"
+    predict.get_weather_code("endpoint")
+    predict.get_weather_code("endpoint")
+    assert aws.runtime.requests["InvokeEndpoint"] == 2
+    assert _cache_keys(aws) == []
+
+def test_endpoint_is_described_once_per_interval(aws, predict):
+    assert predict.get_serving_model_version("endpoint") == "bench-model"
+    assert predict.get_serving_model_version("endpoint") == "bench-model"
+    assert aws.sagemaker.requests["DescribeEndpoint"] == 1
+
+def test_local_mode_is_keyed_on_the_approved_artifact(aws, predict, monkeypatch):
+    from src.model import local_model
+    monkeypatch.setattr(local_model, "_version", {"etag": None, "checked_at": None})
+    # nothing approved yet: local mode falls back to the endpoint, and so does the key
+    assert predict.get_serving_model_version("local") == "bench-model"
+    monkeypatch.setattr(local_model, "_version", {"etag": None, "checked_at": None})
+    aws.s3.put_object(Bucket=BUCKET, Key=local_model.MODEL_KEY, Body=b"archive")
+    assert predict.get_serving_model_version("local") == f"local-{local_model.get_model_version()}"
@@ -0,0 +1,107 @@
+import io
+import pandas as pd
+import pytest
+
+BUCKET = "logs-bucket"
+KEY = "logs/daily_predictions.csv"
+
+def _csv(df: pd.DataFrame, header: bool = True) -> bytes:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=header)
+    return buffer.getvalue().encode("utf-8")
+
+def _rows(start: str, n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=n, freq="D").strftime("%Y-%m-%d"),
+        "temperature_2m_max": [float(i) for i in range(n)],
+        "prediction": [3.0] * n
+    })
+
+@pytest.fixture
+def store(aws):
+    from src.ds import get_s3_store
+    return get_s3_store(BUCKET)
+
+@pytest.fixture
+def log(aws):
+    from src.monitoring import prediction_log
+    return prediction_log
+
+def test_first_read_returns_everything_and_flags_reset(aws, store, log):
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=_csv(_rows("2024-01-01", 5)))
+    df, cursor = log.read_new_rows(store, None, KEY)
+    assert len(df) == 5
+    assert cursor["reset"] is True
+    assert cursor["offset"] == len(aws.s3.objects[(BUCKET, KEY)])
+
+def test_resume_reads_only_appended_rows(aws, store, log):
+    # larger than the header probe, so a full read would show up in bytes_out
+    body = _csv(_rows("1990-01-01", 10000))
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=body)
+    _, cursor = log.read_new_rows(store, None, KEY)
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=body + _csv(_rows("2030-01-01", 2), header=False))
+    aws.s3.bytes_out = 0
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert df["date"].tolist() == ["2030-01-01", "2030-01-02"]
+    assert cursor["reset"] is False
+    assert aws.s3.bytes_out < len(body)
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert df.empty and cursor["reset"] is False
+
+def test_rewritten_prefix_resets(aws, store, log):
+    rows = _rows("2024-01-01", 5)
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=_csv(rows))
+    _, cursor = log.read_new_rows(store, None, KEY)
+    # same header, longer file, but the earlier rows were re-serialized differently
+    rewritten = pd.concat([rows, _rows("2024-01-06", 1)], ignore_index=True)
+    buffer = io.StringIO()
+    rewritten.to_csv(buffer, index=False, float_format="%.4f")
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=buffer.getvalue().encode("utf-8"))
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert len(df) == 6 and cursor["reset"] is True
+
+def test_cursor_without_checksum_resets(aws, store, log):
+    body = _csv(_rows("2024-01-01", 5))
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=body)
+    header = body[:body.find(b"\n") + 1].decode("utf-8")
+    df, cursor = log.read_new_rows(store, {"offset": len(body), "header": header}, KEY)
+    assert len(df) == 5 and cursor["reset"] is True
+
+def test_append_keeps_existing_bytes(aws, store, log):
+    log.append_rows(store, _rows("2024-01-01", 3), KEY)
+    before = aws.s3.objects[(BUCKET, KEY)]
+    _, cursor = log.read_new_rows(store, None, KEY)
+    # fewer columns than the header, in another order
+    log.append_rows(store, _rows("2024-01-04", 1)[["prediction", "date"]], KEY)
+    after = aws.s3.objects[(BUCKET, KEY)]
+    assert after.startswith(before)
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert cursor["reset"] is False
+    assert df["date"].tolist() == ["2024-01-04"]
+    assert df["temperature_2m_max"].isna().all()
+
+def test_append_with_new_columns_rewrites_and_resets_readers(aws, store, log):
+    log.append_rows(store, _rows("2024-01-01", 3), KEY)
+    _, cursor = log.read_new_rows(store, None, KEY)
+    log.append_rows(store, _rows("2024-01-04", 1).assign(extra=1.0), KEY)
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert cursor["reset"] is True
+    assert len(df) == 4 and "extra" in df.columns
+
+def test_changed_header_resets(aws, store, log):
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=_csv(_rows("2024-01-01", 5)))
+    _, cursor = log.read_new_rows(store, None, KEY)
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=_csv(_rows("2024-01-01", 6).drop(columns=["temperature_2m_max"])))
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert len(df) == 6 and cursor["reset"] is True
+
+def test_shrunk_log_resets(aws, store, log):
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=_csv(_rows("2024-01-01", 10)))
+    _, cursor = log.read_new_rows(store, None, KEY)
+    aws.s3.put_object(Bucket=BUCKET, Key=KEY, Body=_csv(_rows("2024-01-01", 3)))
+    df, cursor = log.read_new_rows(store, cursor, KEY)
+    assert len(df) == 3 and cursor["reset"] is True
+
+def test_missing_log_keeps_cursor(store, log):
+    df, cursor = log.read_new_rows(store, {"offset": 10}, KEY)
+    assert df.empty and cursor == {"offset": 10}
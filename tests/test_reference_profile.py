@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO = "weather-data"
+
+@pytest.fixture
+def reference_profile(aws):
+    from src.monitoring import reference_profile
+    return reference_profile
+
+def _frame(n: int = 50) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    temperature = rng.normal(10, 5, n)
+    temperature[:5] = np.nan
+    return pd.DataFrame({
+        "date": pd.date_range("2025-01-01 05:00", periods=n, freq="D", tz="UTC"),
+        "temperature_2m_mean": temperature,
+        "weather_code": rng.choice([0, 3, 61], n),
+        "month": 1
+    })
+
+def test_small_columns_keep_every_value(reference_profile):
+    df = _frame()
+    profile = reference_profile.build_reference_profile(df, "2025-02-19")
+    entry = profile["columns"]["temperature_2m_mean"]
+    assert entry["exact"] and entry["n"] == 45
+    assert entry["missing_rate"] == pytest.approx(0.1)
+    assert entry["values"] == sorted(df["temperature_2m_mean"].dropna().tolist())
+    # calendar columns are derived from the date, they cannot drift
+    assert "month" not in profile["columns"] and "date" not in profile["columns"]
+    assert sum(profile["weather_code_counts"].values()) == len(df)
+
+def test_large_columns_are_summarized_by_quantiles(reference_profile):
+    entry = reference_profile.build_reference_profile(_frame(500), "v", max_points=100)["columns"]["temperature_2m_mean"]
+    assert not entry["exact"] and len(entry["values"]) == 100
+    assert entry["n"] == 495
+    assert entry["values"] == sorted(entry["values"])
+
+def test_arrays_are_padded_to_the_longest_column(reference_profile):
+    profile = {"version": "v", "columns": {
+        "a": {"n": 3, "missing_rate": 0.0, "values": [1.0, 2.0, 3.0]},
+        "b": {"n": 1, "missing_rate": 0.5, "values": [4.0]}
+    }}
+    values, n, missing_rate = reference_profile.profile_to_arrays(profile, ["a", "b"])
+    assert values.shape == (3, 2)
+    assert np.isnan(values[1:, 1]).all()
+    assert n.tolist() == [3, 1] and missing_rate.tolist() == [0.0, 0.5]
+    with pytest.raises(KeyError):
+        reference_profile.profile_to_arrays(profile, ["c"])
+
+def test_profile_covers_the_last_local_day(aws, reference_profile):
+    from src.ds import get_lakefs_store
+    from src.shared.partitions import DEFAULT_LOCATION, partition_key
+    lakefs_ds = get_lakefs_store(REPO, "http://lakefs.local:8000")
+    df = _frame(31)
+    lakefs_ds.save_df(df, partition_key("processed", DEFAULT_LOCATION["id"], 2025, 1))
+    lakefs_ds.save_json(key = "data/processed/manifest.json", data = {"last_updated_date": "2025-01-31"})
+    profile = reference_profile.update_reference_profile(lakefs_ds)
+    assert profile["rows"] == 31
+    assert reference_profile.load_reference_profile(lakefs_ds)["version"] == "2025-01-31"
+    assert reference_profile.load_reference_profile(lakefs_ds, "2025-01-31")["rows"] == 31
@@ -0,0 +1,50 @@
+import json
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import LocalStore, daily_frame, generate, hourly_frame, make_locations, raw_frame
+from src.shared.columns import FEATURES, HOURLY_FEATURES
+from src.shared.partitions import DEFAULT_LOCATION, partition_key
+
+DATES = pd.date_range("2022-01-01 05:00", "2023-12-31 05:00", freq="D", tz="UTC")
+
+def test_daily_values_are_consistent():
+    df = daily_frame(DATES, rng=np.random.default_rng(1))
+    assert list(df.columns) == ["date"] + FEATURES
+    assert (df[FEATURES].dtypes == np.float32).all()
+    dry = df["weather_code"] < 51
+    assert (df.loc[dry, "precipitation_sum"].fillna(0) == 0).all()
+    assert (df.loc[df["weather_code"] < 71, "snowfall_sum"].fillna(0) == 0).all()
+    assert (df["temperature_2m_min"] <= df["temperature_2m_max"]).mean() > 0.99
+    # REMOVE columns have their gaps, sunrise is never populated
+    assert df["sunrise"].isnull().all()
+    assert df["weather_code"].notnull().all()
+
+def test_same_seed_gives_the_same_frame():
+    a = daily_frame(DATES, rng=np.random.default_rng(3))
+    b = daily_frame(DATES, rng=np.random.default_rng(3))
+    pd.testing.assert_frame_equal(a, b)
+
+def test_hourly_frame_covers_every_hour():
+    df = hourly_frame(DATES[:10], rng=np.random.default_rng(0))
+    assert len(df) == 240 and list(df.columns) == ["time"] + HOURLY_FEATURES
+    assert df["time"].iloc[0] == DATES[0]
+    assert df[HOURLY_FEATURES].notnull().all().all()
+
+def test_raw_rows_start_at_local_midnight():
+    locations = make_locations(3)
+    assert locations[0]["id"] == DEFAULT_LOCATION["id"]
+    df = raw_frame("2025-01-01", "2025-01-31", locations)
+    assert len(df) == 93 and df["location"].nunique() == 3
+    local = df["date"].dt.tz_convert(DEFAULT_LOCATION["timezone"])
+    assert (local.dt.hour == 0).all()
+
+def test_generate_writes_partitions_and_manifests(aws, tmp_path):
+    stats = generate(LocalStore(str(tmp_path)), "2024-11-15", "2025-02-28", n_locations=2)
+    assert stats["raw_rows"] == stats["processed_rows"] == 2 * 106
+    # four months per location, raw and processed
+    assert stats["partitions"] == 2 * 4 * 2
+    loc_id = make_locations(2)[1]["id"]
+    processed = pd.read_csv(tmp_path / partition_key("processed", loc_id, 2025, 2))
+    assert len(processed) == 28 and "month_sin" in processed.columns
+    manifest = json.loads((tmp_path / "data/raw/manifest.json").read_text())
+    assert manifest["locations"][loc_id] == "2025-02-28"
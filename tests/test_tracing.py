@@ -0,0 +1,65 @@
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.shared import tracing
+
+def _emf_lines(capsys) -> dict[str, dict]:
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines() if l.startswith("{")]
+    return {l["Span"]: l for l in lines if "Span" in l}
+
+def test_spans_are_emitted_as_one_emf_line_per_name(capsys):
+
+    @tracing.traced("work.load")
+    def load(key):
+        with tracing.span("work.read", key=key) as s:
+            s.set(bytes=100, rows=10)
+
+    @tracing.traced_handler("fn")
+    def handler(event, context):
+        for key in ("a", "b"):
+            load(key)
+        return {"statusCode": 200}
+
+    assert handler({}, None) == {"statusCode": 200}
+    lines = _emf_lines(capsys)
+    assert set(lines) == {"handler", "work.load", "work.read"}
+    read = lines["work.read"]
+    assert read["Function"] == "fn"
+    assert read["Count"] == 2 and read["Bytes"] == 200 and read["Rows"] == 20
+    assert read["keys"] == ["a", "b"] and read["parent"] == "work.load"
+    assert lines["work.load"]["parent"] == "handler"
+    metrics = read["_aws"]["CloudWatchMetrics"][0]
+    assert metrics["Namespace"] == tracing.NAMESPACE
+    assert metrics["Dimensions"] == [["Function", "Span"]]
+    assert {m["Name"] for m in metrics["Metrics"]} == {"Count", "Duration", "MaxDuration", "Bytes", "Rows"}
+    assert read["MaxDuration"] <= read["Duration"]
+
+def test_errors_are_counted_and_spans_cleared(capsys):
+
+    @tracing.traced_handler("fn")
+    def handler(event, context):
+        with tracing.span("step"):
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        handler({}, None)
+    lines = _emf_lines(capsys)
+    assert lines["step"]["errors"] == 1 and lines["handler"]["errors"] == 1
+    assert tracing.summarize() == {}
+
+def test_spans_from_worker_threads_are_recorded(capsys):
+
+    @tracing.traced_handler("fn")
+    def handler(event, context):
+        def work(i):
+            with tracing.span("worker.item", key=str(i)):
+                pass
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(work, range(8)))
+        return {}
+
+    handler({}, None)
+    item = _emf_lines(capsys)["worker.item"]
+    # worker threads have their own span stack
+    assert item["Count"] == 8 and item["parent"] is None
+    assert len(item["keys"]) == tracing.MAX_KEYS
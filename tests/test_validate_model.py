@@ -0,0 +1,123 @@
+import json
+import pytest
+
+BUCKET = "weather-model-478492276227"
+
+@pytest.fixture
+def validate_model(aws, monkeypatch):
+    from src.model import validate_model
+    monkeypatch.setattr(validate_model, "s3", aws.s3)
+    return validate_model
+
+def _job(aws, name: str, accuracy: float):
+    aws.s3.put_object(Bucket=BUCKET, Key=f"models/{name}/output/metrics.json", Body=json.dumps({"accuracy": accuracy}))
+    aws.s3.put_object(Bucket=BUCKET, Key=f"models/{name}/output/model.tar.gz", Body=f"archive of {name}".encode("utf-8"))
+
+def _approved(aws) -> bytes | None:
+    return aws.s3.objects.get((BUCKET, "models/approved/model.tar.gz"))
+
+def _index(aws) -> dict:
+    return json.loads(aws.s3.objects[(BUCKET, "models/metrics_index.json")])
+
+def test_passing_model_is_copied_to_the_approved_key(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    assert validate_model.lambda_handler({"ModelName": "job-1"}, None)["validation_result"] == "Passed"
+    assert _approved(aws) == b"archive of job-1"
+    assert _index(aws)["production"] == "job-1"
+
+def test_failing_model_is_not_approved(aws, validate_model):
+    _job(aws, "job-1", 0.5)
+    assert validate_model.lambda_handler({"ModelName": "job-1"}, None)["validation_result"] == "Failed"
+    assert _approved(aws) is None
+
+def test_best_candidate_is_approved(aws, validate_model):
+    _job(aws, "job-1", 0.85)
+    _job(aws, "job-2", 0.9)
+    result = validate_model.lambda_handler({"CandidatePrefix": "job-"}, None)
+    assert result["validation_result"] == "Passed" and result["ModelName"] == "job-2"
+    assert _approved(aws) == b"archive of job-2"
+
+def test_approved_copy_is_not_a_candidate(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    validate_model.lambda_handler({"ModelName": "job-1"}, None)
+    assert validate_model.list_candidates("") == ["job-1"]
+
+def _feature_list(aws, name: str, features: list[str]):
+    aws.s3.put_object(Bucket=BUCKET, Key=f"features/{name}.json", Body=json.dumps({"version": name, "features": features}))
+
+def _current(aws) -> dict | None:
+    data = aws.s3.objects.get((BUCKET, "features/current.json"))
+    return None if data is None else json.loads(data)
+
+def test_feature_list_waits_for_the_deployment(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    _feature_list(aws, "job-1", ["a"])
+    validate_model.lambda_handler({"ModelName": "job-1"}, None)
+    assert _current(aws) is None
+    result = validate_model.lambda_handler({"Deployed": True, "ModelName": "job-1"}, None)
+    assert result["statusCode"] == 200
+    assert _current(aws)["version"] == "job-1"
+
+def test_model_without_a_list_removes_the_promoted_one(aws, validate_model):
+    _feature_list(aws, "job-1", ["a"])
+    validate_model.lambda_handler({"Deployed": True, "ModelName": "job-1"}, None)
+    validate_model.lambda_handler({"Deployed": True, "ModelName": "job-2"}, None)
+    assert _current(aws) is None
+
+def test_single_model_only_needs_the_threshold(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    validate_model.lambda_handler({"ModelName": "job-1"}, None)
+    _job(aws, "job-2", 0.85)
+    event = {"ModelName": "job-2", "min_improvement": 0.02}
+    assert validate_model.lambda_handler(event, None)["validation_result"] == "Passed"
+    assert _approved(aws) == b"archive of job-2"
+    assert _index(aws)["production"] == "job-2"
+
+def test_candidate_must_beat_production(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    validate_model.lambda_handler({"ModelName": "job-1"}, None)
+    _job(aws, "job-2", 0.91)
+    result = validate_model.lambda_handler({"Candidates": ["job-2"], "min_improvement": 0.02}, None)
+    assert result["validation_result"] == "Failed"
+    assert result["production"] == {"ModelName": "job-1", "accuracy": 0.9}
+    assert _approved(aws) == b"archive of job-1"
+
+def _archive(members: dict[str, bytes]) -> bytes:
+    import io
+    import tarfile
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def _output(aws, name: str, members: dict[str, bytes]):
+    aws.s3.put_object(Bucket=BUCKET, Key=f"models/{name}/output/output.tar.gz", Body=_archive(members))
+
+def test_sidecar_is_read_before_the_archive(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    _output(aws, "job-1", {"accuracy.json": json.dumps({"accuracy": 0.1}).encode("utf-8")})
+    assert validate_model.load_model_metrics("job-1") == {"accuracy": 0.9}
+
+def test_archive_is_streamed_up_to_the_member(aws, validate_model):
+    import os
+    archive = _archive({
+        "data/accuracy.json": json.dumps({"accuracy": 0.85}).encode("utf-8"),
+        "data/large.bin": os.urandom(1 << 20)
+    })
+    # a truncated tail is never reached once the member is found
+    aws.s3.put_object(Bucket=BUCKET, Key="models/job-1/output/output.tar.gz", Body=archive[:len(archive) // 2])
+    assert validate_model.load_model_metrics("job-1") == {"accuracy": 0.85}
+
+def test_other_members_skip_the_sidecar(aws, validate_model):
+    _job(aws, "job-1", 0.9)
+    _output(aws, "job-1", {"evaluation.json": json.dumps({"holdout": {}}).encode("utf-8")})
+    assert validate_model.load_model_metrics("job-1", "evaluation.json") == {"holdout": {}}
+
+def test_missing_metrics_fail_validation(aws, validate_model):
+    _output(aws, "job-1", {"model.pkl": b"model"})
+    with pytest.raises(FileNotFoundError):
+        validate_model.load_model_metrics("job-1")
+    assert validate_model.lambda_handler({"ModelName": "job-1"}, None)["validation_result"] == "Failed"